@@ -1,13 +1,34 @@
-from typing import Optional
+import asyncio
+import gzip
+import hashlib
+import hmac
+import json
+from typing import AsyncIterator, Literal, Optional
 
 import logging
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
+from pydantic import BaseModel
 
+from app.core.metrics import SERIALIZATION_DURATION
+from app.core.middleware import batch_cost, retry_after
 from app.core.settings import settings
-from app.schemas.blockchain import TaoDividendResponse
+from app.db.columnar import ColumnarSnapshotStore
+from app.db.history import DividendHistoryStore
+from app.schemas.blockchain import (
+    DividendPairResult,
+    TaoDividendBatchRequest,
+    TaoDividendBatchResponse,
+    TaoDividendHistoryResponse,
+    TaoDividendRankingResponse,
+    TaoDividendResponse,
+)
 from app.services.blockchain import BlockchainService
 from app.services.cache import CacheService
+from app.services.history import BlockNotFoundError, DividendHistoryService
+from app.services.snapshot import DividendSnapshotStore
+from app.tasks.trade import enqueue_trade
 
 router = APIRouter(prefix="/api/v1", tags=["blockchain"])
 
@@ -15,13 +36,119 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 logger = logging.getLogger("dividends_api")
 
-blockchain_service = BlockchainService(network_endpoint=settings.BLOCKCHAIN_SERVICE_URL)
-cache_service = CacheService(url=settings.CACHE_SERVER_URL)
+blockchain_service = BlockchainService(
+    network_endpoint=settings.BLOCKCHAIN_SERVICE_URL,
+    pool_size=settings.SUBSTRATE_POOL_SIZE,
+    health_check_interval=settings.SUBSTRATE_HEALTH_CHECK_INTERVAL,
+    acquire_timeout=settings.SUBSTRATE_ACQUIRE_TIMEOUT,
+    max_concurrent_subnets=settings.SUBNET_QUERY_CONCURRENCY,
+    subnet_timeout=settings.SUBNET_QUERY_TIMEOUT,
+)
+cache_service = CacheService(
+    url=settings.CACHE_SERVER_URL,
+    lock_lease=settings.CACHE_LOCK_LEASE,
+    lock_max_wait=settings.CACHE_LOCK_MAX_WAIT,
+    local_max_entries=settings.CACHE_LOCAL_MAX_ENTRIES,
+    local_ttl=settings.CACHE_LOCAL_TTL,
+)
+snapshot_store = DividendSnapshotStore(
+    blockchain=blockchain_service,
+    cache=cache_service,
+    head_ttl=settings.DIVIDENDS_HEAD_TTL,
+    snapshot_ttl=settings.DIVIDENDS_SNAPSHOT_TTL,
+    stale_ttl=settings.DIVIDENDS_STALE_TTL,
+    columnar=(
+        ColumnarSnapshotStore(
+            directory=settings.SNAPSHOT_MMAP_DIR, keep=settings.SNAPSHOT_MMAP_KEEP
+        )
+        if settings.SNAPSHOT_MMAP_DIR
+        else None
+    ),
+)
+history_service = DividendHistoryService(
+    blockchain=blockchain_service,
+    store=DividendHistoryStore(path=settings.HISTORY_DB_PATH),
+    max_points=settings.HISTORY_MAX_POINTS,
+    max_network_points=settings.HISTORY_MAX_NETWORK_POINTS,
+    max_concurrent_points=settings.HISTORY_QUERY_CONCURRENCY,
+)
+
+
+# Cached bodies carry a one-byte prefix saying whether they are gzipped.
+BODY_JSON = b"j"
+BODY_GZIP = b"g"
+GZIP_MIN_SIZE = 1024
+
+
+def encode_body(body: bytes) -> bytes:
+    """Prefix a JSON body with its encoding, gzipping large ones."""
+    if len(body) >= GZIP_MIN_SIZE:
+        return BODY_GZIP + gzip.compress(body, compresslevel=6)
+    return BODY_JSON + body
+
+
+def serialize_body(result: BaseModel) -> bytes:
+    """Serialize a response model into an encoded body, timing each step."""
+    with SERIALIZATION_DURATION.labels("json").time():
+        body = result.model_dump_json().encode()
+    kind = "gzip" if len(body) >= GZIP_MIN_SIZE else "raw"
+    with SERIALIZATION_DURATION.labels(kind).time():
+        return encode_body(body)
+
+
+def body_response(
+    payload: bytes, accept_encoding: str, headers: dict[str, str]
+) -> Response:
+    """Send an encoded body as-is, decompressing only for clients without gzip."""
+    marker, content = payload[:1], payload[1:]
+    if marker == BODY_GZIP:
+        if "gzip" in accept_encoding:
+            headers["Content-Encoding"] = "gzip"
+        else:
+            content = gzip.decompress(content)
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
+async def last_good_response(
+    netuid_key: str, hotkey_key: str, accept_encoding: str
+) -> Optional[Response]:
+    """The last complete response for a query, with its Age, if one is kept."""
+    entry = await cache_service.get_last_good(
+        f"dividends:last:response:{netuid_key}:{hotkey_key}"
+    )
+    if entry is None:
+        return None
+    payload, age = entry
+    logger.warning(
+        f"Serving {age:.0f}s old dividends for netuid {netuid_key}, hotkey {hotkey_key}"
+    )
+    headers = {"Age": str(int(age)), "Vary": "Accept-Encoding"}
+    return body_response(payload, accept_encoding, headers)
+
+
+def dividends_etag(block_hash: str, netuid: str, hotkey: str) -> str:
+    """Weak ETag identifying a query's result at a given block."""
+    digest = hashlib.sha1(f"{block_hash}:{netuid}:{hotkey}".encode()).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {tag.strip() for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags or etag.removeprefix("W/") in tags
 
 
 async def verify_token(token: str = Depends(oauth2_scheme)) -> str:
-    """Verify the authentication token."""
-    if token != settings.API_TOKEN.get_secret_value():
+    """
+    Verify the authentication token.
+
+    AuthRateLimitMiddleware already rejects bad tokens; this keeps the
+    routes' security scheme in the OpenAPI schema.
+    """
+    if not hmac.compare_digest(
+        token.encode(), settings.API_TOKEN.get_secret_value().encode()
+    ):
         raise HTTPException(
             status_code=401,
             detail="Invalid authentication token",
@@ -32,50 +159,291 @@ async def verify_token(token: str = Depends(oauth2_scheme)) -> str:
 
 @router.get("/tao_dividends", response_model=TaoDividendResponse)
 async def get_tao_dividends(
+    request: Request,
     netuid: Optional[int] = Query(None, description="Subnet ID to query"),
     hotkey: Optional[str] = Query(None, description="Account address to query"),
+    block: Optional[int] = Query(
+        None, ge=0, description="Query at this block number instead of the head"
+    ),
+    block_hash: Optional[str] = Query(
+        None, description="Query at this block hash instead of the head"
+    ),
     trade: bool = Query(
         False, description="Trigger trading based on sentiment analysis"
     ),
     token: str = Depends(verify_token),
-) -> TaoDividendResponse:
+) -> Response:
     """
     Get Tao dividends for a subnet and/or hotkey.
 
     - If netuid is omitted, returns data for all subnets
     - If hotkey is omitted, returns data for all hotkeys in the specified subnet(s)
-    - If trade=true, triggers a background task to analyze sentiment and stake/unstake
+    - If trade=true, queues a background task to analyze sentiment and stake/unstake
+      (netuid and hotkey default to the configured trade defaults; a trade
+      already queued or running for the same pair is not queued again)
+    - If block or block_hash is given, returns data at that historical block;
+      historical results are stored permanently and never re-queried
+    - Complete responses carry an ETag; send it back in If-None-Match to get
+      a 304 while the chain head has not moved (a 304 does not trigger a trade)
+    - If the chain cannot be queried within DIVIDENDS_QUERY_TIMEOUT, the last
+      complete result for the same netuid and hotkey is returned with an Age
+      header instead of an error
     """
+    netuid_key = "all" if netuid is None else str(netuid)
+    hotkey_key = hotkey or "all"
+    historical = block is not None or block_hash is not None
+    accept_encoding = request.headers.get("accept-encoding", "")
     try:
-        cache_key = f"dividends:{netuid or 'all'}:{hotkey or 'all'}"
+        if block_hash is None:
+            block_hash = (
+                await history_service.resolve_block_hash(block)
+                if block is not None
+                else await snapshot_store.head()
+            )
+        etag = dividends_etag(block_hash, netuid_key, hotkey_key)
+        headers = {"ETag": etag, "Vary": "Accept-Encoding"}
+
+        response_key = f"dividends:{block_hash}:response:{netuid_key}:{hotkey_key}"
+        payload = await cache_service.get_bytes(response_key)
+        stale_response = None
+        if payload is None:
+            if historical:
+                result = await history_service.query(
+                    block_hash, netuid=netuid, hotkey=hotkey
+                )
+            else:
+                # A stalled chain falls through to the last good result.
+                result = await asyncio.wait_for(
+                    snapshot_store.query(
+                        netuid=netuid, hotkey=hotkey, block_hash=block_hash
+                    ),
+                    settings.DIVIDENDS_QUERY_TIMEOUT,
+                )
+            payload = serialize_body(result)
+            if result.failed_netuids:
+                # Partial results must not be revalidated as complete ones.
+                del headers["ETag"]
+                if not historical:
+                    # Prefer the last complete result over a partial one.
+                    stale_response = await last_good_response(
+                        netuid_key, hotkey_key, accept_encoding
+                    )
+            else:
+                cached_payload = serialize_body(
+                    result.model_copy(update={"cached": True})
+                )
+                await cache_service.set_bytes(
+                    response_key,
+                    cached_payload,
+                    ttl=settings.DIVIDENDS_SNAPSHOT_TTL,
+                )
+                if not historical:
+                    await cache_service.set_last_good(
+                        f"dividends:last:response:{netuid_key}:{hotkey_key}",
+                        cached_payload,
+                        ttl=settings.DIVIDENDS_STALE_TTL,
+                    )
 
-        cached_result = await cache_service.get(cache_key)
-        if cached_result:
-            return TaoDividendResponse(**cached_result)
+        # Only complete results carry an ETag. A revalidation is not a new
+        # request for data, so it does not trigger a trade either.
+        if "ETag" in headers and etag_matches(
+            request.headers.get("if-none-match"), etag
+        ):
+            return Response(status_code=304, headers=headers)
+        response = stale_response or body_response(payload, accept_encoding, headers)
 
-        result = await blockchain_service.query_tao_dividends(
-            netuid=netuid, hotkey=hotkey
+        if trade:
+            trade_netuid = (
+                netuid if netuid is not None else settings.TRADE_DEFAULT_NETUID
+            )
+            trade_hotkey = hotkey or settings.TRADE_DEFAULT_HOTKEY
+            logger.info(
+                f"Triggering sentiment analysis and trading for netuid {trade_netuid}, hotkey {trade_hotkey}"
+            )
+            try:
+                await enqueue_trade(cache_service, trade_netuid, trade_hotkey)
+            except Exception as e:
+                # The dividend data is still valid; only the trade is lost.
+                logger.error(f"Failed to queue trade: {e}")
+
+        return response
+
+    except BlockNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        stale_response = (
+            None
+            if historical
+            else await last_good_response(netuid_key, hotkey_key, accept_encoding)
         )
+        if stale_response is not None:
+            logger.error(f"Error querying blockchain data: {e!r}")
+            return stale_response
+        raise HTTPException(
+            status_code=500, detail=f"Error querying blockchain data: {str(e)}"
+        )
+
 
-        data_to_cache = result.model_dump()
-        data_to_cache["cached"] = True
+@router.post("/tao_dividends/batch", response_model=TaoDividendBatchResponse)
+async def get_tao_dividends_batch(
+    request: Request,
+    batch: TaoDividendBatchRequest,
+    token: str = Depends(verify_token),
+) -> TaoDividendBatchResponse:
+    """
+    Resolve many (netuid, hotkey) pairs in one request.
+
+    All pairs are read at the same block; each subnet involved is loaded
+    from cache or scanned at most once. The request is charged per distinct
+    subnet and per pair against the caller's quota.
+    """
+    pairs = [(pair.netuid, pair.hotkey) for pair in batch.pairs]
+    charge_quota = getattr(request.state, "charge_quota", None)
+    if charge_quota is not None:
+        wait = await charge_quota(batch_cost(pairs, settings.RATE_LIMIT_COSTS))
+        if wait > 0:
+            raise HTTPException(
+                status_code=429,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": retry_after(wait)},
+            )
 
-        await cache_service.set(
-            key=cache_key,
-            value=data_to_cache,
-            ttl=120,
+    try:
+        block_hash = await snapshot_store.head()
+        dividends, failed, cached = await snapshot_store.lookup(block_hash, pairs)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error querying blockchain data: {str(e)}"
         )
 
-        # TODO: Implement sentiment analysis and trading logic
-        if trade:
-            # analyze_sentiment_and_trade is a Celery task
-            logger.info(
-                f"Triggering sentiment analysis and trading for netuid {netuid}, hotkey {hotkey}"
+    return TaoDividendBatchResponse(
+        results=[
+            DividendPairResult(
+                netuid=pair.netuid, hotkey=pair.hotkey, dividend=dividend
             )
+            for pair, dividend in zip(batch.pairs, dividends)
+        ],
+        block_hash=block_hash,
+        cached=cached,
+        failed_netuids=failed,
+    )
 
-        return result
 
+@router.get("/tao_dividends/rankings", response_model=TaoDividendRankingResponse)
+async def get_tao_dividend_rankings(
+    netuid: Optional[int] = Query(None, description="Only rank this subnet"),
+    aggregate: Optional[Literal["sum_by_hotkey", "sum_by_subnet"]] = Query(
+        None, description="Rank totals per hotkey or per subnet instead of rows"
+    ),
+    top_k: Optional[int] = Query(
+        None,
+        ge=1,
+        description="Keep the first k entries per subnet, or overall when aggregating",
+    ),
+    sort: Literal["desc", "asc"] = Query(
+        "desc", description="Largest or smallest first"
+    ),
+    offset: int = Query(0, ge=0, description="Number of entries to skip"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum entries to return"),
+    token: str = Depends(verify_token),
+) -> TaoDividendRankingResponse:
+    """
+    Rank dividends at the chain head without downloading every subnet.
+
+    - Without aggregate: (netuid, hotkey) rows ordered by dividend within
+      each subnet, subnets in netuid order, at most top_k per subnet
+    - aggregate=sum_by_hotkey: each hotkey's total across all subnets
+    - aggregate=sum_by_subnet: each subnet's total across its hotkeys
+    - Results are paginated with offset and limit; total counts all pages
+
+    Rankings are precomputed when a block is ingested, so the cost of a
+    request depends on the page size rather than on the network size.
+    """
+    if aggregate is not None and netuid is not None:
+        raise HTTPException(
+            status_code=422, detail="netuid cannot be combined with aggregate"
+        )
+    try:
+        return await snapshot_store.rankings(
+            netuid=netuid,
+            aggregate=aggregate,
+            top_k=top_k,
+            sort=sort,
+            offset=offset,
+            limit=limit,
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error querying blockchain data: {str(e)}"
         )
+
+
+@router.get("/tao_dividends/history", response_model=TaoDividendHistoryResponse)
+async def get_tao_dividends_history(
+    start_block: int = Query(..., ge=0, description="First block of the range"),
+    end_block: int = Query(..., ge=0, description="Last block of the range"),
+    step: int = Query(1, ge=1, description="Sample every step-th block"),
+    netuid: Optional[int] = Query(None, description="Subnet ID to query"),
+    hotkey: Optional[str] = Query(None, description="Account address to query"),
+    token: str = Depends(verify_token),
+) -> TaoDividendHistoryResponse:
+    """
+    Get a time series of Tao dividends over a block range.
+
+    Every sampled block is stored permanently, so repeated backtests over
+    the same range are served without touching the archive node. Ranges
+    reaching past the chain head return 404.
+    """
+    if end_block < start_block:
+        raise HTTPException(
+            status_code=422, detail="end_block must not be before start_block"
+        )
+    try:
+        points = await history_service.series(
+            start_block, end_block, step=step, netuid=netuid, hotkey=hotkey
+        )
+    except BlockNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error querying blockchain data: {str(e)}"
+        )
+
+    return TaoDividendHistoryResponse(
+        points=points,
+        netuid=netuid if netuid is not None else "all",
+        hotkey=hotkey if hotkey is not None else "all",
+    )
+
+
+@router.get("/tao_dividends/stream")
+async def stream_tao_dividends(
+    netuid: Optional[int] = Query(None, description="Subnet ID to query"),
+    hotkey: Optional[str] = Query(None, description="Account address to query"),
+    token: str = Depends(verify_token),
+) -> StreamingResponse:
+    """
+    Stream Tao dividends as NDJSON, one row per (netuid, hotkey).
+
+    Each line is {"netuid", "hotkey", "dividend", "block"}. Subnets already
+    stored for the block are read from their snapshots; the rest are sent
+    as soon as each storage page arrives. A subnet that cannot be queried
+    produces a single {"netuid", "block", "error"} line.
+    """
+    try:
+        block_hash = await snapshot_store.head()
+        dividend_rows = await snapshot_store.stream(
+            block_hash, netuid=netuid, hotkey=hotkey
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error querying blockchain data: {str(e)}"
+        )
+
+    async def rows() -> AsyncIterator[bytes]:
+        async for row in dividend_rows:
+            yield json.dumps(row).encode() + b"\n"
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
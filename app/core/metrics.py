@@ -0,0 +1,169 @@
+"""
+Prometheus metrics shared by the API, the ingester and Celery workers.
+
+Under gunicorn every worker is a separate process, so PROMETHEUS_MULTIPROC_DIR
+is set (app/gunicorn_conf.py) and prometheus_client writes each process's
+values to files there; render() merges them, so any worker answers /metrics
+for all of them. Single-process servers (uvicorn --reload, the ingester,
+Celery's thread pool) report from the default registry.
+"""
+
+import logging
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+
+logger = logging.getLogger("metrics")
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+_server_started = False
+
+
+def multiprocess_enabled() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def render() -> bytes:
+    """Every metric in the Prometheus text format, across worker processes."""
+    if not multiprocess_enabled():
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
+def start_metrics_server(port: int, addr: str = "0.0.0.0") -> None:
+    """Serve /metrics from a daemon thread, for processes without an API."""
+    global _server_started
+    if _server_started:
+        return
+    start_http_server(port, addr)
+    _server_started = True
+    logger.info(f"Serving metrics on {addr}:{port}")
+
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "API requests by route and status code",
+    ("method", "route", "status"),
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "API request latency until the response body is sent",
+    ("method", "route"),
+    buckets=DEFAULT_BUCKETS,
+)
+RATE_LIMITED = Counter(
+    "http_rate_limited_total",
+    "API requests rejected for exceeding their client's quota",
+)
+SUBSTRATE_CONNECT_DURATION = Histogram(
+    "substrate_connect_duration_seconds",
+    "Time to open and initialize a substrate connection",
+    buckets=DEFAULT_BUCKETS,
+)
+SUBSTRATE_CONNECT_FAILURES = Counter(
+    "substrate_connect_failures_total",
+    "Failed substrate connection attempts",
+)
+SUBSTRATE_OPEN_CONNECTIONS = Gauge(
+    "substrate_pool_open_connections",
+    "Pooled substrate connections that are open",
+    multiprocess_mode="livesum",
+)
+SUBSTRATE_BUSY_CONNECTIONS = Gauge(
+    "substrate_pool_busy_connections",
+    "Pooled substrate connections lent out to a query",
+    multiprocess_mode="livesum",
+)
+SUBNET_SCAN_DURATION = Histogram(
+    "subnet_scan_duration_seconds",
+    "Time to scan one subnet's TaoDividendsPerSubnet map",
+    ("outcome",),
+    buckets=DEFAULT_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by tier (l1 in-process, l2 Redis) and result",
+    ("tier", "result"),
+)
+CACHE_OPERATION_DURATION = Histogram(
+    "cache_operation_duration_seconds",
+    "Redis round-trip time by operation",
+    ("operation",),
+    buckets=DEFAULT_BUCKETS,
+)
+CACHE_LOCAL_ENTRIES = Gauge(
+    "cache_local_entries",
+    "Entries in the in-process cache tier",
+    ("kind",),
+    multiprocess_mode="livesum",
+)
+SERIALIZATION_DURATION = Histogram(
+    "serialization_duration_seconds",
+    "Time spent encoding response bodies",
+    ("kind",),
+    buckets=DEFAULT_BUCKETS,
+)
+UPSTREAM_REQUEST_DURATION = Histogram(
+    "upstream_request_duration_seconds",
+    "Outbound HTTP request latency by host, including retries",
+    ("host",),
+    buckets=DEFAULT_BUCKETS,
+)
+UPSTREAM_ERRORS = Counter(
+    "upstream_errors_total",
+    "Failed or retried outbound HTTP requests by host and reason",
+    ("host", "reason"),
+)
+INGEST_LAG = Gauge(
+    "dividend_ingest_lag_seconds",
+    "Time from a block header arriving to its snapshots being published",
+    multiprocess_mode="livemax",
+)
+INGEST_BLOCKS_BEHIND = Gauge(
+    "dividend_ingest_blocks_behind",
+    "Blocks between the chain head and the last block whose snapshots were published",
+    multiprocess_mode="livemax",
+)
+TASK_QUEUE_WAIT = Histogram(
+    "celery_task_queue_wait_seconds",
+    "Time a task spent in the broker before a worker started it",
+    ("task",),
+    buckets=DEFAULT_BUCKETS,
+)
+TASK_DURATION = Histogram(
+    "celery_task_duration_seconds",
+    "Task run time by final state",
+    ("task", "state"),
+    buckets=DEFAULT_BUCKETS,
+)
@@ -0,0 +1,198 @@
+import hashlib
+import hmac
+import math
+import time
+from functools import partial
+from typing import Optional
+from urllib.parse import parse_qs
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS, RATE_LIMITED
+from app.services.cache import CacheService
+
+# Query string values FastAPI parses as a true bool.
+TRUE_VALUES = {"1", "t", "true", "on", "y", "yes"}
+
+
+class MetricsMiddleware:
+    """
+    Record request counts and latency per route template.
+
+    Plain ASGI rather than BaseHTTPMiddleware, so streaming responses pass
+    through untouched and latency covers the whole body being sent.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The matched route's template keeps label cardinality bounded.
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.labels(method, path).observe(
+                time.perf_counter() - started
+            )
+            HTTP_REQUESTS.labels(method, path, str(status)).inc()
+
+
+class AuthRateLimitMiddleware:
+    """
+    Authenticate API requests and enforce a per-token quota.
+
+    Bearer tokens under ``prefix`` are compared in constant time, then the
+    request's cost (see ``request_cost``) is charged against the token's
+    GCRA quota in Redis, so the limit holds across every worker and
+    replica. Over-quota requests get a 429 with Retry-After. Paths outside
+    ``prefix`` (health checks, metrics, docs) are passed through.
+
+    Routes that can only be priced once their body is parsed (batch) are
+    passed through uncharged with ``request.state.charge_quota`` set: an
+    async callable taking a cost and returning the seconds to wait, as
+    ``CacheService.rate_limit`` does.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        cache: CacheService,
+        token: str,
+        rate: float,
+        burst: float,
+        costs: dict[str, int],
+        enabled: bool = True,
+        prefix: str = "/api/",
+    ) -> None:
+        self.app = app
+        self.cache = cache
+        self.token = token.encode()
+        self.rate = rate
+        self.burst = burst
+        self.costs = costs
+        self.enabled = enabled
+        self.prefix = prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        token = bearer_token(scope)
+        if token is None or not hmac.compare_digest(token, self.token):
+            response = JSONResponse(
+                {
+                    "detail": "Not authenticated"
+                    if token is None
+                    else "Invalid authentication token"
+                },
+                status_code=401,
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+            await response(scope, receive, send)
+            return
+
+        if self.enabled:
+            key = f"ratelimit:client:{hashlib.sha256(token).hexdigest()[:16]}"
+            cost = request_cost(scope, self.costs)
+            if cost is None:
+                scope.setdefault("state", {})["charge_quota"] = partial(
+                    self.charge, key
+                )
+            else:
+                wait = await self.charge(key, cost)
+                if wait > 0:
+                    response = JSONResponse(
+                        {"detail": "Rate limit exceeded"},
+                        status_code=429,
+                        headers={"Retry-After": retry_after(wait)},
+                    )
+                    await response(scope, receive, send)
+                    return
+
+        await self.app(scope, receive, send)
+
+    async def charge(self, key: str, cost: float) -> float:
+        wait = await self.cache.rate_limit(key, self.rate, self.burst, cost)
+        if wait > 0:
+            RATE_LIMITED.inc()
+        return wait
+
+
+def retry_after(wait: float) -> str:
+    """Retry-After header value for a rate limit wait in seconds."""
+    return str(max(1, math.ceil(wait)))
+
+
+def bearer_token(scope: Scope) -> Optional[bytes]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, credentials = value.partition(b" ")
+            if scheme.lower() == b"bearer" and credentials:
+                return credentials.strip()
+            return None
+    return None
+
+
+def request_cost(scope: Scope, costs: dict[str, int]) -> Optional[int]:
+    """
+    Quota units a request uses, by how much of the chain it may touch.
+
+    Keys of costs: "history" for that endpoint, then "network" (no netuid
+    or hotkey: every subnet), "subnet" (one subnet) and "hotkey" (a hotkey,
+    on one or all subnets via the reverse index), plus "trade" when
+    trade=true queues a trade; "default" for anything else. A request at a
+    past block has no reverse index, so a hotkey on every subnet is charged
+    as a subnet request: one storage entry is read per subnet. Batch
+    requests return None: the route charges ``batch_cost`` once it has the
+    pairs.
+    """
+    path = scope["path"]
+    default = costs.get("default", 1)
+    if path.endswith("/batch"):
+        return None
+    if path.endswith("/history"):
+        return costs.get("history", default)
+    if path.endswith("/rankings"):
+        # Answered from precomputed indexes.
+        return default
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    historical = "block" in query or "block_hash" in query
+    if "hotkey" in query and ("netuid" in query or not historical):
+        cost = costs.get("hotkey", default)
+    elif "netuid" in query or "hotkey" in query:
+        cost = costs.get("subnet", default)
+    else:
+        cost = costs.get("network", default)
+    if query.get("trade", [""])[-1].lower() in TRUE_VALUES:
+        cost += costs.get("trade", default)
+    return cost
+
+
+def batch_cost(pairs: list[tuple[int, str]], costs: dict[str, int]) -> int:
+    """
+    Quota units for a batch: each distinct subnet is charged as a subnet
+    request (it may be scanned) and each pair as a hotkey lookup.
+    """
+    default = costs.get("default", 1)
+    netuids = {netuid for netuid, _ in pairs}
+    return costs.get("subnet", default) * len(netuids) + costs.get(
+        "hotkey", default
+    ) * len(pairs)
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import Field, SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -7,6 +9,29 @@ class Settings(BaseSettings):
         ...,
         description="Authentication token for API access",
     )
+    RATE_LIMIT_ENABLED: bool = Field(
+        default=True,
+        description="Enforce per-token request quotas on the API",
+    )
+    RATE_LIMIT_RATE: float = Field(
+        default=10.0,
+        description="Quota units per second each API token may use on average",
+    )
+    RATE_LIMIT_BURST: float = Field(
+        default=100.0,
+        description="Quota units each API token may use at once before being limited",
+    )
+    RATE_LIMIT_COSTS: dict[str, int] = Field(
+        default={
+            "hotkey": 1,
+            "subnet": 2,
+            "network": 20,
+            "history": 20,
+            "trade": 10,
+            "default": 1,
+        },
+        description="Quota units per request by kind: hotkey, subnet, network (all subnets), history, trade (added when trade=true), default; a batch costs subnet per distinct netuid plus hotkey per pair",
+    )
     DATURA_API_KEY: SecretStr = Field(
         ...,
         description="API key for Datura.ai services",
@@ -19,14 +44,244 @@ class Settings(BaseSettings):
         ...,
         description="Redis connection URL for caching",
     )
+    CACHE_LOCK_LEASE: float = Field(
+        default=30.0,
+        description="Seconds the recompute lock for a cache key lasts without renewal; its holder renews it while computing",
+    )
+    CACHE_LOCK_MAX_WAIT: float = Field(
+        default=120.0,
+        description="Seconds to wait for another worker's computation of a cache key before computing it too",
+    )
+    CACHE_LOCAL_MAX_ENTRIES: int = Field(
+        default=1024,
+        description="Maximum entries in the in-process cache tier",
+    )
+    CACHE_LOCAL_TTL: float = Field(
+        default=60.0,
+        description="Maximum seconds an entry is kept in the in-process cache tier",
+    )
+    DIVIDENDS_HEAD_TTL: int = Field(
+        default=120,
+        description="Seconds before the block that dividends are served from is refreshed",
+    )
+    DIVIDENDS_SNAPSHOT_TTL: int = Field(
+        default=600,
+        description="Seconds that per-block dividend snapshots are kept in Redis",
+    )
+    DIVIDENDS_STALE_TTL: int = Field(
+        default=3600,
+        description="Seconds past expiry that the last good dividends data may be served while refreshing or while the chain is unavailable",
+    )
+    DIVIDENDS_QUERY_TIMEOUT: float = Field(
+        default=20.0,
+        description="Seconds a dividends query may take before the last good result is served instead",
+    )
+    INGEST_ENABLED: bool = Field(
+        default=True,
+        description="Prefetch dividend snapshots in the background as blocks arrive",
+    )
+    INGEST_EVERY_N_BLOCKS: int = Field(
+        default=1,
+        description="Refresh dividend snapshots every N blocks (e.g. the subnet tempo)",
+    )
+    INGEST_LEASE: float = Field(
+        default=30.0,
+        description="Seconds the ingest leader lease lasts without renewal",
+    )
+    INGEST_METRICS_PORT: int = Field(
+        default=9102,
+        description="Port serving Prometheus metrics from the standalone ingester (0 disables)",
+    )
+    SNAPSHOT_MMAP_DIR: str = Field(
+        default="data/snapshots",
+        description="Directory of memory-mapped columnar dividend snapshots shared by workers on this host; empty disables them",
+    )
+    SNAPSHOT_MMAP_KEEP: int = Field(
+        default=4,
+        description="Number of most recent blocks kept as columnar snapshots",
+    )
+    HISTORY_DB_PATH: str = Field(
+        default="data/history.sqlite3",
+        description="SQLite file holding dividends queried at historical blocks",
+    )
+    HISTORY_MAX_POINTS: int = Field(
+        default=500,
+        description="Maximum number of blocks sampled by one history request",
+    )
+    HISTORY_MAX_NETWORK_POINTS: int = Field(
+        default=20,
+        description="Maximum blocks sampled by a history request without netuid or hotkey (whole snapshots per block)",
+    )
+    HISTORY_QUERY_CONCURRENCY: int = Field(
+        default=8,
+        description="Historical blocks queried at once across all history requests",
+    )
     BLOCKCHAIN_SERVICE_URL: str = Field(
         ...,
         description="WebSocket endpoint for Bittensor blockchain",
     )
+    SUBSTRATE_POOL_SIZE: int = Field(
+        default=10,
+        description=(
+            "Number of persistent blockchain connections per process; keep it "
+            "above SUBNET_QUERY_CONCURRENCY so point queries are not starved by scans"
+        ),
+    )
+    SUBSTRATE_HEALTH_CHECK_INTERVAL: float = Field(
+        default=30.0,
+        description="Seconds between health checks of idle blockchain connections",
+    )
+    SUBSTRATE_ACQUIRE_TIMEOUT: float = Field(
+        default=10.0,
+        description="Seconds a query waits for a free blockchain connection before failing",
+    )
+    SUBNET_QUERY_CONCURRENCY: int = Field(
+        default=8,
+        description=(
+            "Maximum number of subnets scanned concurrently per process "
+            "(capped at SUBSTRATE_POOL_SIZE)"
+        ),
+    )
+    SUBNET_QUERY_TIMEOUT: float = Field(
+        default=30.0,
+        description="Seconds a single subnet scan may run once it has a connection",
+    )
+    HTTP_MAX_CONNECTIONS: int = Field(
+        default=100,
+        description="Maximum open connections in the shared outbound HTTP client",
+    )
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = Field(
+        default=20,
+        description="Maximum idle keep-alive connections kept by the HTTP client",
+    )
+    HTTP_KEEPALIVE_EXPIRY: float = Field(
+        default=30.0,
+        description="Seconds an idle keep-alive connection is kept open",
+    )
+    HTTP_PER_HOST_CONCURRENCY: int = Field(
+        default=10,
+        description="Maximum concurrent requests to a single upstream host",
+    )
+    HTTP_MAX_RETRIES: int = Field(
+        default=3,
+        description="Retries for upstream 429/5xx responses and transport errors",
+    )
+    HTTP2_ENABLED: bool = Field(
+        default=True,
+        description="Use HTTP/2 for upstream APIs",
+    )
+    SENTIMENT_BATCH_TOKENS: int = Field(
+        default=3000,
+        description="Approximate prompt token budget per batched sentiment request",
+    )
+    SENTIMENT_MAX_TWEET_CHARS: int = Field(
+        default=560,
+        description="Tweets longer than this are truncated before scoring",
+    )
+    SENTIMENT_CONCURRENT_BATCHES: int = Field(
+        default=4,
+        description="Maximum sentiment batch requests in flight at once",
+    )
+    SENTIMENT_TWEET_TTL: int = Field(
+        default=604800,
+        description="Seconds a per-tweet sentiment score stays cached",
+    )
+    TWEET_WINDOW_SIZE: int = Field(
+        default=50,
+        description="Most recent tweets kept per subnet for sentiment scoring",
+    )
+    TWEET_WINDOW_TTL: int = Field(
+        default=86400,
+        description="Seconds a subnet's tweet window and since-ID cursor are kept",
+    )
+    DATURA_RATE_LIMIT: float = Field(
+        default=1.0,
+        description="Datura API requests per second, shared by all processes",
+    )
+    DATURA_RATE_BURST: int = Field(
+        default=5,
+        description="Datura API requests allowed in a burst",
+    )
+    CHUTES_RATE_LIMIT: float = Field(
+        default=2.0,
+        description="Chutes API requests per second, shared by all processes",
+    )
+    CHUTES_RATE_BURST: int = Field(
+        default=4,
+        description="Chutes API requests allowed in a burst",
+    )
+    UPSTREAM_RATE_LIMIT_TIMEOUT: float = Field(
+        default=30.0,
+        description="Seconds a Datura or Chutes request may wait for its rate limit before failing",
+    )
+    TRADE_DEFAULT_NETUID: int = Field(
+        default=18,
+        description="Subnet traded when a trade request does not name one",
+    )
+    TRADE_DEFAULT_HOTKEY: str = Field(
+        default="5FFApaS75bv5pJHfAp2FVLBj9ZaXuFDjEypsaBNc1wCfe52v",
+        description="Hotkey traded when a trade request does not name one",
+    )
+    TRADE_INFLIGHT_TTL: int = Field(
+        default=600,
+        description="Seconds a queued or running trade blocks duplicates for the same pair",
+    )
+    TRADE_SWEEP_ENABLED: bool = Field(
+        default=False,
+        description="Periodically queue sentiment trades for every active subnet",
+    )
+    TRADE_SWEEP_INTERVAL: int = Field(
+        default=600,
+        description="Seconds between full-network sentiment/trade sweeps",
+    )
+    TRADE_SWEEP_MAX_SUBNETS: int = Field(
+        default=64,
+        description="Highest-priority subnets queued per sweep",
+    )
+    WALLET_NAME: Optional[str] = Field(
+        default=None,
+        description="Bittensor wallet whose coldkey signs stake extrinsics",
+    )
+    WALLET_PATH: str = Field(
+        default="~/.bittensor/wallets",
+        description="Directory containing Bittensor wallets",
+    )
+    WALLET_PASSWORD: SecretStr = Field(
+        default=SecretStr(""),
+        description="Password for an encrypted coldkey (empty if unencrypted)",
+    )
+    TRADE_BATCH_WINDOW: float = Field(
+        default=2.0,
+        description="Seconds stake/unstake intents are collected before submitting",
+    )
+    TRADE_MAX_BATCH_CALLS: int = Field(
+        default=64,
+        description="Maximum stake calls per utility.batch_all extrinsic",
+    )
+    CELERY_CONCURRENCY: int = Field(
+        default=32,
+        description="Concurrent tasks per Celery worker process (threads sharing one event loop)",
+    )
+    CELERY_TASK_TIMEOUT: float = Field(
+        default=300.0,
+        description="Seconds a Celery task's coroutine may run before it is cancelled",
+    )
+    CELERY_METRICS_PORT: int = Field(
+        default=9101,
+        description="Port serving Prometheus metrics from Celery workers (0 disables)",
+    )
     UVICORN_RELOAD: bool = Field(
         default=False,
         description="Enable auto-reload for Uvicorn server",
     )
+    WEB_CONCURRENCY: int = Field(
+        default=0,
+        description="API worker processes under gunicorn (0 uses the CPU count)",
+    )
+    METRICS_MULTIPROC_DIR: str = Field(
+        default="/tmp/prometheus_multiproc",
+        description="Directory where gunicorn workers write metrics for /metrics to aggregate; emptied at startup",
+    )
 
     model_config = SettingsConfigDict(extra="ignore")
 
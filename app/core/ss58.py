@@ -0,0 +1,162 @@
+import threading
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Optional, Sequence, Union
+
+import numpy as np
+from scalecodec.utils.ss58 import ss58_decode, ss58_encode
+
+# Generic Substrate prefix used by Bittensor; same value as
+# bittensor.core.settings.SS58_FORMAT, without importing the SDK.
+SS58_FORMAT = 42
+
+# Distinct hotkeys across the network fit comfortably; ~200 bytes each.
+ACCOUNT_CACHE_SIZE = 65536
+
+AccountId = Union[bytes, tuple[int, ...], tuple[tuple[int, ...]]]
+
+BASE58_ALPHABET = np.frombuffer(
+    b"123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz", dtype=np.uint8
+)
+# Five base58 digits per long-division step keep every remainder < 2**30.
+DIGITS_PER_STEP = 5
+STEP = np.uint64(58**DIGITS_PER_STEP)
+# Below this many keys numpy's per-call overhead outweighs the batching.
+VECTORIZE_MIN = 32
+
+
+def account_bytes(account_id: AccountId) -> bytes:
+    """
+    Raw 32 bytes of an AccountId storage key.
+
+    query_map yields keys as a tuple of ints, sometimes wrapped in a 1-tuple.
+    """
+    if (
+        isinstance(account_id, tuple)
+        and account_id
+        and isinstance(account_id[0], tuple)
+    ):
+        account_id = account_id[0]
+    return bytes(account_id)
+
+
+def decode_account_id(account_id: AccountId) -> str:
+    """Encode a raw AccountId storage key as an SS58 address."""
+    return decode_account_ids([account_id])[0]
+
+
+def decode_account_ids(account_ids: Sequence[AccountId]) -> list[str]:
+    """
+    Encode many AccountId storage keys as SS58 addresses.
+
+    Addresses seen before come from an LRU cache (hotkeys rarely change
+    between blocks); the rest are encoded together by ss58_encode_many.
+    """
+    accounts = [account_bytes(account_id) for account_id in account_ids]
+    addresses = address_cache.get_many(accounts)
+    missing = list(
+        dict.fromkeys(
+            account for account, address in zip(accounts, addresses) if address is None
+        )
+    )
+    if not missing:
+        return addresses
+    encoded = dict(zip(missing, ss58_encode_many(missing)))
+    address_cache.set_many(encoded)
+    return [
+        address if address is not None else encoded[account]
+        for account, address in zip(accounts, addresses)
+    ]
+
+
+def encode_account_id(address: str) -> Optional[bytes]:
+    """Raw AccountId of an SS58 address, or None if it is not a valid one."""
+    try:
+        account = bytes.fromhex(ss58_decode(address, valid_ss58_format=SS58_FORMAT))
+    except ValueError:
+        return None
+    return account if len(account) == 32 else None
+
+
+def ss58_encode_many(
+    accounts: Sequence[bytes], ss58_format: int = SS58_FORMAT
+) -> list[str]:
+    """
+    ss58_encode for a batch of 32-byte public keys.
+
+    Only the checksum is hashed per key; the base58 conversion runs as long
+    division over 32-bit limbs for the whole batch at once.
+    """
+    if len(accounts) < VECTORIZE_MIN or not 0 < ss58_format < 64:
+        return [ss58_encode(account, ss58_format) for account in accounts]
+    prefix = bytes([ss58_format])
+    payloads = []
+    for account in accounts:
+        if len(account) != 32:
+            raise ValueError("Invalid length for address")
+        payload = prefix + account
+        payloads.append(payload + blake2b(b"SS58PRE" + payload).digest()[:2])
+
+    size = len(payloads[0])
+    padding = b"\0" * (-size % 4)
+    limbs = (
+        np.frombuffer(b"".join(padding + payload for payload in payloads), dtype=">u4")
+        .reshape(len(payloads), -1)
+        .astype(np.uint64)
+    )
+    # The prefix byte is non-zero, so there are no leading "1"s and every
+    # address has the same length.
+    width = int(np.ceil(size * 8 / np.log2(58)))
+    steps = -(-width // DIGITS_PER_STEP)
+    digits = np.empty((len(payloads), steps * DIGITS_PER_STEP), dtype=np.uint8)
+    first = 0
+    for step in range(steps, 0, -1):
+        remainder = np.zeros(len(payloads), dtype=np.uint64)
+        for limb in range(first, limbs.shape[1]):
+            current = (remainder << np.uint64(32)) | limbs[:, limb]
+            limbs[:, limb] = current // STEP
+            remainder = current % STEP
+        while first < limbs.shape[1] and not limbs[:, first].any():
+            first += 1
+        for position in range(
+            step * DIGITS_PER_STEP - 1, (step - 1) * DIGITS_PER_STEP - 1, -1
+        ):
+            digits[:, position] = remainder % np.uint64(58)
+            remainder //= np.uint64(58)
+
+    text = np.ascontiguousarray(BASE58_ALPHABET[digits[:, -width:]])
+    return [address.decode() for address in text.view(f"S{width}").ravel()]
+
+
+class AddressCache:
+    """Thread-safe LRU of raw AccountId -> SS58 address."""
+
+    def __init__(self, max_entries: int = ACCOUNT_CACHE_SIZE) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[bytes, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, accounts: list[bytes]) -> list[Optional[str]]:
+        entries = self._entries
+        with self._lock:
+            addresses = [entries.get(account) for account in accounts]
+            for account, address in zip(accounts, addresses):
+                if address is not None:
+                    entries.move_to_end(account)
+        return addresses
+
+    def set_many(self, addresses: dict[bytes, str]) -> None:
+        with self._lock:
+            self._entries.update(addresses)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+address_cache = AddressCache()
@@ -0,0 +1,418 @@
+import asyncio
+import logging
+import os
+import re
+import shutil
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger("columnar_store")
+
+# Only block hashes are used as directory names.
+BLOCK_HASH_PATTERN = re.compile(r"^0x[0-9a-fA-F]{64}$")
+SAVED_PATTERN = re.compile(r"^0x[0-9a-fA-F]{64}(\.v\d+)?$")
+
+# Bumped whenever COLUMNS change, so older files are never mapped.
+FORMAT_VERSION = 2
+
+COLUMNS = (
+    "hotkeys",
+    "subnets",
+    "subnet_offsets",
+    "row_keys",
+    "amounts",
+    "by_amount",
+    "by_hotkey",
+    "hotkey_offsets",
+    "hotkey_totals",
+    "by_total",
+    "subnet_totals",
+)
+
+# Row keys pack (netuid, hotkey id) into one sortable integer.
+NETUID_SHIFT = 32
+HOTKEY_MASK = (1 << NETUID_SHIFT) - 1
+MAX_NETUID = 1 << 16
+
+
+class ColumnarSnapshot:
+    """
+    Dividends of every subnet at one block, stored as NumPy columns.
+
+    Hotkeys are interned into a sorted table and rows refer to them by
+    index. Rows are ordered by (netuid, hotkey id), and ``by_hotkey`` with
+    ``hotkey_offsets`` group them by hotkey, so a subnet slice, a hotkey
+    across all subnets, and batches of (netuid, hotkey) pairs are all
+    binary searches over arrays instead of walks over dicts of str/int.
+
+    Rankings are precomputed when the snapshot is built: ``by_amount``
+    orders each subnet's rows by dividend (largest first), and per-hotkey
+    and per-subnet totals are stored with ``by_total`` ranking hotkeys.
+    """
+
+    __slots__ = ("block_hash", *COLUMNS)
+
+    def __init__(
+        self,
+        block_hash: str,
+        hotkeys: np.ndarray,
+        subnets: np.ndarray,
+        subnet_offsets: np.ndarray,
+        row_keys: np.ndarray,
+        amounts: np.ndarray,
+        by_amount: np.ndarray,
+        by_hotkey: np.ndarray,
+        hotkey_offsets: np.ndarray,
+        hotkey_totals: np.ndarray,
+        by_total: np.ndarray,
+        subnet_totals: np.ndarray,
+    ) -> None:
+        self.block_hash = block_hash
+        self.hotkeys = hotkeys
+        self.subnets = subnets
+        self.subnet_offsets = subnet_offsets
+        self.row_keys = row_keys
+        self.amounts = amounts
+        self.by_amount = by_amount
+        self.by_hotkey = by_hotkey
+        self.hotkey_offsets = hotkey_offsets
+        self.hotkey_totals = hotkey_totals
+        self.by_total = by_total
+        self.subnet_totals = subnet_totals
+
+    @classmethod
+    def build(
+        cls, block_hash: str, snapshots: dict[int, dict[str, int]]
+    ) -> "ColumnarSnapshot":
+        """Convert per-subnet {hotkey: dividend} snapshots into columns."""
+        table = sorted(
+            {hotkey for snapshot in snapshots.values() for hotkey in snapshot}
+        )
+        ids = {hotkey: position for position, hotkey in enumerate(table)}
+        width = max((len(hotkey.encode()) for hotkey in table), default=1)
+        hotkeys = np.array([hotkey.encode() for hotkey in table], dtype=f"S{width}")
+
+        rows = sorted(
+            ((netuid << NETUID_SHIFT) | ids[hotkey], amount)
+            for netuid, snapshot in snapshots.items()
+            for hotkey, amount in snapshot.items()
+        )
+        row_keys = np.fromiter((key for key, _ in rows), np.uint64, len(rows))
+        amounts = np.fromiter((amount for _, amount in rows), np.uint64, len(rows))
+
+        subnets = np.array(sorted(snapshots), dtype=np.uint16)
+        subnet_offsets = np.searchsorted(
+            row_keys,
+            np.append(subnets.astype(np.uint64), np.uint64(MAX_NETUID))
+            << np.uint64(NETUID_SHIFT),
+        ).astype(np.uint32)
+        row_netuids = row_keys >> np.uint64(NETUID_SHIFT)
+        # Largest dividend first within each subnet, ties by hotkey (~ sorts
+        # unsigned integers in descending order without losing precision).
+        by_amount = np.lexsort((~amounts, row_netuids)).astype(np.uint32)
+
+        hotkey_ids = row_keys & np.uint64(HOTKEY_MASK)
+        by_hotkey = np.argsort(hotkey_ids, kind="stable").astype(np.uint32)
+        hotkey_offsets = np.searchsorted(
+            hotkey_ids[by_hotkey], np.arange(len(table) + 1, dtype=np.uint64)
+        ).astype(np.uint32)
+        hotkey_totals = np.zeros(len(table), dtype=np.uint64)
+        np.add.at(hotkey_totals, hotkey_ids.astype(np.intp), amounts)
+        subnet_totals = np.array(
+            [
+                int(amounts[start:end].sum(dtype=np.uint64))
+                for start, end in zip(subnet_offsets[:-1], subnet_offsets[1:])
+            ],
+            dtype=np.uint64,
+        )
+        return cls(
+            block_hash,
+            hotkeys=hotkeys,
+            subnets=subnets,
+            subnet_offsets=subnet_offsets,
+            row_keys=row_keys,
+            amounts=amounts,
+            by_amount=by_amount,
+            by_hotkey=by_hotkey,
+            hotkey_offsets=hotkey_offsets,
+            hotkey_totals=hotkey_totals,
+            by_total=np.argsort(~hotkey_totals, kind="stable").astype(np.uint32),
+            subnet_totals=subnet_totals,
+        )
+
+    def netuids(self) -> list[int]:
+        return self.subnets.tolist()
+
+    def hotkey_ids(self, hotkeys: list[str]) -> np.ndarray:
+        """Index of each hotkey in the intern table, or -1 if it has none."""
+        if not len(self.hotkeys) or not hotkeys:
+            return np.full(len(hotkeys), -1, dtype=np.int64)
+        encoded = [hotkey.encode() for hotkey in hotkeys]
+        fits = np.array([len(key) <= self.hotkeys.itemsize for key in encoded])
+        keys = np.array(encoded, dtype=self.hotkeys.dtype)
+        positions = np.searchsorted(self.hotkeys, keys).clip(max=len(self.hotkeys) - 1)
+        found = fits & (self.hotkeys[positions] == keys)
+        return np.where(found, positions, -1)
+
+    def subnet(self, netuid: int, hotkey: Optional[str] = None) -> dict[str, int]:
+        """One subnet's {hotkey: dividend}, optionally sliced to one hotkey."""
+        if hotkey:
+            amount = self.lookup([(netuid, hotkey)])[0]
+            return {} if amount is None else {hotkey: amount}
+        if not 0 <= netuid < MAX_NETUID:
+            return {}
+        start, end = np.searchsorted(
+            self.row_keys,
+            np.array([netuid << NETUID_SHIFT, (netuid + 1) << NETUID_SHIFT], np.uint64),
+        )
+        ids = self.row_keys[start:end] & np.uint64(HOTKEY_MASK)
+        return dict(
+            zip(
+                (key.decode() for key in self.hotkeys[ids].tolist()),
+                self.amounts[start:end].tolist(),
+            )
+        )
+
+    def hotkey(self, hotkey: str) -> dict[int, int]:
+        """A hotkey's dividend on every subnet it has one on."""
+        hotkey_id = int(self.hotkey_ids([hotkey])[0])
+        if hotkey_id < 0:
+            return {}
+        rows = self.by_hotkey[
+            self.hotkey_offsets[hotkey_id] : self.hotkey_offsets[hotkey_id + 1]
+        ]
+        netuids = (self.row_keys[rows] >> np.uint64(NETUID_SHIFT)).tolist()
+        return dict(zip(netuids, self.amounts[rows].tolist()))
+
+    def ranked_rows(
+        self,
+        netuids: list[int],
+        top_k: Optional[int] = None,
+        ascending: bool = False,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> tuple[np.ndarray, int]:
+        """
+        Page through each subnet's rows in dividend order, subnet by subnet.
+
+        Each subnet contributes at most top_k rows. Returns the row indices
+        of the requested page and the number of rows across all pages.
+        """
+        positions = np.searchsorted(self.subnets, np.array(netuids, dtype=np.int64))
+        present = [
+            int(position)
+            for position, netuid in zip(positions, netuids)
+            if position < len(self.subnets) and self.subnets[position] == netuid
+        ]
+        starts = self.subnet_offsets[present].astype(np.int64)
+        ends = self.subnet_offsets[[position + 1 for position in present]].astype(
+            np.int64
+        )
+        sizes = ends - starts if top_k is None else np.minimum(ends - starts, top_k)
+        total = int(sizes.sum())
+
+        remaining = total - offset if limit is None else min(limit, total - offset)
+        pages: list[np.ndarray] = []
+        for start, end, size in zip(starts.tolist(), ends.tolist(), sizes.tolist()):
+            if remaining <= 0:
+                break
+            if offset >= size:
+                offset -= size
+                continue
+            ranked = self.by_amount[start:end]
+            if ascending:
+                ranked = ranked[::-1]
+            page = ranked[offset : min(size, offset + remaining)]
+            pages.append(page)
+            remaining -= len(page)
+            offset = 0
+        rows = np.concatenate(pages) if pages else np.empty(0, dtype=np.uint32)
+        return rows, total
+
+    def rows(self, rows: np.ndarray) -> list[tuple[int, str, int]]:
+        """(netuid, hotkey, dividend) of the given rows."""
+        keys = self.row_keys[rows]
+        hotkeys = self.hotkeys[keys & np.uint64(HOTKEY_MASK)].tolist()
+        return list(
+            zip(
+                (keys >> np.uint64(NETUID_SHIFT)).tolist(),
+                (hotkey.decode() for hotkey in hotkeys),
+                self.amounts[rows].tolist(),
+            )
+        )
+
+    def ranked_hotkeys(
+        self,
+        top_k: Optional[int] = None,
+        ascending: bool = False,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> tuple[list[tuple[str, int, int]], int]:
+        """
+        Page through hotkeys by their total dividend across subnets.
+
+        Returns (hotkey, total, subnet count) for the page, and the number
+        of hotkeys across all pages (at most top_k).
+        """
+        order = self.by_total[::-1] if ascending else self.by_total
+        total = len(order) if top_k is None else min(top_k, len(order))
+        end = total if limit is None else min(total, offset + limit)
+        page = order[offset:end]
+        counts = self.hotkey_offsets[page + 1] - self.hotkey_offsets[page]
+        entries = zip(
+            (hotkey.decode() for hotkey in self.hotkeys[page].tolist()),
+            self.hotkey_totals[page].tolist(),
+            counts.tolist(),
+        )
+        return list(entries), total
+
+    def ranked_subnets(
+        self,
+        top_k: Optional[int] = None,
+        ascending: bool = False,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> tuple[list[tuple[int, int, int]], int]:
+        """
+        Page through subnets by their total dividend.
+
+        Returns (netuid, total, hotkey count) for the page, and the number
+        of subnets across all pages (at most top_k).
+        """
+        order = np.argsort(~self.subnet_totals, kind="stable")
+        if ascending:
+            order = order[::-1]
+        total = len(order) if top_k is None else min(top_k, len(order))
+        end = total if limit is None else min(total, offset + limit)
+        page = order[offset:end]
+        counts = self.subnet_offsets[page + 1] - self.subnet_offsets[page]
+        entries = zip(
+            self.subnets[page].tolist(),
+            self.subnet_totals[page].tolist(),
+            counts.tolist(),
+        )
+        return list(entries), total
+
+    def lookup(self, pairs: list[tuple[int, str]]) -> list[Optional[int]]:
+        """Dividend of each (netuid, hotkey) pair, None where there is none."""
+        if not pairs or not len(self.row_keys):
+            return [None] * len(pairs)
+        netuids = np.array([netuid for netuid, _ in pairs], dtype=np.int64)
+        hotkey_ids = self.hotkey_ids([hotkey for _, hotkey in pairs])
+        valid = (hotkey_ids >= 0) & (netuids >= 0) & (netuids < MAX_NETUID)
+        wanted = np.where(
+            valid, (netuids << NETUID_SHIFT) | hotkey_ids.clip(min=0), 0
+        ).astype(np.uint64)
+        positions = np.searchsorted(self.row_keys, wanted).clip(
+            max=len(self.row_keys) - 1
+        )
+        found = valid & (self.row_keys[positions] == wanted)
+        return [
+            amount if hit else None
+            for amount, hit in zip(self.amounts[positions].tolist(), found.tolist())
+        ]
+
+
+class ColumnarSnapshotStore:
+    """
+    Columnar snapshots saved as .npy files and memory-mapped read-only.
+
+    Every worker on a host maps the same files, so the operating system
+    keeps one copy of a block's dividends in its page cache no matter how
+    many processes serve it. Only the newest ``keep`` blocks are retained.
+    """
+
+    def __init__(self, directory: str = "data/snapshots", keep: int = 4) -> None:
+        self.directory = Path(directory)
+        self.keep = keep
+        self._loaded: OrderedDict[str, ColumnarSnapshot] = OrderedDict()
+
+    async def get(self, block_hash: str) -> Optional[ColumnarSnapshot]:
+        """Map a block's snapshot if some process on this host has saved it."""
+        snapshot = self._loaded.get(block_hash)
+        if (
+            snapshot is None
+            and BLOCK_HASH_PATTERN.match(block_hash)
+            # A stat is cheaper than the thread hop for blocks never saved.
+            and self._path(block_hash).is_dir()
+        ):
+            snapshot = await asyncio.to_thread(self._load, block_hash)
+            if snapshot is not None:
+                self._remember(snapshot)
+        return snapshot
+
+    async def put(
+        self, block_hash: str, snapshots: dict[int, dict[str, int]]
+    ) -> Optional[ColumnarSnapshot]:
+        """Build, save and map a block's snapshot from per-subnet snapshots."""
+        if not BLOCK_HASH_PATTERN.match(block_hash):
+            return None
+        try:
+            snapshot = await asyncio.to_thread(self._save, block_hash, snapshots)
+        except Exception as e:
+            logger.error(f"Failed to save columnar snapshot for {block_hash}: {e}")
+            return None
+        self._remember(snapshot)
+        return snapshot
+
+    def _remember(self, snapshot: ColumnarSnapshot) -> None:
+        self._loaded[snapshot.block_hash] = snapshot
+        self._loaded.move_to_end(snapshot.block_hash)
+        while len(self._loaded) > self.keep:
+            self._loaded.popitem(last=False)
+
+    def _path(self, block_hash: str) -> Path:
+        return self.directory / f"{block_hash}.v{FORMAT_VERSION}"
+
+    def _load(self, block_hash: str) -> Optional[ColumnarSnapshot]:
+        path = self._path(block_hash)
+        if not path.is_dir():
+            return None
+        try:
+            columns = {
+                name: np.load(path / f"{name}.npy", mmap_mode="r") for name in COLUMNS
+            }
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to map columnar snapshot {path}: {e}")
+            return None
+        return ColumnarSnapshot(block_hash, **columns)
+
+    def _save(
+        self, block_hash: str, snapshots: dict[int, dict[str, int]]
+    ) -> ColumnarSnapshot:
+        snapshot = ColumnarSnapshot.build(block_hash, snapshots)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        staging = self.directory / f".{block_hash}.{uuid.uuid4().hex}"
+        staging.mkdir()
+        for name in COLUMNS:
+            np.save(staging / f"{name}.npy", getattr(snapshot, name))
+        try:
+            # Readers only ever see a complete directory.
+            os.rename(staging, self._path(block_hash))
+        except OSError:
+            # Another worker saved the same block first.
+            shutil.rmtree(staging, ignore_errors=True)
+        self._prune()
+        return self._load(block_hash) or snapshot
+
+    def _prune(self) -> None:
+        try:
+            saved = sorted(
+                (
+                    (path.stat().st_mtime, path)
+                    for path in self.directory.iterdir()
+                    if SAVED_PATTERN.match(path.name)
+                ),
+                reverse=True,
+            )
+        except OSError as e:
+            # Typically another worker pruning at the same time.
+            logger.warning(f"Could not list columnar snapshots: {e}")
+            return
+        # Processes that still map a removed block keep reading it safely.
+        for _, path in saved[self.keep :]:
+            shutil.rmtree(path, ignore_errors=True)
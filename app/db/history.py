@@ -0,0 +1,235 @@
+import asyncio
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blocks (
+    number INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS block_netuids (
+    block_hash TEXT PRIMARY KEY,
+    netuids TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS subnet_snapshots (
+    block_hash TEXT NOT NULL,
+    netuid INTEGER NOT NULL,
+    PRIMARY KEY (block_hash, netuid)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS dividends (
+    block_hash TEXT NOT NULL,
+    netuid INTEGER NOT NULL,
+    hotkey TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    PRIMARY KEY (block_hash, netuid, hotkey)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS dividends_by_hotkey ON dividends (block_hash, hotkey);
+CREATE TABLE IF NOT EXISTS hotkey_lookups (
+    block_hash TEXT NOT NULL,
+    hotkey TEXT NOT NULL,
+    netuid INTEGER NOT NULL,
+    amount INTEGER,
+    PRIMARY KEY (block_hash, hotkey, netuid)
+) WITHOUT ROWID;
+"""
+
+
+class DividendHistoryStore:
+    """
+    Durable SQLite store for dividend data at historical blocks.
+
+    Everything stored here is keyed by block hash (or by finalized block
+    number) and therefore never changes, so entries have no expiry.
+    sqlite3 calls run in a worker thread to keep the event loop free.
+    """
+
+    def __init__(self, path: str = "data/history.sqlite3") -> None:
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        def call() -> T:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    return fn(conn)
+
+        return await asyncio.to_thread(call)
+
+    async def get_block_hash(self, number: int) -> Optional[str]:
+        row = await self._run(
+            lambda conn: conn.execute(
+                "SELECT hash FROM blocks WHERE number = ?", (number,)
+            ).fetchone()
+        )
+        return row[0] if row else None
+
+    async def put_block_hash(self, number: int, block_hash: str) -> None:
+        """Record a finalized block's hash; never call this for unfinalized blocks."""
+        await self._run(
+            lambda conn: conn.execute(
+                "INSERT OR IGNORE INTO blocks (number, hash) VALUES (?, ?)",
+                (number, block_hash),
+            )
+        )
+
+    async def get_block_number(self, block_hash: str) -> Optional[int]:
+        row = await self._run(
+            lambda conn: conn.execute(
+                "SELECT number FROM blocks WHERE hash = ?", (block_hash,)
+            ).fetchone()
+        )
+        return row[0] if row else None
+
+    async def get_netuids(self, block_hash: str) -> Optional[list[int]]:
+        row = await self._run(
+            lambda conn: conn.execute(
+                "SELECT netuids FROM block_netuids WHERE block_hash = ?",
+                (block_hash,),
+            ).fetchone()
+        )
+        return json.loads(row[0]) if row else None
+
+    async def put_netuids(self, block_hash: str, netuids: list[int]) -> None:
+        await self._run(
+            lambda conn: conn.execute(
+                "INSERT OR IGNORE INTO block_netuids (block_hash, netuids) "
+                "VALUES (?, ?)",
+                (block_hash, json.dumps(netuids)),
+            )
+        )
+
+    async def get_subnets(
+        self, block_hash: str, netuids: list[int]
+    ) -> dict[int, dict[str, int]]:
+        """Return the stored snapshots among netuids; missing ones are omitted."""
+
+        def read(conn: sqlite3.Connection) -> dict[int, dict[str, int]]:
+            placeholders = ",".join("?" * len(netuids))
+            stored = {
+                row[0]
+                for row in conn.execute(
+                    f"SELECT netuid FROM subnet_snapshots "
+                    f"WHERE block_hash = ? AND netuid IN ({placeholders})",
+                    (block_hash, *netuids),
+                )
+            }
+            snapshots: dict[int, dict[str, int]] = {netuid: {} for netuid in stored}
+            rows = conn.execute(
+                f"SELECT netuid, hotkey, amount FROM dividends "
+                f"WHERE block_hash = ? AND netuid IN ({placeholders})",
+                (block_hash, *netuids),
+            )
+            for netuid, hotkey, amount in rows:
+                if netuid in snapshots:
+                    snapshots[netuid][hotkey] = amount
+            return snapshots
+
+        if not netuids:
+            return {}
+        return await self._run(read)
+
+    async def get_hotkey(
+        self, block_hash: str, netuids: list[int], hotkey: str
+    ) -> tuple[dict[int, int], list[int]]:
+        """
+        Return a hotkey's known dividends per subnet and the netuids for
+        which neither a snapshot nor a lookup of the hotkey is stored.
+        """
+
+        def read(conn: sqlite3.Connection) -> tuple[dict[int, int], list[int]]:
+            placeholders = ",".join("?" * len(netuids))
+            known = {
+                row[0]
+                for row in conn.execute(
+                    f"SELECT netuid FROM subnet_snapshots "
+                    f"WHERE block_hash = ? AND netuid IN ({placeholders})",
+                    (block_hash, *netuids),
+                )
+            }
+            dividends = {
+                netuid: amount
+                for netuid, amount in conn.execute(
+                    "SELECT netuid, amount FROM dividends "
+                    "WHERE block_hash = ? AND hotkey = ?",
+                    (block_hash, hotkey),
+                )
+                if netuid in known
+            }
+            for netuid, amount in conn.execute(
+                f"SELECT netuid, amount FROM hotkey_lookups "
+                f"WHERE block_hash = ? AND hotkey = ? AND netuid IN ({placeholders})",
+                (block_hash, hotkey, *netuids),
+            ):
+                known.add(netuid)
+                if amount is not None:
+                    dividends[netuid] = amount
+            return dividends, [netuid for netuid in netuids if netuid not in known]
+
+        if not netuids:
+            return {}, []
+        return await self._run(read)
+
+    async def put_hotkey(
+        self,
+        block_hash: str,
+        hotkey: str,
+        netuids: list[int],
+        dividends: dict[int, int],
+    ) -> None:
+        """Record a hotkey lookup on netuids, including those where it had none."""
+        await self._run(
+            lambda conn: conn.executemany(
+                "INSERT OR IGNORE INTO hotkey_lookups "
+                "(block_hash, hotkey, netuid, amount) VALUES (?, ?, ?, ?)",
+                (
+                    (block_hash, hotkey, netuid, dividends.get(netuid))
+                    for netuid in netuids
+                ),
+            )
+        )
+
+    async def put_subnet(
+        self, block_hash: str, netuid: int, snapshot: dict[str, Any]
+    ) -> None:
+        def write(conn: sqlite3.Connection) -> None:
+            conn.executemany(
+                "INSERT OR IGNORE INTO dividends "
+                "(block_hash, netuid, hotkey, amount) VALUES (?, ?, ?, ?)",
+                (
+                    (block_hash, netuid, hotkey, amount)
+                    for hotkey, amount in snapshot.items()
+                ),
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO subnet_snapshots (block_hash, netuid) "
+                "VALUES (?, ?)",
+                (block_hash, netuid),
+            )
+
+        await self._run(write)
+
+    async def close(self) -> None:
+        def close() -> None:
+            with self._lock:
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+
+        await asyncio.to_thread(close)
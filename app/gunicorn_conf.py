@@ -0,0 +1,39 @@
+"""
+Gunicorn settings for serving the API on every core.
+
+    gunicorn -c python:app.gunicorn_conf app.main:app
+
+The app is imported once in the master and workers are forked from it, so
+FastAPI, numpy and the substrate client are loaded (and their pages shared)
+once per host rather than once per worker. Nothing opens a connection at
+import time: Redis, substrate, HTTP and SQLite clients are created lazily
+in each worker's lifespan.
+"""
+
+import os
+import shutil
+
+from app.core.settings import settings
+
+# Read by prometheus_client when the app is imported below, so it must be
+# set here; files left by a previous run would be counted as live workers.
+metrics_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", settings.METRICS_MULTIPROC_DIR
+)
+shutil.rmtree(metrics_dir, ignore_errors=True)
+os.makedirs(metrics_dir)
+
+bind = "0.0.0.0:8000"
+workers = settings.WEB_CONCURRENCY or os.cpu_count() or 1
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+loglevel = "info"
+# Lets in-flight streams finish on SIGTERM before workers are killed.
+graceful_timeout = 30
+
+
+def child_exit(server: object, worker: object) -> None:
+    """Drop an exited worker's live gauges from the aggregated metrics."""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
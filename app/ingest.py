@@ -0,0 +1,87 @@
+"""
+Standalone dividend ingester: python -m app.ingest
+
+Runs the block follower outside the API so web workers (INGEST_ENABLED=false)
+only read the warm snapshots it publishes to Redis and SNAPSHOT_MMAP_DIR.
+Ingest lag and blocks behind are served on INGEST_METRICS_PORT.
+"""
+
+import asyncio
+import logging
+import signal
+
+from app.core.metrics import start_metrics_server
+from app.core.settings import settings
+from app.db.columnar import ColumnarSnapshotStore
+from app.services.blockchain import BlockchainService
+from app.services.cache import CacheService
+from app.services.ingest import DividendIngester
+from app.services.snapshot import DividendSnapshotStore
+
+logger = logging.getLogger("ingest")
+
+
+async def run() -> None:
+    cache = CacheService(
+        url=settings.CACHE_SERVER_URL,
+        lock_lease=settings.CACHE_LOCK_LEASE,
+        lock_max_wait=settings.CACHE_LOCK_MAX_WAIT,
+    )
+    blockchain = BlockchainService(
+        network_endpoint=settings.BLOCKCHAIN_SERVICE_URL,
+        pool_size=settings.SUBSTRATE_POOL_SIZE,
+        health_check_interval=settings.SUBSTRATE_HEALTH_CHECK_INTERVAL,
+        acquire_timeout=settings.SUBSTRATE_ACQUIRE_TIMEOUT,
+        max_concurrent_subnets=settings.SUBNET_QUERY_CONCURRENCY,
+        subnet_timeout=settings.SUBNET_QUERY_TIMEOUT,
+    )
+    snapshots = DividendSnapshotStore(
+        blockchain=blockchain,
+        cache=cache,
+        head_ttl=settings.DIVIDENDS_HEAD_TTL,
+        snapshot_ttl=settings.DIVIDENDS_SNAPSHOT_TTL,
+        stale_ttl=settings.DIVIDENDS_STALE_TTL,
+        columnar=(
+            ColumnarSnapshotStore(
+                directory=settings.SNAPSHOT_MMAP_DIR, keep=settings.SNAPSHOT_MMAP_KEEP
+            )
+            if settings.SNAPSHOT_MMAP_DIR
+            else None
+        ),
+    )
+    ingester = DividendIngester(
+        blockchain=blockchain,
+        snapshots=snapshots,
+        cache=cache,
+        every_n_blocks=settings.INGEST_EVERY_N_BLOCKS,
+        lease=settings.INGEST_LEASE,
+    )
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    if settings.INGEST_METRICS_PORT:
+        start_metrics_server(settings.INGEST_METRICS_PORT)
+    await cache.start()
+    await blockchain.start()
+    await ingester.start()
+    logger.info("Dividend ingester running")
+    try:
+        await stop.wait()
+    finally:
+        await ingester.close()
+        await blockchain.close()
+        await cache.close()
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
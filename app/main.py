@@ -1,19 +1,69 @@
 import logging
+import sys
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
 
 import uvicorn
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 
+from app.api.dividends import (
+    blockchain_service,
+    cache_service,
+    history_service,
+    snapshot_store,
+)
 from app.api.dividends import router as dividends_router
+from app.core import metrics
+from app.core.middleware import AuthRateLimitMiddleware, MetricsMiddleware
 from app.core.settings import settings
+from app.services.http import http_pool
+from app.services.ingest import DividendIngester
 
 logger = logging.getLogger(__name__)
 
+dividend_ingester = DividendIngester(
+    blockchain=blockchain_service,
+    snapshots=snapshot_store,
+    cache=cache_service,
+    every_n_blocks=settings.INGEST_EVERY_N_BLOCKS,
+    lease=settings.INGEST_LEASE,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    await cache_service.start()
+    await blockchain_service.start()
+    if settings.INGEST_ENABLED:
+        await dividend_ingester.start()
+    try:
+        yield
+    finally:
+        await dividend_ingester.close()
+        await blockchain_service.close()
+        await cache_service.close()
+        await history_service.store.close()
+        await http_pool.close()
+
+
 app = FastAPI(
     title="Bittensor API Service",
     description="API service for Bittensor blockchain data with sentiment analysis",
     version="0.1.0",
+    lifespan=lifespan,
+)
+
+# Innermost, so CORS preflights are answered before authentication.
+app.add_middleware(
+    AuthRateLimitMiddleware,
+    cache=cache_service,
+    token=settings.API_TOKEN.get_secret_value(),
+    rate=settings.RATE_LIMIT_RATE,
+    burst=settings.RATE_LIMIT_BURST,
+    costs=settings.RATE_LIMIT_COSTS,
+    enabled=settings.RATE_LIMIT_ENABLED,
 )
 
 app.add_middleware(
@@ -24,6 +74,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(dividends_router)
 
 
@@ -41,14 +93,35 @@ async def health_check() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/health/substrate", tags=["health"])
+async def substrate_pool_stats() -> dict[str, Any]:
+    return blockchain_service.pool.stats()
+
+
+@app.get("/health/cache", tags=["health"])
+async def cache_stats() -> dict[str, Any]:
+    return cache_service.stats()
+
+
+@app.get("/health/ingest", tags=["health"])
+async def ingest_stats() -> dict[str, Any]:
+    return dividend_ingester.stats()
+
+
+@app.get("/metrics", tags=["health"], include_in_schema=False)
+async def prometheus_metrics() -> Response:
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 def main() -> None:
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        workers=2,
-        reload=settings.UVICORN_RELOAD,
-    )
+    if settings.UVICORN_RELOAD:
+        uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+        return
+    # One worker per core, forked after the app is imported (app/gunicorn_conf.py).
+    from gunicorn.app.wsgiapp import run
+
+    sys.argv = ["gunicorn", "-c", "python:app.gunicorn_conf", "app.main:app"]
+    run()
 
 
 if __name__ == "__main__":
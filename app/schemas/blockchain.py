@@ -1,4 +1,4 @@
-from typing import Union
+from typing import Optional, Union
 
 from pydantic import BaseModel, Field
 
@@ -14,3 +14,92 @@ class TaoDividendResponse(BaseModel):
         ..., description="The hotkey that was queried, or 'all'"
     )
     cached: bool = Field(False, description="Whether this result came from cache")
+    failed_netuids: list[int] = Field(
+        default_factory=list,
+        description="Subnets that could not be queried and are missing from results",
+    )
+
+
+class DividendPair(BaseModel):
+    netuid: int = Field(..., description="Subnet ID")
+    hotkey: str = Field(..., description="Hotkey account address")
+
+
+class TaoDividendBatchRequest(BaseModel):
+    pairs: list[DividendPair] = Field(
+        ..., min_length=1, max_length=1000, description="Pairs to resolve"
+    )
+
+
+class DividendPairResult(DividendPair):
+    dividend: Optional[int] = Field(
+        ..., description="Dividend for the pair, or null if it has none"
+    )
+
+
+class TaoDividendBatchResponse(BaseModel):
+    results: list[DividendPairResult] = Field(
+        ..., description="One result per requested pair, in request order"
+    )
+    block_hash: str = Field(..., description="Block the results were read at")
+    cached: bool = Field(False, description="Whether every subnet came from cache")
+    failed_netuids: list[int] = Field(
+        default_factory=list,
+        description="Subnets that could not be queried; their pairs are null",
+    )
+
+
+class DividendHistoryPoint(BaseModel):
+    block: int = Field(..., description="Block number")
+    block_hash: str = Field(..., description="Block hash")
+    results: dict[str, dict[str, int]] = Field(
+        ..., description="Dividend results by subnet and hotkey at this block"
+    )
+    cached: bool = Field(False, description="Whether this point came from storage")
+    failed_netuids: list[int] = Field(
+        default_factory=list,
+        description="Subnets that could not be queried at this block",
+    )
+
+
+class TaoDividendHistoryResponse(BaseModel):
+    points: list[DividendHistoryPoint] = Field(
+        ..., description="One entry per sampled block, in block order"
+    )
+    netuid: Union[int, str] = Field(
+        ..., description="The netuid that was queried, or 'all'"
+    )
+    hotkey: str = Field(..., description="The hotkey that was queried, or 'all'")
+
+
+class DividendRankingEntry(BaseModel):
+    netuid: Optional[int] = Field(
+        None, description="Subnet ID (absent when summing by hotkey)"
+    )
+    hotkey: Optional[str] = Field(
+        None, description="Hotkey account address (absent when summing by subnet)"
+    )
+    dividend: int = Field(
+        ..., description="Dividend, or the sum of dividends when aggregating"
+    )
+    count: int = Field(1, description="Number of (netuid, hotkey) dividends summed")
+
+
+class TaoDividendRankingResponse(BaseModel):
+    entries: list[DividendRankingEntry] = Field(
+        ..., description="The requested page of entries, in ranking order"
+    )
+    total: int = Field(..., description="Number of entries across all pages")
+    offset: int = Field(..., description="Index of the first entry of this page")
+    limit: int = Field(..., description="Maximum number of entries per page")
+    netuid: Union[int, str] = Field(
+        ..., description="The netuid that was ranked, or 'all'"
+    )
+    aggregate: Optional[str] = Field(None, description="How dividends were summed")
+    sort: str = Field(..., description="'desc' (largest first) or 'asc'")
+    block_hash: str = Field(..., description="Block the ranking was read at")
+    cached: bool = Field(False, description="Whether the ranking came from cache")
+    failed_netuids: list[int] = Field(
+        default_factory=list,
+        description="Subnets that could not be queried and are not ranked",
+    )
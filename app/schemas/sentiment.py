@@ -0,0 +1,14 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class SubnetSentiment(BaseModel):
+    netuid: int = Field(..., description="Subnet ID the tweets are about")
+    score: float = Field(
+        ..., ge=-100, le=100, description="Aggregate sentiment from -100 to +100"
+    )
+    tweet_scores: list[Optional[float]] = Field(
+        default_factory=list,
+        description="Per-tweet sentiment in input order; null if the model gave none",
+    )
@@ -1,15 +1,24 @@
 import asyncio
 import logging
-from typing import Any, Optional
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Optional
 
 from async_substrate_interface.async_substrate import AsyncSubstrateInterface
-from bittensor.core.chain_data import decode_account_id
-from bittensor.core.settings import SS58_FORMAT
 
-from app.schemas.blockchain import TaoDividendResponse
+from app.core.metrics import SUBNET_SCAN_DURATION
+from app.core.ss58 import SS58_FORMAT, decode_account_ids, encode_account_id
+from app.services.substrate import SubstrateConnectionPool
+from app.services.trading import TradeExecutor
+
+if TYPE_CHECKING:
+    from bittensor_wallet import Keypair
 
 logger = logging.getLogger("blockchain_service")
 
+# Storage entries fetched per connection hold when streaming a subnet;
+# each page is decoded to SS58 in one batch after the connection is freed.
+STREAM_PAGE_SIZE = 256
+
 
 class BlockchainService:
     """Service for interacting with the Bittensor blockchain."""
@@ -17,87 +26,347 @@ class BlockchainService:
     def __init__(
         self,
         network_endpoint: str = "wss://entrypoint-finney.opentensor.ai:443",
-        num_subnets: int = 20,
+        pool_size: int = 10,
+        health_check_interval: float = 30.0,
+        acquire_timeout: float = 10.0,
+        max_concurrent_subnets: int = 8,
+        subnet_timeout: float = 30.0,
+        wallet_name: Optional[str] = None,
+        wallet_path: Optional[str] = None,
+        wallet_password: Optional[str] = None,
+        trade_window: float = 2.0,
+        trade_max_batch_calls: int = 64,
     ) -> None:
         """Initialize the blockchain service with the specified endpoint."""
         self.network_endpoint = network_endpoint
-        self.num_subnets = num_subnets
         self.ss58_format = SS58_FORMAT
+        self.subnet_timeout = subnet_timeout
+        if max_concurrent_subnets > pool_size:
+            logger.warning(
+                f"Subnet concurrency {max_concurrent_subnets} exceeds the "
+                f"connection pool size {pool_size}; scanning {pool_size} at a time"
+            )
+            max_concurrent_subnets = pool_size
+        # Caps concurrent subnet scans across every caller in this process.
+        self._subnet_semaphore = asyncio.Semaphore(max_concurrent_subnets)
+        self.pool = SubstrateConnectionPool(
+            network_endpoint,
+            ss58_format=self.ss58_format,
+            size=pool_size,
+            health_check_interval=health_check_interval,
+            acquire_timeout=acquire_timeout,
+        )
+        self.trades = TradeExecutor(
+            self,
+            wallet_name=wallet_name,
+            wallet_path=wallet_path,
+            wallet_password=wallet_password,
+            window=trade_window,
+            max_batch_calls=trade_max_batch_calls,
+        )
+
+    async def start(self) -> None:
+        """Open the persistent connection pool."""
+        await self.pool.start()
 
-    async def query_tao_dividends(
-        self, netuid: Optional[int] = None, hotkey: Optional[str] = None
-    ) -> TaoDividendResponse:
-        """Query Tao dividends from the Bittensor blockchain asynchronously."""
+    async def close(self) -> None:
+        """Submit pending trades and close all pooled connections."""
+        await self.trades.close()
+        await self.pool.close()
+
+    async def get_chain_head(self) -> str:
+        """Return the hash of the current best block."""
+        async with self.pool.acquire() as substrate:
+            return await substrate.get_chain_head()
+
+    async def get_finalized_block_number(self) -> int:
+        """Return the height of the latest finalized block."""
+        async with self.pool.acquire() as substrate:
+            return await substrate.get_block_number(
+                await substrate.get_chain_finalised_head()
+            )
+
+    async def get_block_hash(self, block_number: int) -> str:
+        """Return the hash of the block at the given height."""
+        async with self.pool.acquire() as substrate:
+            return await substrate.get_block_hash(block_number)
+
+    async def follow_heads(
+        self, handler: Callable[[dict[str, Any]], Awaitable[None]]
+    ) -> None:
+        """
+        Feed every new block header to handler until the connection drops.
+
+        The subscription occupies its connection for as long as it runs, so
+        it uses a dedicated one instead of the shared pool.
+        """
         async with AsyncSubstrateInterface(
             self.network_endpoint, ss58_format=self.ss58_format
         ) as substrate:
+            await substrate.subscribe_block_headers(handler)
+
+    async def get_netuids(self, block_hash: str) -> list[int]:
+        """Return the netuids of all subnets that exist at the given block."""
+        async with self.pool.acquire() as substrate:
+            query_result = await substrate.query_map(
+                "SubtensorModule", "NetworksAdded", block_hash=block_hash
+            )
+            netuids = [netuid async for netuid, exists in query_result if exists.value]
+
+        return sorted(netuids)
+
+    async def fetch_subnet_dividends(
+        self, netuid: int, block_hash: str
+    ) -> dict[str, int]:
+        """
+        Scan TaoDividendsPerSubnet for one subnet at the given block.
+
+        Scans are bounded by the service-wide concurrency limit and time
+        out after subnet_timeout seconds, counted from when a connection
+        has been acquired.
+        """
+        async with self._subnet_semaphore:
+            started = time.perf_counter()
+            outcome = "error"
             try:
-                block_hash = await substrate.get_chain_head()
+                async with self.pool.acquire() as substrate:
+                    snapshot = await asyncio.wait_for(
+                        self._scan_subnet(substrate, netuid, block_hash),
+                        self.subnet_timeout,
+                    )
+                outcome = "ok"
+                return snapshot
+            except asyncio.TimeoutError:
+                outcome = "timeout"
+                raise
+            finally:
+                SUBNET_SCAN_DURATION.labels(outcome).observe(
+                    time.perf_counter() - started
+                )
+
+    async def _scan_subnet(
+        self, substrate: AsyncSubstrateInterface, netuid: int, block_hash: str
+    ) -> dict[str, int]:
+        query_result = await substrate.query_map(
+            "SubtensorModule",
+            "TaoDividendsPerSubnet",
+            [netuid],
+            block_hash=block_hash,
+        )
+        keys: list[Any] = []
+        dividends: list[int] = []
+        async for key, value in query_result:
+            keys.append(key)
+            dividends.append(value.value)
+        return dict(zip(decode_account_ids(keys), dividends))
 
-                results: dict[str, dict[str, Any]] = {}
+    async def _iter_subnet(
+        self, netuid: int, block_hash: str
+    ) -> AsyncIterator[list[tuple[str, int]]]:
+        """
+        Yield a subnet's (hotkey, dividend) pairs one page at a time.
 
-                netuids_to_query = (
-                    [netuid] if netuid is not None else range(1, self.num_subnets + 1)
+        Each page takes a scan slot and a pooled connection only while it
+        is fetched, so a slow consumer never holds either between pages.
+        """
+        start_key = None
+        while True:
+            async with self._subnet_semaphore, self.pool.acquire() as substrate:
+                page = await asyncio.wait_for(
+                    substrate.query_map(
+                        "SubtensorModule",
+                        "TaoDividendsPerSubnet",
+                        [netuid],
+                        block_hash=block_hash,
+                        start_key=start_key,
+                        page_size=STREAM_PAGE_SIZE,
+                    ),
+                    self.subnet_timeout,
+                )
+            records = page.records
+            if records:
+                yield list(
+                    zip(
+                        decode_account_ids([key for key, _ in records]),
+                        [value.value for _, value in records],
+                    )
                 )
+            if len(records) < STREAM_PAGE_SIZE or page.last_key is None:
+                return
+            start_key = page.last_key
 
-                async def process_subnet_query(
-                    net_id: int,
-                ) -> tuple[int, dict[str, Any]]:
-                    """Process query for a specific subnet."""
-                    try:
-                        query_result = await substrate.query_map(
-                            "SubtensorModule",
-                            "TaoDividendsPerSubnet",
-                            [net_id],
-                            block_hash=block_hash,
-                        )
+    async def fetch_hotkey_dividends(
+        self, netuids: list[int], hotkey: str, block_hash: str
+    ) -> dict[int, int]:
+        """
+        Read one hotkey's dividends on the given subnets without scanning them.
 
-                        subnet_dividends = {}
-                        async for key, value in query_result:
-                            account_id = decode_account_id(key)
+        The hotkey is turned into its raw AccountId once and the exact
+        (netuid, hotkey) double-map entries are fetched in a single
+        state_queryStorageAt call. Subnets where it has none are left out.
+        """
+        account_id = encode_account_id(hotkey)
+        if account_id is None or not netuids:
+            return {}
+        params = [[netuid, "0x" + account_id.hex()] for netuid in netuids]
+        async with self.pool.acquire() as substrate:
+            storage_keys = [
+                await substrate.create_storage_key(
+                    "SubtensorModule",
+                    "TaoDividendsPerSubnet",
+                    param,
+                    block_hash=block_hash,
+                )
+                for param in params
+            ]
+            results = await substrate.query_multi(storage_keys, block_hash=block_hash)
+        netuid_by_key = {
+            storage_key.to_hex(): netuid
+            for storage_key, netuid in zip(storage_keys, netuids)
+        }
+        dividends = {}
+        for storage_key, value in results:
+            amount = getattr(value, "value", value)
+            if amount is not None:
+                dividends[netuid_by_key[storage_key.to_hex()]] = amount
+        return dividends
 
-                            if hotkey and account_id != hotkey:
-                                continue
+    async def get_subnet_reserves(
+        self, netuids: list[int], block_hash: Optional[str] = None
+    ) -> dict[int, tuple[int, int]]:
+        """
+        Each subnet's (SubnetTAO, SubnetAlphaIn) pool reserves in rao.
 
-                            subnet_dividends[account_id] = value.value
+        TAO / alpha is the subnet's price. The root subnet stakes TAO
+        itself and is priced 1:1; subnets with an empty pool are left out.
+        """
+        reserves = {netuid: (1, 1) for netuid in netuids if netuid == 0}
+        priced = [netuid for netuid in netuids if netuid != 0]
+        if not priced:
+            return reserves
+        async with self.pool.acquire() as substrate:
+            storage_keys = [
+                await substrate.create_storage_key(
+                    "SubtensorModule", name, [netuid], block_hash=block_hash
+                )
+                for netuid in priced
+                for name in ("SubnetTAO", "SubnetAlphaIn")
+            ]
+            results = await substrate.query_multi(storage_keys, block_hash=block_hash)
+        values = {
+            storage_key.to_hex(): getattr(value, "value", value)
+            for storage_key, value in results
+        }
+        for index, netuid in enumerate(priced):
+            subnet_tao = values.get(storage_keys[2 * index].to_hex())
+            subnet_alpha = values.get(storage_keys[2 * index + 1].to_hex())
+            if subnet_tao and subnet_alpha:
+                reserves[netuid] = (subnet_tao, subnet_alpha)
+        return reserves
 
-                        return net_id, subnet_dividends
-                    except Exception as e:
-                        logger.error(f"Error querying netuid {net_id}: {str(e)}")
-                        return net_id, {}
+    async def get_block_number(self, block_hash: str) -> int:
+        """Return the height of the block with the given hash."""
+        async with self.pool.acquire() as substrate:
+            return await substrate.get_block_number(block_hash)
 
-                tasks = [process_subnet_query(net_id) for net_id in netuids_to_query]
-                subnet_results = await asyncio.gather(*tasks)
+    async def stream_tao_dividends(
+        self,
+        block_hash: str,
+        netuids: list[int],
+        block_number: int,
+        buffer_size: int = 1000,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Stream dividend rows for several subnets as their pages arrive.
 
-                for net_id, subnet_data in subnet_results:
-                    if subnet_data:
-                        results[f"netuid_{net_id}"] = subnet_data
+        Subnets are scanned concurrently under the service-wide limit and
+        rows pass through a bounded queue, so memory stays flat regardless
+        of network size. A subnet that fails yields a single error row.
+        """
+        queue: asyncio.Queue[Optional[dict[str, Any]]] = asyncio.Queue(buffer_size)
 
+        async def produce(net_id: int) -> None:
+            try:
+                async for page in self._iter_subnet(net_id, block_hash):
+                    for account_id, dividend in page:
+                        await queue.put(
+                            {
+                                "netuid": net_id,
+                                "hotkey": account_id,
+                                "dividend": dividend,
+                                "block": block_number,
+                            }
+                        )
             except Exception as e:
-                logger.error(f"Failed to query blockchain: {str(e)}")
-                raise RuntimeError(f"Blockchain query failed: {str(e)}")
-
-        return TaoDividendResponse(
-            results=results,
-            netuid=netuid if netuid is not None else "all",
-            hotkey=hotkey if hotkey is not None else "all",
-            cached=False,
-        )
+                logger.error(f"Error streaming netuid {net_id}: {e!r}")
+                await queue.put(
+                    {"netuid": net_id, "block": block_number, "error": repr(e)}
+                )
 
-    async def stake_tao(
+        async def produce_all() -> None:
+            try:
+                await asyncio.gather(*(produce(net_id) for net_id in netuids))
+            finally:
+                await queue.put(None)
+
+        producer = asyncio.create_task(produce_all())
+        try:
+            while (row := await queue.get()) is not None:
+                yield row
+        finally:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+    async def get_account_next_index(self, address: str) -> int:
+        """Return the next nonce for an account, counting pooled transactions."""
+        async with self.pool.acquire() as substrate:
+            return await substrate.get_account_next_index(address)
+
+    async def submit_calls(
         self,
-        amount_tao: float,
-        hotkey: str = "5FFApaS75bv5pJHfAp2FVLBj9ZaXuFDjEypsaBNc1wCfe52v",
-        netuid: int = 18,
-    ) -> str | None:
-        logger.info("Staking TAO...")
-        return
+        calls: list[tuple[str, str, dict[str, Any]]],
+        keypair: "Keypair",
+        nonce: Optional[int] = None,
+    ) -> str:
+        """
+        Sign and submit calls as one extrinsic; several go in a
+        utility.batch_all, which reverts them all if any fails.
+
+        Returns the extrinsic hash without waiting for inclusion.
+        """
+        async with self.pool.acquire() as substrate:
+            composed = [
+                await substrate.compose_call(module, function, params)
+                for module, function, params in calls
+            ]
+            call = (
+                composed[0]
+                if len(composed) == 1
+                else await substrate.compose_call(
+                    "Utility", "batch_all", {"calls": composed}
+                )
+            )
+            extrinsic = await substrate.create_signed_extrinsic(
+                call=call, keypair=keypair, nonce=nonce
+            )
+            receipt = await substrate.submit_extrinsic(
+                extrinsic, wait_for_inclusion=False, wait_for_finalization=False
+            )
+            return receipt.extrinsic_hash
+
+    async def stake_tao(
+        self, amount_tao: float, hotkey: str, netuid: int
+    ) -> Optional[str]:
+        """Stake TAO to a hotkey on a subnet; batched and netted with other trades."""
+        logger.info(f"Staking {amount_tao} TAO to {hotkey} on subnet {netuid}")
+        return await self.trades.submit(hotkey, netuid, amount_tao)
 
     async def unstake_tao(
-        self,
-        amount_tao: float,
-        hotkey: str = "5FFApaS75bv5pJHfAp2FVLBj9ZaXuFDjEypsaBNc1wCfe52v",
-        netuid: int = 18,
-    ) -> None:
-        logger.info("Unstaking TAO...")
-        return
+        self, amount_tao: float, hotkey: str, netuid: int
+    ) -> Optional[str]:
+        """
+        Unstake amount_tao worth of alpha from a hotkey on a subnet; batched
+        and netted with other trades.
+        """
+        logger.info(f"Unstaking {amount_tao} TAO from {hotkey} on subnet {netuid}")
+        return await self.trades.submit(hotkey, netuid, -amount_tao)
@@ -1,19 +1,177 @@
+import asyncio
 import json
 import logging
-from typing import Any, Optional
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Generic, Optional, TypeVar
 
 import redis.asyncio as redis
 
+from prometheus_client import Gauge
+
+from app.core.metrics import (
+    CACHE_LOCAL_ENTRIES,
+    CACHE_OPERATION_DURATION,
+    CACHE_REQUESTS,
+)
+
 logger = logging.getLogger("cache_service")
 
+# Delete the lock only if it is still held by the caller's token.
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# Extend the lock's expiry only if it is still held by the caller's token.
+RENEW_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Token bucket refilled at ARGV[1] tokens/s up to ARGV[2]; takes ARGV[3]
+# tokens if available. Returns the seconds to wait before retrying (0 if
+# taken) as a string, since Lua numbers are truncated to integers.
+TAKE_TOKENS_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", tostring(now))
+redis.call("PEXPIRE", KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+# GCRA limiter: KEYS[1] holds the theoretical arrival time (TAT). Each unit
+# of cost advances it by ARGV[1] seconds and requests are allowed while it
+# runs at most ARGV[2] seconds ahead of now. Returns the seconds to wait
+# (0 if allowed) as a string; a rejected request does not consume quota.
+GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local tat = math.max(tonumber(redis.call("GET", KEYS[1])) or now, now)
+local new_tat = tat + cost * interval
+local wait = new_tat - tolerance - now
+if wait > 0 then
+    return tostring(wait)
+end
+redis.call("SET", KEYS[1], tostring(new_tat), "PX", math.ceil((new_tat - now) * 1000) + 1000)
+return "0"
+"""
+
+Factory = Callable[[], Awaitable[dict[str, Any]]]
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+# Prefix of the copies that outlive a key's (soft) TTL for stale reads.
+STALE_PREFIX = "stale:"
+
+V = TypeVar("V")
+
+
+class LocalCache(Generic[V]):
+    """Size-bounded in-process LRU cache with per-entry expiry."""
+
+    def __init__(
+        self, max_entries: int = 1024, ttl: float = 60.0, size: Optional[Gauge] = None
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.size = size
+        self._entries: OrderedDict[str, tuple[float, V]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[V]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self._resized()
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: V, ttl: Optional[float] = None) -> None:
+        lifetime = self.ttl if ttl is None else min(ttl, self.ttl)
+        if lifetime <= 0:
+            return
+        self._entries[key] = (time.monotonic() + lifetime, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._resized()
+
+    def delete(self, key: str) -> None:
+        if self._entries.pop(key, None) is not None:
+            self._resized()
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._resized()
+
+    def _resized(self) -> None:
+        if self.size is not None:
+            self.size.set(len(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
 
 class CacheService:
     def __init__(
-        self, url: str = "redis://localhost:6379/0", default_ttl: int = 120
+        self,
+        url: str = "redis://localhost:6379/0",
+        default_ttl: int = 120,
+        lock_lease: float = 30.0,
+        lock_max_wait: float = 120.0,
+        lock_poll_interval: float = 0.05,
+        local_max_entries: int = 1024,
+        local_ttl: float = 60.0,
     ) -> None:
         self.url = url
         self.default_ttl = default_ttl
+        self.lock_lease = lock_lease
+        self.lock_max_wait = lock_max_wait
+        self.lock_poll_interval = lock_poll_interval
         self._client: Optional[redis.Redis] = None
+        self._raw_client: Optional[redis.Redis] = None
+        self._inflight: dict[str, asyncio.Task] = {}
+        # The in-process tier is only consulted while the invalidation
+        # listener runs, so other workers' writes can never be missed.
+        self._local: LocalCache[dict[str, Any]] = LocalCache(
+            max_entries=local_max_entries,
+            ttl=local_ttl,
+            size=CACHE_LOCAL_ENTRIES.labels("json"),
+        )
+        self._local_bytes: LocalCache[bytes] = LocalCache(
+            max_entries=local_max_entries,
+            ttl=local_ttl,
+            size=CACHE_LOCAL_ENTRIES.labels("bytes"),
+        )
+        self._local_enabled = False
+        self._instance_id = uuid.uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+        self._stats = {"l1_hits": 0, "l1_misses": 0, "l2_hits": 0, "l2_misses": 0}
 
     async def _get_client(self) -> Optional[redis.Redis]:
         if self._client is None:
@@ -27,43 +185,541 @@ class CacheService:
                 return None
         return self._client
 
+    async def _get_raw_client(self) -> Optional[redis.Redis]:
+        if self._raw_client is None:
+            try:
+                self._raw_client = redis.from_url(self.url, decode_responses=False)
+            except Exception as e:
+                logger.error(f"Failed to initialize Redis client: {e}")
+                self._raw_client = None
+                return None
+        return self._raw_client
+
+    async def start(self) -> None:
+        """Enable the in-process tier and listen for cross-worker invalidations."""
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen_for_invalidations())
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss counters for the in-process (l1) and Redis (l2) tiers."""
+        return {
+            **self._stats,
+            "l1_enabled": self._local_enabled,
+            "l1_entries": len(self._local) + len(self._local_bytes),
+        }
+
+    def _count(self, tier: str, result: str) -> None:
+        suffix = "hits" if result == "hit" else "misses"
+        self._stats[f"{tier}_{suffix}"] += 1
+        CACHE_REQUESTS.labels(tier, result).inc()
+
+    async def _execute(self, pipe: redis.client.Pipeline, operation: str) -> list[Any]:
+        started = time.perf_counter()
+        try:
+            return await pipe.execute()
+        finally:
+            CACHE_OPERATION_DURATION.labels(operation).observe(
+                time.perf_counter() - started
+            )
+
     async def get(self, key: str) -> Optional[dict[str, Any]]:
+        return (await self.get_many([key]))[0]
+
+    async def get_many(self, keys: list[str]) -> list[Optional[dict[str, Any]]]:
+        """Read several keys: in-process tier first, the rest in one round trip."""
+        values: list[Optional[dict[str, Any]]] = [None] * len(keys)
+        remote: list[int] = []
+        for position, key in enumerate(keys):
+            if self._local_enabled:
+                local_value = self._local.get(key)
+                if local_value is not None:
+                    self._count("l1", "hit")
+                    values[position] = local_value
+                    continue
+                self._count("l1", "miss")
+            remote.append(position)
+        if not remote:
+            return values
+
         client = await self._get_client()
+        if client is None:
+            return values
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                for position in remote:
+                    pipe.get(keys[position])
+                    pipe.pttl(keys[position])
+                replies = await self._execute(pipe, "get")
+        except Exception as e:
+            logger.error(f"Redis GET failed for keys {keys[:3]}...: {e}")
+            return values
+
+        for offset, position in enumerate(remote):
+            key = keys[position]
+            cached_value, remaining_ms = replies[2 * offset], replies[2 * offset + 1]
+            if cached_value is None:
+                self._count("l2", "miss")
+                continue
+            self._count("l2", "hit")
+            try:
+                value = json.loads(cached_value)
+            except json.JSONDecodeError as e:
+                logger.error(f"Failed to decode JSON for key '{key}': {e}")
+                continue
+            if self._local_enabled:
+                # Never keep a value locally for longer than Redis would.
+                ttl = remaining_ms / 1000 if remaining_ms > 0 else None
+                self._local.set(key, value, ttl)
+            values[position] = value
+        return values
+
+    async def set(
+        self,
+        key: str,
+        value: dict[str, Any],
+        ttl: Optional[int] = None,
+        stale_ttl: Optional[int] = None,
+    ) -> None:
+        """
+        Store value for ttl seconds.
+
+        With stale_ttl, a copy is also kept for ttl + stale_ttl seconds that
+        get_or_compute serves while the key is being recomputed.
+        """
+        client = await self._get_client()
+        if client is None:
+            return
+        expire = ttl if ttl is not None else self.default_ttl
+        try:
+            data_str = json.dumps(value)
+        except Exception as e:
+            logger.error(f"Could not serialize value for key '{key}': {e}")
+            return
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.set(key, data_str, ex=expire)
+                self._publish_invalidation(pipe, key)
+                if stale_ttl is not None:
+                    pipe.set(STALE_PREFIX + key, data_str, ex=expire + stale_ttl)
+                    self._publish_invalidation(pipe, STALE_PREFIX + key)
+                await self._execute(pipe, "set")
+        except Exception as e:
+            logger.error(f"Redis SET failed for key '{key}': {e}")
+            return
+        if self._local_enabled:
+            self._local.set(key, value, expire)
+            if stale_ttl is not None:
+                self._local.set(STALE_PREFIX + key, value, expire + stale_ttl)
+
+    async def set_many(
+        self, items: dict[str, dict[str, Any]], ttl: Optional[int] = None
+    ) -> None:
+        """Write several keys with the same TTL in one round trip."""
+        client = await self._get_client()
+        if client is None or not items:
+            return
+        expire = ttl if ttl is not None else self.default_ttl
+        try:
+            encoded = {key: json.dumps(value) for key, value in items.items()}
+        except Exception as e:
+            logger.error(f"Could not serialize values for keys {list(items)[:3]}: {e}")
+            return
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                for key, data_str in encoded.items():
+                    pipe.set(key, data_str, ex=expire)
+                    self._publish_invalidation(pipe, key)
+                await self._execute(pipe, "set")
+        except Exception as e:
+            logger.error(f"Redis SET failed for keys {list(items)[:3]}...: {e}")
+            return
+        if self._local_enabled:
+            for key, value in items.items():
+                self._local.set(key, value, expire)
+
+    async def get_bytes(self, key: str) -> Optional[bytes]:
+        """Read a raw (pre-serialized) value, trying the in-process tier first."""
+        if self._local_enabled:
+            local_value = self._local_bytes.get(key)
+            if local_value is not None:
+                self._count("l1", "hit")
+                return local_value
+            self._count("l1", "miss")
+
+        client = await self._get_raw_client()
         if client is None:
             return None
         try:
-            cached_value = await client.get(key)
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.get(key)
+                pipe.pttl(key)
+                cached_value, remaining_ms = await self._execute(pipe, "get_bytes")
         except Exception as e:
             logger.error(f"Redis GET failed for key '{key}': {e}")
             return None
         if cached_value is None:
+            self._count("l2", "miss")
             return None
+        self._count("l2", "hit")
+        if self._local_enabled:
+            ttl = remaining_ms / 1000 if remaining_ms > 0 else None
+            self._local_bytes.set(key, cached_value, ttl)
+        return cached_value
+
+    async def set_bytes(
+        self, key: str, value: bytes, ttl: Optional[int] = None
+    ) -> None:
+        """Store a raw (pre-serialized) value as-is."""
+        client = await self._get_raw_client()
+        if client is None:
+            return
+        expire = ttl if ttl is not None else self.default_ttl
         try:
-            return json.loads(cached_value)
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to decode JSON for key '{key}': {e}")
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.set(key, value, ex=expire)
+                self._publish_invalidation(pipe, key)
+                await self._execute(pipe, "set_bytes")
+        except Exception as e:
+            logger.error(f"Redis SET failed for key '{key}': {e}")
+            return
+        if self._local_enabled:
+            self._local_bytes.set(key, value, expire)
+
+    async def set_last_good(self, key: str, value: bytes, ttl: int) -> None:
+        """Keep a raw value to fall back on, stamped with when it was stored."""
+        client = await self._get_raw_client()
+        if client is None:
+            return
+        try:
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.hset(key, mapping={"body": value, "stored_at": repr(time.time())})
+                pipe.expire(key, ttl)
+                await self._execute(pipe, "set_last_good")
+        except Exception as e:
+            logger.error(f"Redis HSET failed for key '{key}': {e}")
+
+    async def get_last_good(self, key: str) -> Optional[tuple[bytes, float]]:
+        """Return a value stored by set_last_good and its age in seconds."""
+        client = await self._get_raw_client()
+        if client is None:
+            return None
+        try:
+            with CACHE_OPERATION_DURATION.labels("get_last_good").time():
+                body, stored_at = await client.hmget(key, ["body", "stored_at"])
+        except Exception as e:
+            logger.error(f"Redis HMGET failed for key '{key}': {e}")
             return None
+        if body is None or stored_at is None:
+            return None
+        return body, max(0.0, time.time() - float(stored_at))
 
-    async def set(
-        self, key: str, value: dict[str, Any], ttl: Optional[int] = None
-    ) -> None:
+    def _publish_invalidation(self, pipe: redis.client.Pipeline, key: str) -> None:
+        pipe.publish(
+            INVALIDATION_CHANNEL,
+            json.dumps({"origin": self._instance_id, "key": key}),
+        )
+
+    async def _listen_for_invalidations(self) -> None:
+        """Evict keys written by other processes from the in-process tier."""
+        while True:
+            client = await self._get_client()
+            pubsub = client.pubsub() if client is not None else None
+            try:
+                if pubsub is None:
+                    raise ConnectionError("Redis client unavailable")
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                self._local_enabled = True
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        event = json.loads(message["data"])
+                    except (TypeError, json.JSONDecodeError):
+                        continue
+                    if event.get("origin") != self._instance_id:
+                        self._local.delete(event.get("key", ""))
+                        self._local_bytes.delete(event.get("key", ""))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Cache invalidation listener failed: {e}")
+            finally:
+                # Invalidations may have been missed while disconnected.
+                self._local_enabled = False
+                self._local.clear()
+                self._local_bytes.clear()
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+            await asyncio.sleep(1.0)
+
+    async def get_fields(self, key: str, fields: list[str]) -> list[Optional[Any]]:
+        """Read JSON-encoded fields of a Redis hash; missing fields are None."""
         client = await self._get_client()
         if client is None:
+            return [None] * len(fields)
+        try:
+            with CACHE_OPERATION_DURATION.labels("get_fields").time():
+                values = await client.hmget(key, fields)
+        except Exception as e:
+            logger.error(f"Redis HMGET failed for key '{key}': {e}")
+            return [None] * len(fields)
+        decoded: list[Optional[Any]] = []
+        for field, value in zip(fields, values):
+            try:
+                decoded.append(None if value is None else json.loads(value))
+            except json.JSONDecodeError as e:
+                logger.error(f"Failed to decode JSON for '{key}' field '{field}': {e}")
+                decoded.append(None)
+        return decoded
+
+    async def set_fields(
+        self, key: str, mapping: dict[str, Any], ttl: Optional[int] = None
+    ) -> None:
+        """Write JSON-encoded fields of a Redis hash and refresh its TTL."""
+        client = await self._get_client()
+        if client is None or not mapping:
             return
         expire = ttl if ttl is not None else self.default_ttl
         try:
-            data_str = json.dumps(value)
+            encoded = {field: json.dumps(value) for field, value in mapping.items()}
         except Exception as e:
-            logger.error(f"Could not serialize value for key '{key}': {e}")
+            logger.error(f"Could not serialize fields for key '{key}': {e}")
             return
         try:
-            await client.set(key, data_str, ex=expire)
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.hset(key, mapping=encoded)
+                pipe.expire(key, expire)
+                await self._execute(pipe, "set_fields")
         except Exception as e:
-            logger.error(f"Redis SET failed for key '{key}': {e}")
+            logger.error(f"Redis HSET failed for key '{key}': {e}")
 
-    async def close(self) -> None:
-        if self._client:
+    async def get_or_compute(
+        self,
+        key: str,
+        factory: Factory,
+        ttl: Optional[int] = None,
+        stale_ttl: Optional[int] = None,
+    ) -> tuple[dict[str, Any], bool]:
+        """
+        Return the cached value for key, computing it at most once on a miss.
+
+        Concurrent callers in this process share one in-flight computation,
+        and a Redis lease makes other processes wait for its result instead
+        of recomputing. The lease is renewed while the computation runs, so
+        it only lapses if its holder dies; waiters give up and compute
+        themselves after lock_max_wait. Returns the value and whether it
+        came from cache.
+
+        With stale_ttl (stale-while-revalidate), ttl is a soft expiry: for
+        stale_ttl seconds after it, the previous value is returned at once
+        while it is recomputed in the background, and it keeps being served
+        if the recomputation fails.
+        """
+        if stale_ttl is None:
+            cached_value = await self.get(key)
+        else:
+            cached_value, stale_value = await self.get_many([key, STALE_PREFIX + key])
+            if cached_value is None and stale_value is not None:
+                self._compute_shared(key, factory, ttl, stale_ttl)
+                return stale_value, True
+        if cached_value is not None:
+            return cached_value, True
+
+        task = self._compute_shared(key, factory, ttl, stale_ttl)
+        # Shield so a cancelled caller does not abort the shared computation.
+        return await asyncio.shield(task)
+
+    def _compute_shared(
+        self, key: str, factory: Factory, ttl: Optional[int], stale_ttl: Optional[int]
+    ) -> asyncio.Task:
+        """Start computing key unless this process already is."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(
+                self._compute_with_lock(key, factory, ttl, stale_ttl)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._computed(key, done))
+        return task
+
+    async def computing(self, keys: list[str]) -> list[bool]:
+        """
+        Whether each key is being computed by get_or_compute right now.
+
+        True when this process is computing it or another process holds its
+        lease, i.e. when get_or_compute would wait instead of computing.
+        """
+        busy = [key in self._inflight for key in keys]
+        remote = [key for key, local in zip(keys, busy) if not local]
+        if not remote:
+            return busy
+        client = await self._get_client()
+        if client is None:
+            return busy
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                for key in remote:
+                    pipe.exists(f"lock:{key}")
+                replies = await self._execute(pipe, "exists")
+        except Exception as e:
+            logger.error(f"Redis EXISTS failed for keys {remote[:3]}...: {e}")
+            return busy
+        locked = {key for key, held in zip(remote, replies) if held}
+        return [local or key in locked for key, local in zip(keys, busy)]
+
+    def _computed(self, key: str, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            # Background revalidations have nobody else to report to.
+            logger.error(f"Computing cache key '{key}' failed: {task.exception()!r}")
+
+    async def _compute_with_lock(
+        self, key: str, factory: Factory, ttl: Optional[int], stale_ttl: Optional[int]
+    ) -> tuple[dict[str, Any], bool]:
+        client = await self._get_client()
+        lock_key = f"lock:{key}"
+        token = uuid.uuid4().hex
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.lock_max_wait
+
+        while client is not None and loop.time() < deadline:
             try:
-                await self._client.aclose()
+                acquired = await client.set(
+                    lock_key, token, nx=True, px=int(self.lock_lease * 1000)
+                )
             except Exception as e:
-                logger.error(f"Error closing Redis client: {e}")
+                logger.error(f"Redis lock acquisition failed for key '{key}': {e}")
+                break
+
+            if acquired:
+                renewal = asyncio.create_task(self._renew_lock(lock_key, token))
+                try:
+                    cached_value = await self.get(key)
+                    if cached_value is not None:
+                        return cached_value, True
+                    return await self._compute(key, factory, ttl, stale_ttl), False
+                finally:
+                    renewal.cancel()
+                    try:
+                        await renewal
+                    except asyncio.CancelledError:
+                        pass
+                    await self._release_lock(client, lock_key, token)
+
+            await asyncio.sleep(self.lock_poll_interval)
+            cached_value = await self.get(key)
+            if cached_value is not None:
+                return cached_value, True
+
+        # Redis is unavailable or the lock holder is taking too long.
+        return await self._compute(key, factory, ttl, stale_ttl), False
+
+    async def _renew_lock(self, lock_key: str, token: str) -> None:
+        """Keep a recompute lock alive until cancelled or lost."""
+        while True:
+            await asyncio.sleep(self.lock_lease / 3)
+            if not await self.renew_lease(lock_key, token, self.lock_lease):
+                logger.warning(f"Lost recompute lock '{lock_key}' before finishing")
+                return
+
+    async def _compute(
+        self, key: str, factory: Factory, ttl: Optional[int], stale_ttl: Optional[int]
+    ) -> dict[str, Any]:
+        value = await factory()
+        await self.set(key, value, ttl, stale_ttl)
+        return value
+
+    async def _release_lock(
+        self, client: redis.Redis, lock_key: str, token: str
+    ) -> None:
+        try:
+            await client.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+        except Exception as e:
+            logger.error(f"Failed to release Redis lock '{lock_key}': {e}")
+
+    async def acquire_lease(self, key: str, token: str, ttl: float) -> bool:
+        """Take an expiring lease on key for token; False if another holder has it."""
+        client = await self._get_client()
+        if client is None:
+            return False
+        try:
+            return bool(await client.set(key, token, nx=True, px=int(ttl * 1000)))
+        except Exception as e:
+            logger.error(f"Redis lease acquisition failed for key '{key}': {e}")
+            return False
+
+    async def renew_lease(self, key: str, token: str, ttl: float) -> bool:
+        """Extend a lease held by token; False if it expired or changed hands."""
+        client = await self._get_client()
+        if client is None:
+            return False
+        try:
+            renewed = await client.eval(
+                RENEW_LOCK_SCRIPT, 1, key, token, int(ttl * 1000)
+            )
+        except Exception as e:
+            logger.error(f"Redis lease renewal failed for key '{key}': {e}")
+            return False
+        return bool(renewed)
+
+    async def release_lease(self, key: str, token: str) -> None:
+        """Give up a lease if token still holds it."""
+        client = await self._get_client()
+        if client is not None:
+            await self._release_lock(client, key, token)
+
+    async def take_tokens(
+        self, key: str, rate: float, capacity: float, cost: float = 1.0
+    ) -> float:
+        """Take tokens from a shared bucket; returns seconds to wait if empty."""
+        client = await self._get_client()
+        if client is None:
+            return 0.0
+        try:
+            wait = await client.eval(TAKE_TOKENS_SCRIPT, 1, key, rate, capacity, cost)
+        except Exception as e:
+            # Fail open: an unavailable Redis should not stall every caller.
+            logger.error(f"Redis token bucket failed for key '{key}': {e}")
+            return 0.0
+        return float(wait)
+
+    async def rate_limit(
+        self, key: str, rate: float, burst: float, cost: float = 1.0
+    ) -> float:
+        """
+        Charge cost against a GCRA quota of rate units/s with burst headroom.
+
+        Returns 0 if the request is allowed, otherwise the seconds until it
+        would be. Costs above burst are charged as burst.
+        """
+        client = await self._get_client()
+        if client is None:
+            return 0.0
+        try:
+            with CACHE_OPERATION_DURATION.labels("rate_limit").time():
+                wait = await client.eval(
+                    GCRA_SCRIPT, 1, key, 1.0 / rate, burst / rate, min(cost, burst)
+                )
+        except Exception as e:
+            # Fail open, as take_tokens does.
+            logger.error(f"Redis rate limit failed for key '{key}': {e}")
+            return 0.0
+        return float(wait)
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        for client in (self._client, self._raw_client):
+            if client:
+                try:
+                    await client.aclose()
+                except Exception as e:
+                    logger.error(f"Error closing Redis client: {e}")
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+from typing import Optional
+
+from app.db.history import DividendHistoryStore
+from app.schemas.blockchain import DividendHistoryPoint, TaoDividendResponse
+from app.services.blockchain import BlockchainService
+
+logger = logging.getLogger("history_service")
+
+
+class BlockNotFoundError(ValueError):
+    """A block number the chain does not have (yet)."""
+
+
+class DividendHistoryService:
+    """
+    Dividend queries at arbitrary historical blocks.
+
+    Blocks are immutable, so every subnet scanned at a historical block is
+    persisted in DividendHistoryStore without expiry and repeated queries
+    (e.g. backtests) never reach the archive node again. Hotkey queries
+    read only that hotkey's storage entries instead of scanning subnets,
+    and those lookups are persisted the same way. At most
+    ``max_concurrent_points`` blocks are queried at once across all series.
+    """
+
+    def __init__(
+        self,
+        blockchain: BlockchainService,
+        store: DividendHistoryStore,
+        max_points: int = 500,
+        max_network_points: int = 20,
+        max_concurrent_points: int = 8,
+    ) -> None:
+        self.blockchain = blockchain
+        self.store = store
+        self.max_points = max_points
+        self.max_network_points = max_network_points
+        self._point_semaphore = asyncio.Semaphore(max_concurrent_points)
+        self._finalized_number = 0
+
+    async def resolve_block_hash(self, number: int) -> str:
+        """Map a block number to its hash, persisting it once finalized."""
+        block_hash = await self.store.get_block_hash(number)
+        if block_hash is not None:
+            return block_hash
+
+        block_hash = await self.blockchain.get_block_hash(number)
+        if block_hash is None:
+            raise BlockNotFoundError(f"Block {number} not found")
+        if number > self._finalized_number:
+            self._finalized_number = await self.blockchain.get_finalized_block_number()
+        # Unfinalized heights may still be reorged onto a different hash.
+        if number <= self._finalized_number:
+            await self.store.put_block_hash(number, block_hash)
+        return block_hash
+
+    async def netuids(self, block_hash: str) -> list[int]:
+        netuids = await self.store.get_netuids(block_hash)
+        if netuids is None:
+            netuids = await self.blockchain.get_netuids(block_hash)
+            await self.store.put_netuids(block_hash, netuids)
+        return netuids
+
+    async def subnets(
+        self, block_hash: str, netuids: list[int]
+    ) -> tuple[dict[int, dict[str, int]], list[int], bool]:
+        """Load subnet snapshots at a block, scanning and storing missing ones."""
+        snapshots = await self.store.get_subnets(block_hash, netuids)
+        missing = [netuid for netuid in netuids if netuid not in snapshots]
+
+        async def load(netuid: int) -> None:
+            try:
+                snapshot = await self.blockchain.fetch_subnet_dividends(
+                    netuid, block_hash
+                )
+            except Exception as e:
+                logger.error(f"Error querying netuid {netuid} at {block_hash}: {e!r}")
+                return
+            await self.store.put_subnet(block_hash, netuid, snapshot)
+            snapshots[netuid] = snapshot
+
+        await asyncio.gather(*(load(netuid) for netuid in missing))
+        failed = [netuid for netuid in netuids if netuid not in snapshots]
+        return snapshots, failed, not missing
+
+    async def hotkey_dividends(
+        self, block_hash: str, netuids: list[int], hotkey: str
+    ) -> tuple[dict[int, int], list[int], bool]:
+        """Look a hotkey up on netuids at a block, reading only what is missing."""
+        dividends, missing = await self.store.get_hotkey(block_hash, netuids, hotkey)
+        if not missing:
+            return dividends, [], True
+        try:
+            found = await self.blockchain.fetch_hotkey_dividends(
+                missing, hotkey, block_hash
+            )
+        except Exception as e:
+            logger.error(f"Error querying hotkey {hotkey} at {block_hash}: {e!r}")
+            return dividends, missing, False
+        await self.store.put_hotkey(block_hash, hotkey, missing, found)
+        dividends.update(found)
+        return dividends, [], False
+
+    async def query(
+        self,
+        block_hash: str,
+        netuid: Optional[int] = None,
+        hotkey: Optional[str] = None,
+    ) -> TaoDividendResponse:
+        """Answer a dividends query at a specific block."""
+        netuids = [netuid] if netuid is not None else await self.netuids(block_hash)
+
+        if hotkey:
+            by_netuid, failed, cached = await self.hotkey_dividends(
+                block_hash, netuids, hotkey
+            )
+            results = {
+                f"netuid_{net_id}": {hotkey: amount}
+                for net_id, amount in sorted(by_netuid.items())
+            }
+        else:
+            snapshots, failed, cached = await self.subnets(block_hash, netuids)
+            results = {
+                f"netuid_{net_id}": snapshots[net_id] for net_id in sorted(snapshots)
+            }
+            results = {key: value for key, value in results.items() if value}
+
+        return TaoDividendResponse(
+            results=results,
+            netuid=netuid if netuid is not None else "all",
+            hotkey=hotkey if hotkey is not None else "all",
+            cached=cached,
+            failed_netuids=failed,
+        )
+
+    async def series(
+        self,
+        start_block: int,
+        end_block: int,
+        step: int = 1,
+        netuid: Optional[int] = None,
+        hotkey: Optional[str] = None,
+    ) -> list[DividendHistoryPoint]:
+        """
+        Query dividends at every step-th block in [start_block, end_block].
+
+        A series over every subnet and hotkey returns whole snapshots per
+        block, so it is capped at max_network_points instead of max_points.
+        Hotkey series read one storage entry per subnet and block.
+        """
+        numbers = range(start_block, end_block + 1, step)
+        full_network = netuid is None and hotkey is None
+        limit = self.max_network_points if full_network else self.max_points
+        if len(numbers) > limit:
+            hint = (
+                "increase step or pass netuid or hotkey"
+                if full_network
+                else "increase step"
+            )
+            raise ValueError(
+                f"Range covers {len(numbers)} blocks; at most {limit} are "
+                f"allowed per request, {hint}"
+            )
+
+        async def point(number: int) -> DividendHistoryPoint:
+            async with self._point_semaphore:
+                block_hash = await self.resolve_block_hash(number)
+                result = await self.query(block_hash, netuid=netuid, hotkey=hotkey)
+            return DividendHistoryPoint(
+                block=number,
+                block_hash=block_hash,
+                results=result.results,
+                cached=result.cached,
+                failed_netuids=result.failed_netuids,
+            )
+
+        return list(await asyncio.gather(*(point(number) for number in numbers)))
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import random
+from typing import TYPE_CHECKING, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.metrics import UPSTREAM_ERRORS, UPSTREAM_REQUEST_DURATION
+from app.core.settings import settings
+
+if TYPE_CHECKING:
+    from app.services.ratelimit import TokenBucket
+
+logger = logging.getLogger("http_client")
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class HTTPClientPool:
+    """
+    Shared keep-alive HTTP client for outbound API calls.
+
+    One httpx.AsyncClient per process reuses TCP/TLS connections (HTTP/2
+    if enabled). Requests are capped per host and retried with jittered
+    exponential backoff on 429/5xx and transport errors, honouring
+    Retry-After. Every attempt, retries included, takes a token from the
+    caller's ``rate_limit`` bucket before it takes a per-host slot, and no
+    slot is held while backing off.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        per_host_concurrency: int = 10,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 10.0,
+        http2: bool = True,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.per_host_concurrency = per_host_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.http2 = http2
+        # Overridable for tests and benchmarks against stub upstreams.
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=self.limits, http2=self.http2, transport=self.transport
+            )
+        return self._client
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_concurrency)
+        return self._host_limits[host]
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        # Full jitter keeps concurrent retries from synchronising.
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[dict[str, str]] = None,
+        json: object = None,
+        timeout: Optional[float] = None,
+        rate_limit: Optional["TokenBucket"] = None,
+    ) -> httpx.Response:
+        """Send a request, retrying transient failures; returns the last response."""
+        client = self._get_client()
+        host = urlsplit(url).netloc
+        with UPSTREAM_REQUEST_DURATION.labels(host).time():
+            return await self._send(
+                client, method, url, host, headers, json, timeout, rate_limit
+            )
+
+    async def _send(
+        self,
+        client: httpx.AsyncClient,
+        method: str,
+        url: str,
+        host: str,
+        headers: Optional[dict[str, str]],
+        json: object,
+        timeout: Optional[float],
+        rate_limit: Optional["TokenBucket"],
+    ) -> httpx.Response:
+        host_limit = self._host_limit(url)
+        attempt = 0
+        while True:
+            response: Optional[httpx.Response] = None
+            if rate_limit is not None:
+                await rate_limit.acquire()
+            try:
+                async with host_limit:
+                    response = await client.request(
+                        method,
+                        url,
+                        headers=headers,
+                        json=json,
+                        timeout=timeout
+                        if timeout is not None
+                        else httpx.USE_CLIENT_DEFAULT,
+                    )
+            except httpx.TransportError as e:
+                UPSTREAM_ERRORS.labels(host, type(e).__name__).inc()
+                if attempt >= self.max_retries:
+                    raise
+                logger.warning(f"{method} {url} failed ({e!r}); retrying")
+            else:
+                if response.status_code >= 400:
+                    UPSTREAM_ERRORS.labels(host, str(response.status_code)).inc()
+                if (
+                    response.status_code not in RETRY_STATUSES
+                    or attempt >= self.max_retries
+                ):
+                    return response
+                logger.warning(
+                    f"{method} {url} returned {response.status_code}; retrying"
+                )
+                await response.aclose()
+            await asyncio.sleep(self._backoff(attempt, response))
+            attempt += 1
+
+    async def post(
+        self,
+        url: str,
+        headers: Optional[dict[str, str]] = None,
+        json: object = None,
+        timeout: Optional[float] = None,
+        rate_limit: Optional["TokenBucket"] = None,
+    ) -> httpx.Response:
+        return await self.request(
+            "POST",
+            url,
+            headers=headers,
+            json=json,
+            timeout=timeout,
+            rate_limit=rate_limit,
+        )
+
+    async def close(self) -> None:
+        if self._client is not None:
+            try:
+                await self._client.aclose()
+            except Exception as e:
+                logger.error(f"Error closing HTTP client: {e}")
+            self._client = None
+        self._host_limits.clear()
+
+
+http_pool = HTTPClientPool(
+    max_connections=settings.HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+    per_host_concurrency=settings.HTTP_PER_HOST_CONCURRENCY,
+    max_retries=settings.HTTP_MAX_RETRIES,
+    http2=settings.HTTP2_ENABLED,
+)
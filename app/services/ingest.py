@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Any, Optional
+
+from app.core.metrics import INGEST_BLOCKS_BEHIND, INGEST_LAG
+from app.services.blockchain import BlockchainService
+from app.services.cache import CacheService
+from app.services.snapshot import DividendSnapshotStore
+
+logger = logging.getLogger("dividend_ingester")
+
+LEADER_KEY = "dividends:ingest:leader"
+
+
+class DividendIngester:
+    """
+    Background block follower that keeps dividend snapshots warm.
+
+    One process across all workers and replicas holds a Redis lease and
+    subscribes to new chain heads. Every ``every_n_blocks`` blocks it
+    prefetches all subnet snapshots and the hotkey index, then moves the
+    ``dividends:head`` pointer so API requests are served from cache.
+    """
+
+    def __init__(
+        self,
+        blockchain: BlockchainService,
+        snapshots: DividendSnapshotStore,
+        cache: CacheService,
+        every_n_blocks: int = 1,
+        lease: float = 30.0,
+        stall_timeout: float = 60.0,
+    ) -> None:
+        self.blockchain = blockchain
+        self.snapshots = snapshots
+        self.cache = cache
+        self.every_n_blocks = every_n_blocks
+        self.lease = lease
+        self.stall_timeout = stall_timeout
+        self.token = uuid.uuid4().hex
+        self._task: Optional[asyncio.Task] = None
+        self._pending: asyncio.Queue[tuple[int, float]] = asyncio.Queue(maxsize=1)
+        self._last_header_at = 0.0
+        self._stats: dict[str, Any] = {
+            "leader": False,
+            "latest_block": None,
+            "ingested_block": None,
+            "blocks_behind": None,
+            "ingest_lag_seconds": None,
+            "ingest_duration_seconds": None,
+            "ingested": 0,
+            "failures": 0,
+        }
+
+    async def start(self) -> None:
+        """Start following the chain in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop following the chain and hand leadership to another process."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._stats["leader"]:
+            await self.cache.release_lease(LEADER_KEY, self.token)
+            self._stats["leader"] = False
+
+    def stats(self) -> dict[str, Any]:
+        """Return ingest progress and lag figures."""
+        return dict(self._stats)
+
+    async def _run(self) -> None:
+        while True:
+            if await self.cache.acquire_lease(LEADER_KEY, self.token, self.lease):
+                self._stats["leader"] = True
+                logger.info("Acquired dividend ingest leadership")
+                try:
+                    await self._lead()
+                except Exception as e:
+                    logger.error(f"Dividend ingest stopped: {e}")
+                self._stats["leader"] = False
+            await asyncio.sleep(self.lease / 3)
+
+    async def _lead(self) -> None:
+        """Follow heads and ingest until leadership or the subscription is lost."""
+        tasks = [
+            asyncio.create_task(self._follow_heads()),
+            asyncio.create_task(self._ingest_loop()),
+            asyncio.create_task(self._keep_leadership()),
+        ]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _keep_leadership(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            if not await self.cache.renew_lease(LEADER_KEY, self.token, self.lease):
+                logger.warning("Lost dividend ingest leadership")
+                return
+            if (
+                self._last_header_at
+                and time.monotonic() - self._last_header_at > self.stall_timeout
+            ):
+                logger.warning("No new block headers received; resubscribing")
+                await self.cache.release_lease(LEADER_KEY, self.token)
+                return
+
+    async def _follow_heads(self) -> None:
+        self._last_header_at = time.monotonic()
+
+        async def on_header(block: dict[str, Any]) -> None:
+            self._last_header_at = time.monotonic()
+            number = int(block["header"]["number"])
+            self._stats["latest_block"] = number
+            if self._stats["ingested_block"] is not None:
+                self._stats["blocks_behind"] = number - self._stats["ingested_block"]
+                INGEST_BLOCKS_BEHIND.set(self._stats["blocks_behind"])
+            if number % self.every_n_blocks:
+                return None
+            # Keep only the newest block: an ingest that falls behind skips
+            # straight to the head instead of replaying every missed block.
+            if self._pending.full():
+                self._pending.get_nowait()
+            self._pending.put_nowait((number, time.time()))
+            return None
+
+        await self.blockchain.follow_heads(on_header)
+
+    async def _ingest_loop(self) -> None:
+        while True:
+            number, received_at = await self._pending.get()
+            started = time.monotonic()
+            try:
+                block_hash = await self.blockchain.get_block_hash(number)
+                complete = await self.snapshots.prefetch(block_hash)
+            except Exception as e:
+                self._stats["failures"] += 1
+                logger.error(f"Failed to ingest block {number}: {e}")
+                continue
+            if not complete:
+                self._stats["failures"] += 1
+                logger.warning(f"Incomplete snapshot for block {number}; not published")
+                continue
+
+            await self.snapshots.publish_head(block_hash)
+            lag = time.time() - received_at
+            blocks_behind = (self._stats["latest_block"] or number) - number
+            INGEST_LAG.set(lag)
+            INGEST_BLOCKS_BEHIND.set(blocks_behind)
+            self._stats.update(
+                ingested_block=number,
+                blocks_behind=blocks_behind,
+                ingest_lag_seconds=round(lag, 3),
+                ingest_duration_seconds=round(time.monotonic() - started, 3),
+                ingested=self._stats["ingested"] + 1,
+            )
+            logger.info(f"Ingested dividends for block {number} (lag {lag:.2f}s)")
@@ -0,0 +1,54 @@
+import asyncio
+import logging
+
+from app.services.cache import CacheService
+
+logger = logging.getLogger("rate_limit")
+
+
+class TokenBucket:
+    """
+    Token bucket shared by every process calling one upstream API.
+
+    State lives in Redis, so API workers and Celery workers draw from the
+    same budget and together stay under the provider's quota.
+    """
+
+    def __init__(
+        self,
+        cache: CacheService,
+        name: str,
+        rate: float,
+        capacity: float,
+        max_wait: float = 5.0,
+        timeout: float = 30.0,
+    ) -> None:
+        self.cache = cache
+        self.key = f"ratelimit:{name}"
+        self.rate = rate
+        self.capacity = capacity
+        self.max_wait = max_wait
+        self.timeout = timeout
+
+    async def acquire(self, cost: float = 1.0) -> None:
+        """
+        Wait until cost tokens could be taken from the bucket.
+
+        Raises TimeoutError instead of waiting past ``timeout`` seconds.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        while True:
+            wait = await self.cache.take_tokens(
+                self.key, self.rate, self.capacity, cost
+            )
+            if wait <= 0:
+                return
+            if loop.time() + wait > deadline:
+                raise TimeoutError(
+                    f"No {self.key} tokens available within {self.timeout}s"
+                )
+            logger.debug(f"Rate limited on {self.key}; waiting {wait:.2f}s")
+            # Re-check periodically rather than trusting one long sleep,
+            # since other callers may take the refilled tokens first.
+            await asyncio.sleep(min(wait, self.max_wait))
@@ -1,3 +1,7 @@
+import asyncio
+import hashlib
+import json
+import math
 import logging
 import re
 from typing import Any, Optional
@@ -5,24 +9,222 @@ from typing import Any, Optional
 import httpx
 
 from app.core.settings import settings
+from app.schemas.sentiment import SubnetSentiment
+from app.services.cache import CacheService
+from app.services.http import HTTPClientPool, http_pool
+from app.services.ratelimit import TokenBucket
 
 logger = logging.getLogger("sentiment_service")
 
+# Rough prompt size estimate; good enough to keep batches under the budget.
+CHARS_PER_TOKEN = 4
+TWEET_OVERHEAD_TOKENS = 4
+SUBNET_OVERHEAD_TOKENS = 8
+OUTPUT_TOKENS_PER_TWEET = 6
+
+SYSTEM_PROMPT = (
+    "You rate the sentiment of tweets about Bittensor subnets. "
+    "Score every tweet from -100 (extremely negative) to +100 (extremely positive). "
+    'Reply with JSON only, shaped as {"subnets": [{"netuid": <int>, '
+    '"scores": [<number>, ...]}]}, with one score per tweet in the order given.'
+)
+
+# A batch is a list of (netuid, tweets) chunks sent in one request; a subnet
+# too large for one batch is split into chunks across consecutive batches.
+Batch = list[tuple[int, list[str]]]
+
 
 class SentimentService:
     """Service for performing sentiment analysis on text using Chutes.ai API."""
 
-    def __init__(self, api_key: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        http: Optional[HTTPClientPool] = None,
+        batch_tokens: int = 3000,
+        max_tweet_chars: int = 560,
+        concurrent_batches: int = 4,
+        cache: Optional[CacheService] = None,
+        tweet_ttl: int = 604800,
+        rate_limit: Optional[TokenBucket] = None,
+    ) -> None:
+        self.http = http or http_pool
         self.api_key = api_key or settings.CHUTES_API_KEY.get_secret_value()
         self.base_url = "https://llm.chutes.ai/v1"
+        self.model = "unsloth/Llama-3.2-3B-Instruct"
+        self.batch_tokens = batch_tokens
+        self.max_tweet_chars = max_tweet_chars
+        self.concurrent_batches = concurrent_batches
+        self.cache = cache
+        self.tweet_ttl = tweet_ttl
+        self.rate_limit = rate_limit
 
-    async def analyze_sentiment(self, texts: list[str]) -> float:
+    async def score_subnets(
+        self, tweets_by_netuid: dict[int, list[str]]
+    ) -> dict[int, SubnetSentiment]:
         """
-        Analyze sentiment of text(s) using Chutes.ai LLM.
+        Score the tweets of many subnets in as few LLM requests as possible.
+
+        Tweets are packed into batches by an approximate token budget and
+        batches are sent concurrently. Subnets whose batch failed, or for
+        which the model returned no usable scores, are omitted.
         """
-        combined_text = "\n\n---\n\n".join(texts)
+        batches = self._pack_batches(tweets_by_netuid)
+        if not batches:
+            return {}
+        logger.info(
+            f"Scoring {sum(len(t) for t in tweets_by_netuid.values())} tweets "
+            f"for {len(tweets_by_netuid)} subnets in {len(batches)} requests"
+        )
+
+        semaphore = asyncio.Semaphore(self.concurrent_batches)
+
+        async def run(batch: Batch) -> Optional[list[list[Optional[float]]]]:
+            async with semaphore:
+                try:
+                    return await self._score_batch(batch)
+                except RuntimeError:
+                    return None
+
+        batch_scores = await asyncio.gather(*(run(batch) for batch in batches))
+
+        # Chunks of one subnet may be spread over batches; merge in order.
+        merged: dict[int, list[Optional[float]]] = {}
+        failed: set[int] = set()
+        for batch, scores in zip(batches, batch_scores):
+            if scores is None:
+                failed.update(netuid for netuid, _ in batch)
+                continue
+            for (netuid, _), chunk_scores in zip(batch, scores):
+                merged.setdefault(netuid, []).extend(chunk_scores)
+
+        results: dict[int, SubnetSentiment] = {}
+        for netuid, tweet_scores in merged.items():
+            valid = [score for score in tweet_scores if score is not None]
+            if netuid in failed or not valid:
+                logger.warning(f"No sentiment scores for netuid {netuid}")
+                continue
+            results[netuid] = SubnetSentiment(
+                netuid=netuid,
+                score=sum(valid) / len(valid),
+                tweet_scores=tweet_scores,
+            )
+        logger.info(
+            "Sentiment scores: "
+            + ", ".join(f"{n}={r.score:.1f}" for n, r in results.items())
+        )
+        return results
+
+    async def score_subnet_tweets(
+        self, tweets_by_netuid: dict[int, list[dict[str, Any]]]
+    ) -> dict[int, SubnetSentiment]:
+        """
+        Score subnets from tweet objects, reusing cached per-tweet scores.
+
+        Each tweet's score is memoized under its ID (or a hash of its
+        normalized text), so only tweets never seen before are sent to the
+        LLM. A subnet's score is the engagement-weighted mean of its tweets.
+        """
+        keyed = {
+            netuid: [
+                (key, tweet)
+                for tweet in tweets
+                if tweet.get("text") and (key := tweet_cache_key(tweet))
+            ]
+            for netuid, tweets in tweets_by_netuid.items()
+        }
+        keys = list(dict.fromkeys(key for items in keyed.values() for key, _ in items))
+        known: dict[str, float] = {}
+        if self.cache is not None and keys:
+            for key, value in zip(keys, await self.cache.get_many(keys)):
+                if value is not None and value.get("score") is not None:
+                    known[key] = value["score"]
+
+        # Score every unseen tweet once, under the first subnet it appears in.
+        pending: dict[int, list[tuple[str, str]]] = {}
+        claimed: set[str] = set(known)
+        for netuid, items in keyed.items():
+            for key, tweet in items:
+                if key not in claimed:
+                    claimed.add(key)
+                    pending.setdefault(netuid, []).append((key, tweet["text"]))
+        logger.info(
+            f"Sentiment cache: {len(known)} of {len(keys)} tweets already scored"
+        )
+
+        fresh: dict[str, float] = {}
+        if pending:
+            scored = await self.score_subnets(
+                {
+                    netuid: [text for _, text in items]
+                    for netuid, items in pending.items()
+                }
+            )
+            for netuid, result in scored.items():
+                for (key, _), score in zip(pending[netuid], result.tweet_scores):
+                    if score is not None:
+                        fresh[key] = score
+        if self.cache is not None and fresh:
+            await self.cache.set_many(
+                {key: {"score": score} for key, score in fresh.items()},
+                ttl=self.tweet_ttl,
+            )
+        known.update(fresh)
+
+        results: dict[int, SubnetSentiment] = {}
+        for netuid, items in keyed.items():
+            tweet_scores = [known.get(key) for key, _ in items]
+            weighted = [
+                (score, engagement_weight(tweet))
+                for score, (_, tweet) in zip(tweet_scores, items)
+                if score is not None
+            ]
+            if not weighted:
+                continue
+            total_weight = sum(weight for _, weight in weighted)
+            results[netuid] = SubnetSentiment(
+                netuid=netuid,
+                score=sum(score * weight for score, weight in weighted) / total_weight,
+                tweet_scores=tweet_scores,
+            )
+        return results
 
-        logger.info(f"Analyzing sentiment of {len(combined_text)} characters of text")
+    def _pack_batches(self, tweets_by_netuid: dict[int, list[str]]) -> list[Batch]:
+        """Greedily pack (netuid, tweets) chunks into token-bounded batches."""
+        batches: list[Batch] = []
+        batch: Batch = []
+        used = 0
+        for netuid, texts in tweets_by_netuid.items():
+            tweets = [text[: self.max_tweet_chars] for text in texts]
+            chunk: list[str] = []
+            chunk_tokens = SUBNET_OVERHEAD_TOKENS
+            for tweet in tweets:
+                cost = len(tweet) // CHARS_PER_TOKEN + TWEET_OVERHEAD_TOKENS
+                if used + chunk_tokens + cost > self.batch_tokens and (chunk or batch):
+                    if chunk:
+                        batch.append((netuid, chunk))
+                        used += chunk_tokens
+                    batches.append(batch)
+                    batch, used = [], 0
+                    chunk, chunk_tokens = [], SUBNET_OVERHEAD_TOKENS
+                chunk.append(tweet)
+                chunk_tokens += cost
+            if chunk:
+                batch.append((netuid, chunk))
+                used += chunk_tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def _score_batch(self, batch: Batch) -> list[list[Optional[float]]]:
+        """Score one batch; returns per-tweet scores for each chunk in order."""
+        sections = []
+        for netuid, tweets in batch:
+            lines = "\n".join(
+                f"{i}. {' '.join(tweet.split())}" for i, tweet in enumerate(tweets, 1)
+            )
+            sections.append(f"Subnet {netuid} ({len(tweets)} tweets):\n{lines}")
+        tweet_count = sum(len(tweets) for _, tweets in batch)
 
         headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -30,32 +232,28 @@ class SentimentService:
         }
 
         payload = {
-            "model": "unsloth/Llama-3.2-3B-Instruct",
-            "prompt": (
-                f"Analyze the sentiment of these tweets about Bittensor blockchain. "
-                f"Return a single number between -100 (extremely negative) to +100 (extremely positive). "
-                f"Tweets: {combined_text}"
-            ),
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": "\n\n".join(sections)},
+            ],
+            "response_format": {"type": "json_object"},
             "stream": False,
-            "max_tokens": 20,
+            "max_tokens": 32 + OUTPUT_TOKENS_PER_TWEET * tweet_count,
             "temperature": 0.3,
         }
 
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    f"{self.base_url}/completions",
-                    headers=headers,
-                    json=payload,
-                )
-
-                response.raise_for_status()
-                data = response.json()
-
-                raw_score = self._extract_sentiment_score(data)
+            response = await self.http.post(
+                f"{self.base_url}/chat/completions",
+                headers=headers,
+                json=payload,
+                timeout=60.0,
+                rate_limit=self.rate_limit,
+            )
 
-                logger.info(f"Sentiment analysis completed. Score: {raw_score}")
-                return raw_score
+            response.raise_for_status()
+            data = response.json()
 
         except httpx.HTTPStatusError as e:
             logger.error(
@@ -71,22 +269,116 @@ class SentimentService:
             logger.error(f"Unexpected error during sentiment analysis: {str(e)}")
             raise RuntimeError(f"Sentiment analysis failed: {str(e)}")
 
-    def _extract_sentiment_score(self, response_data: dict[str, Any]) -> float:
-        """Extract sentiment score from Chutes.ai API response."""
+        parsed = parse_sentiment_scores(completion_text(data))
+        results = []
+        for netuid, tweets in batch:
+            scores = parsed.get(netuid, [])[: len(tweets)]
+            results.append(scores + [None] * (len(tweets) - len(scores)))
+        return results
+
+
+def normalize_tweet_text(text: str) -> str:
+    """Lowercase, drop links and collapse whitespace so reposts hash alike."""
+    text = re.sub(r"https?://\S+", "", text.lower())
+    return " ".join(text.split())
+
+
+def tweet_cache_key(tweet: dict[str, Any]) -> Optional[str]:
+    """Cache key for a tweet's score: its ID, else a hash of its text."""
+    tweet_id = tweet.get("id") or tweet.get("id_str")
+    if tweet_id:
+        return f"sentiment:tweet:{tweet_id}"
+    text = normalize_tweet_text(tweet.get("text") or "")
+    if not text:
+        return None
+    return f"sentiment:tweet:{hashlib.sha256(text.encode()).hexdigest()}"
+
+
+def engagement_weight(tweet: dict[str, Any]) -> float:
+    """Weight a tweet by its engagement, damped logarithmically."""
+    engagement = 0
+    for field in ("like_count", "retweet_count", "reply_count", "quote_count"):
+        value = tweet.get(field)
+        if isinstance(value, (int, float)) and value > 0:
+            engagement += value
+    return 1.0 + math.log1p(engagement)
+
+
+def completion_text(response_data: dict[str, Any]) -> str:
+    """Pull the generated text out of a chat or legacy completion response."""
+    choices = response_data.get("choices") or []
+    if not choices:
+        logger.warning(f"No choices in sentiment response: {response_data}")
+        return ""
+    choice = choices[0]
+    message = choice.get("message") or {}
+    return message.get("content") or choice.get("text") or ""
+
+
+def parse_sentiment_scores(text: str) -> dict[int, list[Optional[float]]]:
+    """
+    Parse per-tweet scores from model output.
+
+    Accepts the requested ``{"subnets": [...]}`` shape as well as common
+    deviations: code fences, prose around the JSON, a bare list of
+    subnets, or a ``{netuid: [scores]}`` mapping. Unparseable scores are
+    returned as None; valid ones are clamped to [-100, 100].
+    """
+    data = _load_json(text)
+    if isinstance(data, dict) and "subnets" in data:
+        data = data["subnets"]
+
+    entries: list[tuple[object, object]] = []
+    if isinstance(data, list):
+        for entry in data:
+            if isinstance(entry, dict):
+                scores = entry.get("scores", entry.get("tweets", entry.get("score")))
+                entries.append((entry.get("netuid"), scores))
+    elif isinstance(data, dict):
+        entries = list(data.items())
+    else:
+        logger.warning(f"Could not parse sentiment scores from: {text[:200]!r}")
+
+    parsed: dict[int, list[Optional[float]]] = {}
+    for netuid, scores in entries:
+        key = _to_netuid(netuid)
+        if key is None:
+            continue
+        values = scores if isinstance(scores, list) else [scores]
+        parsed[key] = [_to_score(value) for value in values]
+    return parsed
+
+
+def _load_json(text: str) -> object:
+    text = re.sub(r"^```(?:json)?|```$", "", text.strip(), flags=re.MULTILINE)
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    decoder = json.JSONDecoder()
+    for match in re.finditer(r"[{\[]", text):
         try:
-            logger.info(f"Raw response: {response_data}")
+            return decoder.raw_decode(text, match.start())[0]
+        except ValueError:
+            continue
+    return None
 
-            if "choices" in response_data and response_data["choices"]:
-                text = response_data["choices"][0].get("text", "")
 
-                score_match = re.search(r"-?\d+\.?\d*", text)
-                if score_match:
-                    score = float(score_match.group(0))
-                    return max(-100.0, min(100.0, score))
+def _to_netuid(value: object) -> Optional[int]:
+    match = re.search(r"\d+", str(value))
+    return int(match.group(0)) if match else None
 
-            logger.warning(f"Could not find score in response: {response_data}")
-            return 0.0
 
-        except Exception as e:
-            logger.error(f"Error parsing sentiment score: {str(e)}")
-            return 0.0
+def _to_score(value: object) -> Optional[float]:
+    if isinstance(value, dict):
+        value = value.get("score")
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        score = float(value)
+    else:
+        match = re.search(r"[-+]?\d+(?:\.\d+)?", str(value))
+        if not match:
+            return None
+        score = float(match.group(0))
+    return max(-100.0, min(100.0, score))
@@ -0,0 +1,519 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Optional
+
+from app.core.ss58 import encode_account_id
+from app.db.columnar import ColumnarSnapshot, ColumnarSnapshotStore
+from app.schemas.blockchain import (
+    DividendRankingEntry,
+    TaoDividendRankingResponse,
+    TaoDividendResponse,
+)
+from app.services.blockchain import BlockchainService
+from app.services.cache import CacheService
+
+logger = logging.getLogger("snapshot_store")
+
+# Marker field written together with the reverse index so that a missing
+# hotkey can be told apart from an index that has not been built yet.
+INDEX_COMPLETE_FIELD = "__complete__"
+
+
+class DividendSnapshotStore:
+    """
+    Block-indexed store of TaoDividendsPerSubnet snapshots.
+
+    Each subnet is scanned at most once per block and stored under
+    ``dividends:{block_hash}:subnet:{netuid}``. Subnet queries are derived
+    from those snapshots. Hotkey lookups use a per-block reverse index or a
+    cached snapshot, and otherwise read just that hotkey's storage entries.
+
+    With a ColumnarSnapshotStore, complete blocks are also kept as a
+    memory-mapped columnar snapshot shared by every worker on the host,
+    and queries are answered from it without touching Redis.
+    """
+
+    def __init__(
+        self,
+        blockchain: BlockchainService,
+        cache: CacheService,
+        head_ttl: int = 120,
+        snapshot_ttl: int = 600,
+        stale_ttl: int = 3600,
+        columnar: Optional[ColumnarSnapshotStore] = None,
+    ) -> None:
+        self.blockchain = blockchain
+        self.cache = cache
+        self.head_ttl = head_ttl
+        self.snapshot_ttl = snapshot_ttl
+        self.stale_ttl = stale_ttl
+        self.columnar = columnar
+
+    async def head(self) -> str:
+        """
+        Return the block hash that queries are currently served from.
+
+        Once head_ttl has passed, the previous head keeps being returned
+        (for up to stale_ttl seconds) while it is refreshed in the
+        background, so an expiry or a slow node never blocks a request.
+        """
+
+        async def fetch_head() -> dict[str, Any]:
+            return {"block_hash": await self.blockchain.get_chain_head()}
+
+        data, _ = await self.cache.get_or_compute(
+            "dividends:head", fetch_head, ttl=self.head_ttl, stale_ttl=self.stale_ttl
+        )
+        return data["block_hash"]
+
+    async def publish_head(self, block_hash: str) -> None:
+        """Point queries at a block whose snapshots have been prefetched."""
+        await self.cache.set(
+            "dividends:head",
+            {"block_hash": block_hash},
+            ttl=self.head_ttl,
+            stale_ttl=self.stale_ttl,
+        )
+
+    async def netuids(self, block_hash: str) -> list[int]:
+        """Subnets that exist at the given block."""
+
+        async def fetch_netuids() -> dict[str, Any]:
+            return {"netuids": await self.blockchain.get_netuids(block_hash)}
+
+        data, _ = await self.cache.get_or_compute(
+            f"dividends:{block_hash}:netuids", fetch_netuids, ttl=self.snapshot_ttl
+        )
+        return data["netuids"]
+
+    async def block_number(self, block_hash: str) -> int:
+        """Height of the given block."""
+
+        async def fetch_number() -> dict[str, Any]:
+            return {"number": await self.blockchain.get_block_number(block_hash)}
+
+        data, _ = await self.cache.get_or_compute(
+            f"dividends:{block_hash}:number", fetch_number, ttl=self.snapshot_ttl
+        )
+        return data["number"]
+
+    async def subnet(self, block_hash: str, netuid: int) -> tuple[dict[str, int], bool]:
+        """Return the dividend snapshot of one subnet and whether it was cached."""
+
+        async def fetch_subnet() -> dict[str, Any]:
+            return await self.blockchain.fetch_subnet_dividends(netuid, block_hash)
+
+        return await self.cache.get_or_compute(
+            subnet_key(block_hash, netuid), fetch_subnet, ttl=self.snapshot_ttl
+        )
+
+    async def subnets(
+        self, block_hash: str, netuids: list[int]
+    ) -> tuple[dict[int, dict[str, int]], list[int], bool]:
+        """
+        Load snapshots for several subnets.
+
+        Cached snapshots are read in a single round trip; each remaining
+        subnet is scanned once, concurrently. Returns the snapshots that
+        loaded, the netuids that failed, and whether all came from cache.
+        """
+        cached_values = await self.cache.get_many(
+            [subnet_key(block_hash, netuid) for netuid in netuids]
+        )
+        snapshots = {
+            netuid: snapshot
+            for netuid, snapshot in zip(netuids, cached_values)
+            if snapshot is not None
+        }
+        missing = [netuid for netuid in netuids if netuid not in snapshots]
+
+        async def load(netuid: int) -> Optional[tuple[int, dict[str, int], bool]]:
+            try:
+                snapshot, cached = await self.subnet(block_hash, netuid)
+            except Exception as e:
+                logger.error(f"Error querying netuid {netuid}: {e!r}")
+                return None
+            return netuid, snapshot, cached
+
+        loaded = await asyncio.gather(*(load(netuid) for netuid in missing))
+        succeeded = [item for item in loaded if item is not None]
+        snapshots.update({netuid: snapshot for netuid, snapshot, _ in succeeded})
+        failed = [netuid for netuid in netuids if netuid not in snapshots]
+        return (
+            snapshots,
+            failed,
+            not failed and all(cached for _, _, cached in succeeded),
+        )
+
+    async def lookup(
+        self, block_hash: str, pairs: list[tuple[int, str]]
+    ) -> tuple[list[Optional[int]], list[int], bool]:
+        """
+        Resolve many (netuid, hotkey) pairs against a block's snapshots.
+
+        Each distinct subnet is loaded at most once. Returns the dividend for
+        each pair (None if the hotkey has none or the subnet failed), the
+        netuids that failed, and whether every snapshot came from cache.
+        """
+        table = await self.table(block_hash)
+        if table is not None:
+            return table.lookup(pairs), [], True
+
+        netuids = sorted({netuid for netuid, _ in pairs})
+        snapshots, failed, cached = await self.subnets(block_hash, netuids)
+        dividends = [snapshots.get(netuid, {}).get(hotkey) for netuid, hotkey in pairs]
+        return dividends, failed, cached
+
+    async def hotkey(
+        self, block_hash: str, hotkey: str, netuid: Optional[int] = None
+    ) -> tuple[dict[int, int], list[int], bool]:
+        """
+        Return a hotkey's dividends on every subnet, or only on netuid.
+
+        The reverse index and cached subnet snapshots answer it first, and
+        subnets that are being scanned (here or in another process) are
+        waited for rather than read twice. Only the remaining subnets have
+        just the hotkey's own storage entries read from the chain.
+        """
+        if netuid is None:
+            entry, complete = await self.cache.get_fields(
+                f"dividends:{block_hash}:hotkeys", [hotkey, INDEX_COMPLETE_FIELD]
+            )
+            if complete:
+                return (
+                    {int(net_id): amount for net_id, amount in (entry or {}).items()},
+                    [],
+                    True,
+                )
+            netuids = await self.netuids(block_hash)
+            key = f"dividends:{block_hash}:hotkey:{hotkey}"
+        else:
+            netuids = [netuid]
+            key = f"{subnet_key(block_hash, netuid)}:hotkey:{hotkey}"
+
+        subnet_keys = [subnet_key(block_hash, net_id) for net_id in netuids]
+        stored, *snapshots = await self.cache.get_many([key, *subnet_keys])
+        if stored is not None:
+            return {int(net_id): amount for net_id, amount in stored.items()}, [], True
+        dividends = {
+            net_id: snapshot[hotkey]
+            for net_id, snapshot in zip(netuids, snapshots)
+            if snapshot is not None and hotkey in snapshot
+        }
+        missing = [
+            net_id for net_id, snapshot in zip(netuids, snapshots) if snapshot is None
+        ]
+        if not missing:
+            return dividends, [], True
+
+        busy = await self.cache.computing(
+            [subnet_key(block_hash, net_id) for net_id in missing]
+        )
+        scanning = [net_id for net_id, scanned in zip(missing, busy) if scanned]
+        rest = [net_id for net_id, scanned in zip(missing, busy) if not scanned]
+        failed: list[int] = []
+        if scanning:
+            loaded, failed, _ = await self.subnets(block_hash, scanning)
+            dividends.update(
+                {
+                    net_id: snapshot[hotkey]
+                    for net_id, snapshot in loaded.items()
+                    if hotkey in snapshot
+                }
+            )
+        if not rest or encode_account_id(hotkey) is None:
+            # An invalid address has no storage entries to read.
+            return dividends, failed, False
+
+        async def fetch_hotkey() -> dict[str, Any]:
+            found = await self.blockchain.fetch_hotkey_dividends(
+                rest, hotkey, block_hash
+            )
+            return {str(net_id): amount for net_id, amount in found.items()}
+
+        try:
+            if rest == netuids:
+                # Concurrent lookups of the same hotkey share one read.
+                data, _ = await self.cache.get_or_compute(
+                    key, fetch_hotkey, ttl=self.snapshot_ttl
+                )
+            else:
+                data = await fetch_hotkey()
+        except Exception as e:
+            logger.error(f"Error querying hotkey {hotkey}: {e!r}")
+            return dividends, failed + rest, False
+        dividends.update({int(net_id): amount for net_id, amount in data.items()})
+        return dividends, failed, False
+
+    async def store_index(
+        self, block_hash: str, index: dict[str, dict[str, int]]
+    ) -> None:
+        """Persist a complete hotkey reverse index for a block."""
+        await self.cache.set_fields(
+            f"dividends:{block_hash}:hotkeys",
+            {**index, INDEX_COMPLETE_FIELD: True},
+            ttl=self.snapshot_ttl,
+        )
+
+    async def table(self, block_hash: str) -> Optional[ColumnarSnapshot]:
+        """Return a block's columnar snapshot if this host has one."""
+        if self.columnar is None:
+            return None
+        return await self.columnar.get(block_hash)
+
+    async def ranking_table(
+        self, block_hash: str
+    ) -> tuple[ColumnarSnapshot, list[int], bool]:
+        """
+        Return a block's columnar snapshot, whose rankings are precomputed.
+
+        Blocks ingested ahead of time are read as-is; otherwise every subnet
+        is loaded and the snapshot built (and saved, if complete). Returns
+        the snapshot, the netuids missing from it, and whether it was cached.
+        """
+        table = await self.table(block_hash)
+        if table is not None:
+            return table, [], True
+        netuids = await self.netuids(block_hash)
+        snapshots, failed, cached = await self.subnets(block_hash, netuids)
+        if not failed and self.columnar is not None:
+            table = await self.columnar.put(block_hash, snapshots)
+        if table is None:
+            table = await asyncio.to_thread(
+                ColumnarSnapshot.build, block_hash, snapshots
+            )
+        return table, failed, cached
+
+    async def rankings(
+        self,
+        netuid: Optional[int] = None,
+        aggregate: Optional[str] = None,
+        top_k: Optional[int] = None,
+        sort: str = "desc",
+        offset: int = 0,
+        limit: int = 100,
+        block_hash: Optional[str] = None,
+    ) -> TaoDividendRankingResponse:
+        """
+        Rank dividends at a block (default: head).
+
+        Without aggregate, entries are each subnet's (netuid, hotkey) rows
+        by dividend, at most top_k per subnet. With ``sum_by_hotkey`` or
+        ``sum_by_subnet``, entries are totals ranked across the network.
+        """
+        block_hash = block_hash or await self.head()
+        table, failed, cached = await self.ranking_table(block_hash)
+        ascending = sort == "asc"
+
+        if aggregate == "sum_by_hotkey":
+            hotkeys, total = table.ranked_hotkeys(top_k, ascending, offset, limit)
+            entries = [
+                DividendRankingEntry(hotkey=hotkey, dividend=amount, count=count)
+                for hotkey, amount, count in hotkeys
+            ]
+        elif aggregate == "sum_by_subnet":
+            subnets, total = table.ranked_subnets(top_k, ascending, offset, limit)
+            entries = [
+                DividendRankingEntry(netuid=net_id, dividend=amount, count=count)
+                for net_id, amount, count in subnets
+            ]
+        else:
+            netuids = [netuid] if netuid is not None else table.netuids()
+            rows, total = table.ranked_rows(netuids, top_k, ascending, offset, limit)
+            entries = [
+                DividendRankingEntry(netuid=net_id, hotkey=hotkey, dividend=amount)
+                for net_id, hotkey, amount in table.rows(rows)
+            ]
+
+        return TaoDividendRankingResponse(
+            entries=entries,
+            total=total,
+            offset=offset,
+            limit=limit,
+            netuid=netuid if netuid is not None else "all",
+            aggregate=aggregate,
+            sort=sort,
+            block_hash=block_hash,
+            cached=cached,
+            failed_netuids=failed,
+        )
+
+    async def prefetch(self, block_hash: str) -> bool:
+        """Load every subnet snapshot and the reverse index for a block."""
+        netuids = await self.netuids(block_hash)
+        snapshots, failed, _ = await self.subnets(block_hash, netuids)
+        if failed:
+            return False
+        await self.store_index(block_hash, build_hotkey_index(snapshots))
+        if self.columnar is not None:
+            await self.columnar.put(block_hash, snapshots)
+        return True
+
+    async def stream(
+        self,
+        block_hash: str,
+        netuid: Optional[int] = None,
+        hotkey: Optional[str] = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Dividend rows of a block as {"netuid", "hotkey", "dividend", "block"}.
+
+        Rows come from the columnar snapshot, the hotkey lookups or the
+        cached subnet snapshots where they exist; only subnets with nothing
+        stored are scanned from the chain, page by page. The block number
+        and subnet list are resolved before returning, so failing to reach
+        the chain raises here rather than halfway through a response.
+        """
+        block_number = await self.block_number(block_hash)
+        table = await self.table(block_hash)
+        if table is not None:
+            return table_rows(table, block_number, netuid, hotkey)
+        if hotkey:
+            by_netuid, failed, _ = await self.hotkey(block_hash, hotkey, netuid)
+            return hotkey_rows(hotkey, block_number, by_netuid, failed)
+        netuids = [netuid] if netuid is not None else await self.netuids(block_hash)
+        return self._subnet_rows(block_hash, block_number, netuids)
+
+    async def _subnet_rows(
+        self, block_hash: str, block_number: int, netuids: list[int]
+    ) -> AsyncIterator[dict[str, Any]]:
+        # Snapshots are read one at a time to keep memory flat.
+        missing = []
+        for netuid in netuids:
+            (snapshot,) = await self.cache.get_many([subnet_key(block_hash, netuid)])
+            if snapshot is None:
+                missing.append(netuid)
+                continue
+            for hotkey, amount in snapshot.items():
+                yield dividend_row(netuid, hotkey, amount, block_number)
+        if missing:
+            async for row in self.blockchain.stream_tao_dividends(
+                block_hash, missing, block_number
+            ):
+                yield row
+
+    async def query(
+        self,
+        netuid: Optional[int] = None,
+        hotkey: Optional[str] = None,
+        block_hash: Optional[str] = None,
+    ) -> TaoDividendResponse:
+        """Answer a dividends query from a block's snapshots (default: head)."""
+        block_hash = block_hash or await self.head()
+
+        table = await self.table(block_hash)
+        if table is not None:
+            return table_response(table, netuid, hotkey)
+
+        if hotkey:
+            by_netuid, failed, cached = await self.hotkey(block_hash, hotkey, netuid)
+            results = {
+                f"netuid_{net_id}": {hotkey: amount}
+                for net_id, amount in sorted(by_netuid.items())
+            }
+        else:
+            netuids = [netuid] if netuid is not None else await self.netuids(block_hash)
+            snapshots, failed, cached = await self.subnets(block_hash, netuids)
+            if netuid is None and not failed and self.columnar is not None:
+                # Every snapshot is loaded anyway; later queries use columns.
+                await self.columnar.put(block_hash, snapshots)
+            results = {
+                f"netuid_{net_id}": snapshot
+                for net_id, snapshot in snapshots.items()
+                if snapshot
+            }
+
+        return TaoDividendResponse(
+            results=results,
+            netuid=netuid if netuid is not None else "all",
+            hotkey=hotkey if hotkey is not None else "all",
+            cached=cached,
+            failed_netuids=failed,
+        )
+
+
+def table_response(
+    table: ColumnarSnapshot, netuid: Optional[int], hotkey: Optional[str]
+) -> TaoDividendResponse:
+    """Answer a dividends query from a block's columnar snapshot."""
+    if netuid is None and hotkey:
+        results = {
+            f"netuid_{net_id}": {hotkey: amount}
+            for net_id, amount in sorted(table.hotkey(hotkey).items())
+        }
+    else:
+        netuids = [netuid] if netuid is not None else table.netuids()
+        results = {
+            f"netuid_{net_id}": table.subnet(net_id, hotkey) for net_id in netuids
+        }
+        results = {key: value for key, value in results.items() if value}
+    return TaoDividendResponse(
+        results=results,
+        netuid=netuid if netuid is not None else "all",
+        hotkey=hotkey if hotkey is not None else "all",
+        cached=True,
+        failed_netuids=[],
+    )
+
+
+def dividend_row(
+    netuid: int, hotkey: str, amount: int, block_number: int
+) -> dict[str, Any]:
+    return {
+        "netuid": netuid,
+        "hotkey": hotkey,
+        "dividend": amount,
+        "block": block_number,
+    }
+
+
+async def table_rows(
+    table: ColumnarSnapshot,
+    block_number: int,
+    netuid: Optional[int],
+    hotkey: Optional[str],
+) -> AsyncIterator[dict[str, Any]]:
+    """Stream rows from a block's columnar snapshot."""
+    if netuid is None and hotkey:
+        for net_id, amount in sorted(table.hotkey(hotkey).items()):
+            yield dividend_row(net_id, hotkey, amount, block_number)
+        return
+    for net_id in [netuid] if netuid is not None else table.netuids():
+        for account, amount in table.subnet(net_id, hotkey).items():
+            yield dividend_row(net_id, account, amount, block_number)
+
+
+async def hotkey_rows(
+    hotkey: str, block_number: int, by_netuid: dict[int, int], failed: list[int]
+) -> AsyncIterator[dict[str, Any]]:
+    """Stream the rows of a hotkey lookup, with an error row per failed subnet."""
+    for netuid, amount in sorted(by_netuid.items()):
+        yield dividend_row(netuid, hotkey, amount, block_number)
+    for netuid in failed:
+        yield {
+            "netuid": netuid,
+            "block": block_number,
+            "error": f"Dividends of hotkey {hotkey} could not be queried",
+        }
+
+
+def subnet_key(block_hash: str, netuid: int) -> str:
+    return f"dividends:{block_hash}:subnet:{netuid}"
+
+
+def filter_hotkey(snapshot: dict[str, int], hotkey: Optional[str]) -> dict[str, int]:
+    """Slice a subnet snapshot down to one hotkey, if given."""
+    if not hotkey:
+        return snapshot
+    return {hotkey: snapshot[hotkey]} if hotkey in snapshot else {}
+
+
+def build_hotkey_index(
+    snapshots: dict[int, dict[str, int]],
+) -> dict[str, dict[str, int]]:
+    """Invert per-subnet snapshots into hotkey -> {netuid: dividend}."""
+    index: dict[str, dict[str, int]] = {}
+    for netuid, snapshot in snapshots.items():
+        for hotkey, amount in snapshot.items():
+            index.setdefault(hotkey, {})[str(netuid)] = amount
+    return index
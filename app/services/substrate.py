@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Coroutine, Optional
+
+from async_substrate_interface.async_substrate import AsyncSubstrateInterface
+
+from app.core.metrics import (
+    SUBSTRATE_BUSY_CONNECTIONS,
+    SUBSTRATE_CONNECT_DURATION,
+    SUBSTRATE_CONNECT_FAILURES,
+    SUBSTRATE_OPEN_CONNECTIONS,
+)
+
+logger = logging.getLogger("substrate_pool")
+
+
+class SubstrateConnectionPool:
+    """Pool of long-lived AsyncSubstrateInterface connections.
+
+    Connections are opened once (websocket, TLS handshake, runtime metadata)
+    and handed out to callers, so a query only pays for its own RPCs.
+    Connections are opened and replaced in the background with exponential
+    backoff; while none is available, acquire() fails after acquire_timeout
+    instead of waiting for the node to come back.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        ss58_format: int,
+        size: int = 2,
+        health_check_interval: float = 30.0,
+        health_check_timeout: float = 10.0,
+        max_backoff: float = 30.0,
+        acquire_timeout: float = 10.0,
+        connect_timeout: float = 30.0,
+    ) -> None:
+        self.url = url
+        self.ss58_format = ss58_format
+        self.size = size
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self.max_backoff = max_backoff
+        self.acquire_timeout = acquire_timeout
+        self.connect_timeout = connect_timeout
+        self._idle: asyncio.Queue[AsyncSubstrateInterface] = asyncio.Queue()
+        self._connections: set[AsyncSubstrateInterface] = set()
+        self._health_task: Optional[asyncio.Task] = None
+        self._background: set[asyncio.Task] = set()
+        self._start_lock = asyncio.Lock()
+        self._started = False
+        self._stats = {
+            "connects": 0,
+            "connect_failures": 0,
+            "reconnects": 0,
+            "acquires": 0,
+            "acquire_timeouts": 0,
+            "health_check_failures": 0,
+        }
+
+    async def start(self) -> None:
+        """
+        Start opening the pooled connections and the health checker.
+
+        Returns without waiting for the node: connections join the pool as
+        they come up, so an unreachable node does not stall startup.
+        """
+        async with self._start_lock:
+            if self._started:
+                return
+            for _ in range(self.size):
+                self._spawn(self._add_connection())
+            self._health_task = asyncio.create_task(self._health_loop())
+            self._started = True
+            logger.info(f"Substrate pool starting {self.size} connections")
+
+    async def close(self) -> None:
+        """Stop the health checker and close every connection."""
+        if self._health_task:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        for task in list(self._background):
+            task.cancel()
+        for substrate in list(self._connections):
+            await self._disconnect(substrate)
+        while not self._idle.empty():
+            self._idle.get_nowait()
+        self._started = False
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[AsyncSubstrateInterface]:
+        """Borrow a connection; it is health-checked if the caller's RPCs fail."""
+        if not self._started:
+            await self.start()
+        try:
+            substrate = await asyncio.wait_for(self._idle.get(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self._stats["acquire_timeouts"] += 1
+            raise TimeoutError(
+                f"No substrate connection to {self.url} within {self.acquire_timeout}s"
+            ) from None
+        self._stats["acquires"] += 1
+        SUBSTRATE_BUSY_CONNECTIONS.inc()
+        try:
+            yield substrate
+        except BaseException:
+            self._spawn(self._recycle(substrate))
+            raise
+        else:
+            self._idle.put_nowait(substrate)
+        finally:
+            SUBSTRATE_BUSY_CONNECTIONS.dec()
+
+    def stats(self) -> dict[str, Any]:
+        """Return pool counters and current utilisation."""
+        return {
+            **self._stats,
+            "size": self.size,
+            "open": len(self._connections),
+            "idle": self._idle.qsize(),
+        }
+
+    def _spawn(self, coro: Coroutine[Any, Any, None]) -> None:
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _connect(self) -> AsyncSubstrateInterface:
+        """Open a connection, retrying with jittered exponential backoff."""
+        attempt = 0
+        while True:
+            substrate = AsyncSubstrateInterface(self.url, ss58_format=self.ss58_format)
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(substrate.initialize(), self.connect_timeout)
+            except Exception as e:
+                self._stats["connect_failures"] += 1
+                SUBSTRATE_CONNECT_FAILURES.inc()
+                delay = min(self.max_backoff, 2**attempt) * random.uniform(0.5, 1.0)
+                logger.error(
+                    f"Failed to connect to {self.url}: {e!r}; retrying in {delay:.1f}s"
+                )
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            SUBSTRATE_CONNECT_DURATION.observe(time.perf_counter() - started)
+            self._stats["connects"] += 1
+            self._connections.add(substrate)
+            SUBSTRATE_OPEN_CONNECTIONS.inc()
+            return substrate
+
+    async def _add_connection(self) -> None:
+        self._idle.put_nowait(await self._connect())
+
+    async def _disconnect(self, substrate: AsyncSubstrateInterface) -> None:
+        if substrate in self._connections:
+            self._connections.remove(substrate)
+            SUBSTRATE_OPEN_CONNECTIONS.dec()
+        try:
+            await substrate.close()
+        except Exception as e:
+            logger.error(f"Error closing substrate connection: {e}")
+
+    async def _ping(self, substrate: AsyncSubstrateInterface) -> bool:
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(
+                substrate.rpc_request("chain_getHead", []),
+                self.health_check_timeout,
+            )
+        except Exception as e:
+            self._stats["health_check_failures"] += 1
+            logger.warning(
+                f"Substrate health check failed after "
+                f"{time.monotonic() - started:.1f}s: {e}"
+            )
+            return False
+        return True
+
+    async def _recycle(self, substrate: AsyncSubstrateInterface) -> None:
+        """Return a connection to the pool if it still answers, else replace it."""
+        if await self._ping(substrate):
+            self._idle.put_nowait(substrate)
+        else:
+            await self._replace(substrate)
+
+    async def _replace(self, substrate: AsyncSubstrateInterface) -> None:
+        """Swap a broken connection for a fresh one."""
+        self._stats["reconnects"] += 1
+        await self._disconnect(substrate)
+        await self._add_connection()
+
+    async def _health_loop(self) -> None:
+        """Periodically ping idle connections and replace dead ones."""
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            for _ in range(self._idle.qsize()):
+                try:
+                    substrate = self._idle.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if await self._ping(substrate):
+                    self._idle.put_nowait(substrate)
+                else:
+                    self._spawn(self._replace(substrate))
@@ -0,0 +1,224 @@
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any, Coroutine, Optional
+
+if TYPE_CHECKING:
+    from bittensor_wallet import Keypair
+
+    from app.services.blockchain import BlockchainService
+
+logger = logging.getLogger("trade_executor")
+
+RAO_PER_TAO = 1_000_000_000
+
+# (hotkey, netuid)
+TradeKey = tuple[str, int]
+
+
+class PendingTrade:
+    """Net stake change in TAO for one (hotkey, netuid) and its waiters."""
+
+    __slots__ = ("amount_rao", "waiters")
+
+    def __init__(self) -> None:
+        self.amount_rao = 0
+        self.waiters: list[asyncio.Future[Optional[str]]] = []
+
+
+class TradeExecutor:
+    """
+    Aggregates stake/unstake intents and submits them in batches.
+
+    Intents for the same (hotkey, netuid) arriving within ``window``
+    seconds are netted in TAO into a single add_stake or remove_stake
+    call. remove_stake takes alpha, so a net unstake is converted at the
+    subnet's pool price (SubnetTAO / SubnetAlphaIn) when it is submitted.
+    All calls of a window are sent as one ``utility.batch_all`` extrinsic
+    per ``max_batch_calls``, so a batch is applied whole or not at all.
+    Nonces are tracked locally so consecutive batches can be submitted
+    without waiting for inclusion.
+    """
+
+    def __init__(
+        self,
+        blockchain: "BlockchainService",
+        wallet_name: Optional[str] = None,
+        wallet_path: Optional[str] = None,
+        wallet_password: Optional[str] = None,
+        window: float = 2.0,
+        max_batch_calls: int = 64,
+    ) -> None:
+        self.blockchain = blockchain
+        self.wallet_name = wallet_name
+        self.wallet_path = wallet_path
+        self.wallet_password = wallet_password
+        self.window = window
+        self.max_batch_calls = max_batch_calls
+        self._pending: dict[TradeKey, PendingTrade] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._background: set[asyncio.Task] = set()
+        self._keypair: Optional["Keypair"] = None
+        self._nonce: Optional[int] = None
+        self._nonce_lock = asyncio.Lock()
+        self._stats = {"intents": 0, "netted": 0, "calls": 0, "extrinsics": 0}
+
+    def stats(self) -> dict[str, Any]:
+        return {**self._stats, "pending": len(self._pending)}
+
+    async def submit(
+        self, hotkey: str, netuid: int, amount_tao: float
+    ) -> Optional[str]:
+        """
+        Queue a stake change worth amount_tao (positive stakes, negative
+        unstakes).
+
+        Resolves with the hash of the extrinsic that carried it, or None if
+        it nets to zero against the other intents of its window.
+        """
+        amount_rao = round(amount_tao * RAO_PER_TAO)
+        if amount_rao == 0:
+            return None
+        future: asyncio.Future[Optional[str]] = (
+            asyncio.get_running_loop().create_future()
+        )
+        pending = self._pending.setdefault((hotkey, netuid), PendingTrade())
+        pending.amount_rao += amount_rao
+        pending.waiters.append(future)
+        self._stats["intents"] += 1
+
+        if len(self._pending) >= self.max_batch_calls:
+            # A full batch need not wait for the window to close.
+            self._spawn(self.flush())
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = self._spawn(self._flush_after(self.window))
+        return await future
+
+    def _spawn(self, coro: Coroutine[Any, Any, None]) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    async def _flush_after(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Submit everything accumulated so far."""
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        calls: list[tuple[TradeKey, PendingTrade]] = []
+        for key, trade in pending.items():
+            if trade.amount_rao != 0:
+                calls.append((key, trade))
+                continue
+            self._stats["netted"] += 1
+            for waiter in trade.waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+        chunks = [
+            calls[i : i + self.max_batch_calls]
+            for i in range(0, len(calls), self.max_batch_calls)
+        ]
+        await asyncio.gather(*(self._submit_chunk(chunk) for chunk in chunks))
+
+    async def _submit_chunk(self, chunk: list[tuple[TradeKey, PendingTrade]]) -> None:
+        try:
+            keypair = await self._get_keypair()
+            unstaked = sorted({netuid for (_, netuid), t in chunk if t.amount_rao < 0})
+            reserves = (
+                await self.blockchain.get_subnet_reserves(unstaked) if unstaked else {}
+            )
+            calls = [
+                stake_call(hotkey, netuid, trade.amount_rao, reserves.get(netuid))
+                for (hotkey, netuid), trade in chunk
+            ]
+            nonce = await self._next_nonce(keypair.ss58_address)
+            extrinsic_hash = await self.blockchain.submit_calls(
+                calls, keypair=keypair, nonce=nonce
+            )
+        except Exception as e:
+            # The chain's view of our nonce is unknown after a failure.
+            self._nonce = None
+            logger.error(f"Trade batch of {len(chunk)} calls failed: {e}")
+            error = RuntimeError(f"Trade submission failed: {e}")
+            for _, trade in chunk:
+                for waiter in trade.waiters:
+                    if not waiter.done():
+                        waiter.set_exception(error)
+            return
+
+        self._stats["calls"] += len(chunk)
+        self._stats["extrinsics"] += 1
+        logger.info(
+            f"Submitted {len(chunk)} stake calls in extrinsic {extrinsic_hash} "
+            f"(nonce {nonce})"
+        )
+        for _, trade in chunk:
+            for waiter in trade.waiters:
+                if not waiter.done():
+                    waiter.set_result(extrinsic_hash)
+
+    async def _next_nonce(self, address: str) -> int:
+        async with self._nonce_lock:
+            if self._nonce is None:
+                self._nonce = await self.blockchain.get_account_next_index(address)
+            nonce = self._nonce
+            self._nonce += 1
+            return nonce
+
+    async def _get_keypair(self) -> "Keypair":
+        if self._keypair is None:
+            if not self.wallet_name:
+                raise RuntimeError("No wallet configured for trading")
+            self._keypair = await asyncio.to_thread(self._load_keypair)
+        return self._keypair
+
+    def _load_keypair(self) -> "Keypair":
+        from bittensor_wallet import Wallet
+
+        wallet = Wallet(name=self.wallet_name, path=self.wallet_path)
+        if self.wallet_password:
+            return wallet.get_coldkey(password=self.wallet_password)
+        return wallet.coldkey
+
+    async def close(self) -> None:
+        """Submit any intents still waiting for their window."""
+        await self.flush()
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+
+
+def stake_call(
+    hotkey: str,
+    netuid: int,
+    amount_rao: int,
+    reserves: Optional[tuple[int, int]] = None,
+) -> tuple[str, str, dict[str, Any]]:
+    """
+    SubtensorModule call staking amount_rao of TAO, or unstaking -amount_rao
+    worth of TAO.
+
+    remove_stake takes alpha, so an unstake needs the subnet's
+    (SubnetTAO, SubnetAlphaIn) reserves to convert at the pool price.
+    """
+    if amount_rao > 0:
+        return (
+            "SubtensorModule",
+            "add_stake",
+            {"hotkey": hotkey, "netuid": netuid, "amount_staked": amount_rao},
+        )
+    if reserves is None:
+        raise RuntimeError(f"No pool reserves for subnet {netuid}")
+    subnet_tao, subnet_alpha = reserves
+    return (
+        "SubtensorModule",
+        "remove_stake",
+        {
+            "hotkey": hotkey,
+            "netuid": netuid,
+            "amount_unstaked": -amount_rao * subnet_alpha // subnet_tao,
+        },
+    )
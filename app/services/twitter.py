@@ -2,6 +2,9 @@ import logging
 from typing import Any, Optional
 import httpx
 from app.core.settings import settings
+from app.services.cache import CacheService
+from app.services.http import HTTPClientPool, http_pool
+from app.services.ratelimit import TokenBucket
 
 logger = logging.getLogger("twitter_service")
 
@@ -9,7 +12,20 @@ logger = logging.getLogger("twitter_service")
 class TwitterService:
     """Service for interacting with Twitter data via Datura.ai API."""
 
-    def __init__(self, api_key: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        http: Optional[HTTPClientPool] = None,
+        cache: Optional[CacheService] = None,
+        window_size: int = 50,
+        window_ttl: int = 86400,
+        rate_limit: Optional[TokenBucket] = None,
+    ) -> None:
+        self.http = http or http_pool
+        self.cache = cache
+        self.window_size = window_size
+        self.window_ttl = window_ttl
+        self.rate_limit = rate_limit
         self.api_key = api_key or settings.DATURA_API_KEY.get_secret_value()
         self.base_url = "https://apis.datura.ai/twitter"
 
@@ -38,16 +54,19 @@ class TwitterService:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    self.base_url, headers=headers, json=payload
-                )
+            response = await self.http.post(
+                self.base_url,
+                headers=headers,
+                json=payload,
+                timeout=30.0,
+                rate_limit=self.rate_limit,
+            )
 
-                response.raise_for_status()
-                data = response.json()
+            response.raise_for_status()
+            data = response.json()
 
-                logger.info(f"Retrieved {len(data)} tweets")
-                return data
+            logger.info(f"Retrieved {len(data)} tweets")
+            return data
 
         except httpx.HTTPStatusError as e:
             logger.error(
@@ -72,8 +91,80 @@ class TwitterService:
         query = f"Bittensor netuid {netuid}"
         return await self.search_tweets(query, limit)
 
+    async def poll_subnet_tweets(
+        self, netuid: int, limit: int = 20
+    ) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+        """
+        Fetch only tweets about a subnet that were not seen before.
+
+        The subnet's rolling window and since-ID cursor are kept in Redis;
+        returns the new tweets and the updated window (newest first). The
+        window is not persisted until save_subnet_window is called, so a
+        failed run sees the same tweets as new again.
+        """
+        window_data = (
+            await self.cache.get(window_key(netuid)) if self.cache is not None else None
+        ) or {}
+        window: list[dict[str, Any]] = window_data.get("tweets", [])
+        since_id: Optional[str] = window_data.get("since_id")
+
+        query = f"Bittensor netuid {netuid}"
+        if since_id:
+            query = f"{query} since_id:{since_id}"
+        fetched = await self.search_tweets(query, limit)
+
+        seen = {tweet_identity(tweet) for tweet in window}
+        new_tweets = []
+        for tweet in fetched:
+            identity = tweet_identity(tweet)
+            # The search may ignore since_id; filter again on our side.
+            if identity in seen or not is_newer(tweet.get("id"), since_id):
+                continue
+            seen.add(identity)
+            new_tweets.append(tweet)
+        logger.info(f"{len(new_tweets)} new tweets for subnet {netuid}")
+
+        updated = sorted(new_tweets, key=tweet_sort_key, reverse=True) + window
+        return new_tweets, updated[: self.window_size]
+
+    async def save_subnet_window(
+        self, netuid: int, tweets: list[dict[str, Any]]
+    ) -> None:
+        """Persist a subnet's tweet window and advance its since-ID cursor."""
+        if self.cache is None:
+            return
+        ids = [str(tweet["id"]) for tweet in tweets if tweet.get("id")]
+        since_id = max(
+            ids, key=lambda tweet_id: tweet_sort_key({"id": tweet_id}), default=None
+        )
+        await self.cache.set(
+            window_key(netuid),
+            {"since_id": since_id, "tweets": tweets},
+            ttl=self.window_ttl,
+        )
+
     def extract_tweet_text(self, tweets: list[dict[str, Any]]) -> list[str]:
         """
         Extract just the text content from tweet objects.
         """
         return [tweet.get("text", "") for tweet in tweets if tweet.get("text")]
+
+
+def window_key(netuid: int) -> str:
+    return f"tweets:window:{netuid}"
+
+
+def tweet_identity(tweet: dict[str, Any]) -> str:
+    return str(tweet.get("id") or tweet.get("text", ""))
+
+
+def tweet_sort_key(tweet: dict[str, Any]) -> int:
+    """Tweet IDs are snowflakes, so numeric order is chronological order."""
+    tweet_id = str(tweet.get("id") or "")
+    return int(tweet_id) if tweet_id.isdigit() else 0
+
+
+def is_newer(tweet_id: object, since_id: Optional[str]) -> bool:
+    if not since_id or not str(tweet_id or "").isdigit() or not since_id.isdigit():
+        return True
+    return int(str(tweet_id)) > int(since_id)
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from typing import Any, Optional
+
+from app.core.settings import settings
+from app.tasks.trade import enqueue_trade
+from app.worker import celery_app, runtime
+
+logger = logging.getLogger("scheduler_task")
+
+
+async def sweep_subnets(hotkey: str, max_subnets: int) -> dict[str, Any]:
+    """
+    Score every active subnet's new tweets and queue the resulting trades.
+
+    Subnets are ranked by the hotkey's own dividend there, then by the
+    subnet's total dividends, both read from the cached head snapshots.
+    Tweets are polled for all of them concurrently and every subnet with
+    new tweets is scored in one batched score_subnet_tweets call; each
+    trade is queued with its precomputed score, so the trade tasks make no
+    LLM requests. Celery priorities follow the rank, so the largest
+    positions are traded first.
+    """
+    services = runtime.services
+    block_hash = await services.snapshots.head()
+    netuids = await services.snapshots.netuids(block_hash)
+    snapshots, failed, _ = await services.snapshots.subnets(block_hash, netuids)
+
+    ranked = sorted(
+        snapshots,
+        key=lambda netuid: (
+            snapshots[netuid].get(hotkey, 0),
+            sum(snapshots[netuid].values()),
+        ),
+        reverse=True,
+    )[:max_subnets]
+
+    async def poll(
+        netuid: int,
+    ) -> Optional[tuple[list[dict[str, Any]], list[dict[str, Any]]]]:
+        try:
+            return await services.twitter.poll_subnet_tweets(netuid=netuid)
+        except Exception as e:
+            logger.error(f"Error fetching tweets for subnet {netuid}: {str(e)}")
+            return None
+
+    polled = await asyncio.gather(*(poll(netuid) for netuid in ranked))
+    # Only subnets with new tweets are scored and traded; the window
+    # (new tweets plus the previous ones) is what they are scored on.
+    windows = {
+        netuid: result[1]
+        for netuid, result in zip(ranked, polled)
+        if result is not None and result[0]
+    }
+    scores = await services.sentiment.score_subnet_tweets(windows) if windows else {}
+
+    queued, skipped = [], []
+    for rank, netuid in enumerate(ranked):
+        if netuid not in scores:
+            continue
+        priority = rank * 10 // len(ranked)
+        if await enqueue_trade(
+            services.cache,
+            netuid,
+            hotkey,
+            priority=priority,
+            sentiment_score=scores[netuid].score,
+            tweets=windows[netuid],
+        ):
+            queued.append(netuid)
+        else:
+            skipped.append(netuid)
+    polled_ok = [netuid for netuid, result in zip(ranked, polled) if result is not None]
+    unchanged = [netuid for netuid in polled_ok if netuid not in windows]
+    no_tweets = [netuid for netuid in ranked if netuid not in polled_ok]
+    unscored = [netuid for netuid in windows if netuid not in scores]
+    logger.info(
+        f"Sweep at {block_hash}: queued {len(queued)} subnets, "
+        f"{len(skipped)} already in flight, {len(unchanged)} without new tweets, "
+        f"{len(no_tweets)} without tweet data, {len(unscored)} unscored, "
+        f"{len(failed)} unavailable"
+    )
+    return {
+        "status": "success",
+        "block_hash": block_hash,
+        "queued": queued,
+        "in_flight": skipped,
+        "unchanged": unchanged,
+        "tweets_failed": no_tweets,
+        "unscored": unscored,
+        "failed_netuids": failed,
+    }
+
+
+@celery_app.task(name="sweep_subnets")
+def sweep_subnets_task(
+    hotkey: str = settings.TRADE_DEFAULT_HOTKEY,
+    max_subnets: int = settings.TRADE_SWEEP_MAX_SUBNETS,
+) -> dict[str, Any]:
+    """Celery beat task queueing sentiment trades across the network."""
+    return runtime.run(sweep_subnets(hotkey, max_subnets))
@@ -1,55 +1,139 @@
+import asyncio
 import logging
-from typing import Any
+import uuid
+from typing import Any, Optional
 
-from app.worker import celery_app, run_async_task
-from app.services.twitter import TwitterService
-from app.services.sentiment import SentimentService
-from app.services.blockchain import BlockchainService
 from app.core.settings import settings
+from app.services.cache import CacheService
+from app.worker import celery_app, runtime
 
 
 logger = logging.getLogger("sentiment_task")
 
 
+def inflight_key(netuid: int, hotkey: str) -> str:
+    return f"trade:inflight:{netuid}:{hotkey}"
+
+
+async def enqueue_trade(
+    cache: CacheService,
+    netuid: int,
+    hotkey: str,
+    priority: Optional[int] = None,
+    sentiment_score: Optional[float] = None,
+    tweets: Optional[list[dict[str, Any]]] = None,
+) -> bool:
+    """
+    Queue a sentiment trade unless one for the same pair is queued or running.
+
+    The in-flight marker is a lease held from enqueue until the task
+    finishes (or TRADE_INFLIGHT_TTL passes). Returns whether it was queued.
+    A sentiment_score already computed for the subnet is passed along with
+    the tweet window it was computed from, so the task trades without
+    fetching or scoring tweets itself.
+    """
+    key = inflight_key(netuid, hotkey)
+    token = uuid.uuid4().hex
+    if not await cache.acquire_lease(key, token, settings.TRADE_INFLIGHT_TTL):
+        logger.info(f"Trade for subnet {netuid}, hotkey {hotkey} already in flight")
+        return False
+    try:
+        # Publishing to the broker is blocking I/O.
+        await asyncio.to_thread(
+            analyze_sentiment_and_trade.apply_async,
+            args=[netuid, hotkey, token, sentiment_score, tweets],
+            priority=priority,
+        )
+    except Exception:
+        await cache.release_lease(key, token)
+        raise
+    return True
+
+
 async def execute_sentiment_analysis(
-    netuid: int = 18, hotkey: str = "5FFApaS75bv5pJHfAp2FVLBj9ZaXuFDjEypsaBNc1wCfe52v"
+    netuid: int,
+    hotkey: str,
+    lease_token: Optional[str] = None,
+    sentiment_score: Optional[float] = None,
+    tweets: Optional[list[dict[str, Any]]] = None,
 ) -> dict[str, Any]:
     """
     Analyze sentiment for tweets about a subnet and stake/unstake based on results.
     """
+    try:
+        if sentiment_score is not None and tweets is not None:
+            return await run_trade(netuid, hotkey, sentiment_score, tweets)
+        return await run_sentiment_trade(netuid, hotkey)
+    finally:
+        if lease_token is not None:
+            await runtime.services.cache.release_lease(
+                inflight_key(netuid, hotkey), lease_token
+            )
+
+
+async def run_sentiment_trade(netuid: int, hotkey: str) -> dict[str, Any]:
     logger.info(f"Executing sentiment analysis for subnet {netuid}")
 
-    twitter_service = TwitterService(api_key=settings.DATURA_API_KEY.get_secret_value())
-    sentiment_service = SentimentService(
-        api_key=settings.CHUTES_API_KEY.get_secret_value()
-    )
-    blockchain_service = BlockchainService()
+    services = runtime.services
+    twitter_service = services.twitter
+    sentiment_service = services.sentiment
 
     try:
-        tweets = await twitter_service.search_subnet_tweets(netuid=netuid)
-        if not tweets or len(tweets) == 0:
+        new_tweets, tweets = await twitter_service.poll_subnet_tweets(netuid=netuid)
+        if not tweets:
             logger.warning(f"No tweets found for subnet {netuid}")
             return {"status": "no_data", "netuid": netuid, "reason": "No tweets found"}
+        if not new_tweets:
+            logger.info(f"No new tweets for subnet {netuid}; skipping trade")
+            return {
+                "status": "unchanged",
+                "netuid": netuid,
+                "hotkey": hotkey,
+                "reason": "No new tweets since the last run",
+            }
 
-        tweet_texts = twitter_service.extract_tweet_text(tweets)
-        logger.info(f"Retrieved {len(tweet_texts)} tweets about subnet {netuid}")
+        logger.info(
+            f"Retrieved {len(new_tweets)} new tweets about subnet {netuid} "
+            f"({len(tweets)} in window)"
+        )
 
-        sentiment_score = await sentiment_service.analyze_sentiment(tweet_texts)
-        logger.info(f"Sentiment score: {sentiment_score}")
+        results = await sentiment_service.score_subnet_tweets({netuid: tweets})
+        if netuid not in results:
+            raise RuntimeError(f"No sentiment scores for subnet {netuid}")
+    except Exception as e:
+        logger.error(f"Error in sentiment analysis: {str(e)}")
+        return {"status": "error", "netuid": netuid, "hotkey": hotkey, "error": str(e)}
+
+    return await run_trade(netuid, hotkey, results[netuid].score, tweets)
+
+
+async def run_trade(
+    netuid: int, hotkey: str, sentiment_score: float, tweets: list[dict[str, Any]]
+) -> dict[str, Any]:
+    """Stake or unstake by a subnet's sentiment score, then consume its tweets."""
+    services = runtime.services
+    blockchain_service = services.blockchain
+    logger.info(f"Sentiment score for subnet {netuid}: {sentiment_score}")
 
+    try:
         amount = abs(sentiment_score) * 0.01
 
         if sentiment_score > 0:
             logger.info(f"Positive sentiment ({sentiment_score}): Staking {amount} TAO")
-            await blockchain_service.stake_tao(amount, hotkey, netuid)
+            extrinsic_hash = await blockchain_service.stake_tao(amount, hotkey, netuid)
             operation = "stake"
         else:
             logger.info(
                 f"Negative sentiment ({sentiment_score}): Unstaking {amount} TAO"
             )
-            await blockchain_service.unstake_tao(amount, hotkey, netuid)
+            extrinsic_hash = await blockchain_service.unstake_tao(
+                amount, hotkey, netuid
+            )
             operation = "unstake"
 
+        # Only a completed run consumes the new tweets.
+        await services.twitter.save_subnet_window(netuid, tweets)
+
         return {
             "status": "success",
             "netuid": netuid,
@@ -57,21 +141,27 @@ async def execute_sentiment_analysis(
             "operation": operation,
             "amount": amount,
             "sentiment_score": sentiment_score,
+            # None when netted out against opposing trades in the same window.
+            "extrinsic_hash": extrinsic_hash,
         }
 
     except Exception as e:
-        logger.error(f"Error in sentiment analysis: {str(e)}")
+        logger.error(f"Error in sentiment trade: {str(e)}")
         return {"status": "error", "netuid": netuid, "hotkey": hotkey, "error": str(e)}
 
 
 @celery_app.task(name="analyze_sentiment_and_trade")
 def analyze_sentiment_and_trade(
-    netuid: int = 18, hotkey: str = "5FFApaS75bv5pJHfAp2FVLBj9ZaXuFDjEypsaBNc1wCfe52v"
+    netuid: int = settings.TRADE_DEFAULT_NETUID,
+    hotkey: str = settings.TRADE_DEFAULT_HOTKEY,
+    lease_token: Optional[str] = None,
+    sentiment_score: Optional[float] = None,
+    tweets: Optional[list[dict[str, Any]]] = None,
 ) -> dict[str, Any]:
     """
     Celery task to analyze sentiment and execute a stake/unstake.
-    Delegates to the async function by using the run_async_task helper.
+    Runs the coroutine on the worker process's shared event loop.
     """
-    return run_async_task.delay(
-        "app.tasks.trade.execute_sentiment_analysis", netuid, hotkey
-    ).get()
+    return runtime.run(
+        execute_sentiment_analysis(netuid, hotkey, lease_token, sentiment_score, tweets)
+    )
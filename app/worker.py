@@ -1,6 +1,35 @@
+import asyncio
+import importlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Coroutine, Optional, TypeVar
+
 from celery import Celery
+from celery import Task
+from celery.signals import (
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    worker_init,
+    worker_shutdown,
+)
 
+from app.core.metrics import TASK_DURATION, TASK_QUEUE_WAIT, start_metrics_server
 from app.core.settings import settings
+from app.services.blockchain import BlockchainService
+from app.services.cache import CacheService
+from app.services.http import http_pool
+from app.services.ratelimit import TokenBucket
+from app.services.sentiment import SentimentService
+from app.services.snapshot import DividendSnapshotStore
+from app.services.twitter import TwitterService
+
+logger = logging.getLogger("worker")
+
+T = TypeVar("T")
 
 celery_app = Celery(
     "bittensor_api",
@@ -16,25 +45,234 @@ celery_app.conf.update(
     enable_utc=True,
     worker_hijack_root_logger=False,
     task_track_started=True,
-    task_time_limit=300,
+    # Tasks are I/O bound coroutines: a thread pool lets many of them wait
+    # on one shared event loop instead of one process per in-flight task.
+    # The thread pool ignores task_time_limit; AsyncRuntime.run enforces
+    # CELERY_TASK_TIMEOUT instead.
+    worker_pool="threads",
+    worker_concurrency=settings.CELERY_CONCURRENCY,
+    # Emulated priorities on the Redis broker; 0 is served first.
+    broker_transport_options={
+        "priority_steps": list(range(10)),
+        "queue_order_strategy": "priority",
+    },
+    # autodiscover_tasks looks for app.tasks.tasks, which does not exist.
+    include=["app.tasks.trade", "app.tasks.scheduler"],
 )
 
-celery_app.autodiscover_tasks(["app.tasks"])
+if settings.TRADE_SWEEP_ENABLED:
+    celery_app.conf.beat_schedule = {
+        "sweep-subnets": {
+            "task": "sweep_subnets",
+            "schedule": settings.TRADE_SWEEP_INTERVAL,
+        }
+    }
+
+
+class AsyncRuntime:
+    """
+    One persistent event loop per worker process, shared by all tasks.
+
+    The loop runs in a daemon thread; task threads submit coroutines to it
+    and wait for their result, so long-lived clients (substrate pool, HTTP
+    connections) are created once per process and reused across tasks.
+    """
+
+    def __init__(self) -> None:
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._services: Optional["TaskServices"] = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            return self._ensure_started()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        # A forked child inherits this object but not the loop thread.
+        if self._loop is not None and self._pid == os.getpid():
+            return self._loop
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(
+            target=loop.run_forever, name="async-runtime", daemon=True
+        )
+        thread.start()
+        self._loop, self._thread, self._pid = loop, thread, os.getpid()
+        self._services = None
+        logger.info(f"Started async runtime in process {self._pid}")
+        return loop
+
+    def submit(self, coro: Coroutine[Any, Any, T]) -> Future[T]:
+        """Schedule a coroutine on the shared loop without waiting for it."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+        """
+        Run a coroutine on the shared loop and wait for its result.
+
+        After timeout seconds (CELERY_TASK_TIMEOUT by default) the coroutine
+        is cancelled and TimeoutError is raised.
+        """
+        if timeout is None:
+            timeout = settings.CELERY_TASK_TIMEOUT
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            # Cancels the task on the loop, running its finally blocks.
+            future.cancel()
+            raise TimeoutError(f"Task coroutine did not finish within {timeout}s")
+
+    @property
+    def services(self) -> "TaskServices":
+        """Long-lived service clients bound to this process's loop."""
+        with self._lock:
+            self._ensure_started()
+            if self._services is None:
+                self._services = TaskServices()
+            return self._services
+
+    def stop(self) -> None:
+        """Close shared clients and stop the loop."""
+        with self._lock:
+            loop, services = self._loop, self._services
+            self._loop = self._thread = self._services = None
+        if loop is None:
+            return
+        if services is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(services.close(), loop).result(30)
+            except Exception as e:
+                logger.error(f"Error closing task services: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+
+
+class TaskServices:
+    """Service clients shared by every task running on an AsyncRuntime."""
+
+    def __init__(self) -> None:
+        self.cache = CacheService(
+            url=settings.CACHE_SERVER_URL,
+            lock_lease=settings.CACHE_LOCK_LEASE,
+            lock_max_wait=settings.CACHE_LOCK_MAX_WAIT,
+        )
+        self.twitter = TwitterService(
+            api_key=settings.DATURA_API_KEY.get_secret_value(),
+            cache=self.cache,
+            window_size=settings.TWEET_WINDOW_SIZE,
+            window_ttl=settings.TWEET_WINDOW_TTL,
+            rate_limit=TokenBucket(
+                self.cache,
+                "datura",
+                rate=settings.DATURA_RATE_LIMIT,
+                capacity=settings.DATURA_RATE_BURST,
+                timeout=settings.UPSTREAM_RATE_LIMIT_TIMEOUT,
+            ),
+        )
+        self.sentiment = SentimentService(
+            api_key=settings.CHUTES_API_KEY.get_secret_value(),
+            batch_tokens=settings.SENTIMENT_BATCH_TOKENS,
+            max_tweet_chars=settings.SENTIMENT_MAX_TWEET_CHARS,
+            concurrent_batches=settings.SENTIMENT_CONCURRENT_BATCHES,
+            cache=self.cache,
+            tweet_ttl=settings.SENTIMENT_TWEET_TTL,
+            rate_limit=TokenBucket(
+                self.cache,
+                "chutes",
+                rate=settings.CHUTES_RATE_LIMIT,
+                capacity=settings.CHUTES_RATE_BURST,
+                timeout=settings.UPSTREAM_RATE_LIMIT_TIMEOUT,
+            ),
+        )
+        self.blockchain = BlockchainService(
+            network_endpoint=settings.BLOCKCHAIN_SERVICE_URL,
+            pool_size=settings.SUBSTRATE_POOL_SIZE,
+            health_check_interval=settings.SUBSTRATE_HEALTH_CHECK_INTERVAL,
+            acquire_timeout=settings.SUBSTRATE_ACQUIRE_TIMEOUT,
+            max_concurrent_subnets=settings.SUBNET_QUERY_CONCURRENCY,
+            subnet_timeout=settings.SUBNET_QUERY_TIMEOUT,
+            wallet_name=settings.WALLET_NAME,
+            wallet_path=settings.WALLET_PATH,
+            wallet_password=settings.WALLET_PASSWORD.get_secret_value() or None,
+            trade_window=settings.TRADE_BATCH_WINDOW,
+            trade_max_batch_calls=settings.TRADE_MAX_BATCH_CALLS,
+        )
+        self.snapshots = DividendSnapshotStore(
+            blockchain=self.blockchain,
+            cache=self.cache,
+            head_ttl=settings.DIVIDENDS_HEAD_TTL,
+            snapshot_ttl=settings.DIVIDENDS_SNAPSHOT_TTL,
+            stale_ttl=settings.DIVIDENDS_STALE_TTL,
+        )
+
+    async def close(self) -> None:
+        await self.blockchain.close()
+        await self.cache.close()
+        await http_pool.close()
+
+
+runtime = AsyncRuntime()
+
+
+@worker_shutdown.connect
+def stop_runtime(**kwargs: object) -> None:
+    runtime.stop()
+
+
+@worker_init.connect
+def serve_metrics(**kwargs: object) -> None:
+    if settings.CELERY_METRICS_PORT:
+        start_metrics_server(settings.CELERY_METRICS_PORT)
+
+
+@before_task_publish.connect
+def stamp_published_at(headers: Optional[dict] = None, **kwargs: object) -> None:
+    # Lets the worker measure how long the task waited in the broker.
+    if headers is not None:
+        headers["published_at"] = time.time()
+
+
+_task_started: dict[str, float] = {}
+
+
+@task_prerun.connect
+def record_task_start(
+    task_id: str = "", task: Optional[Task] = None, **kwargs: object
+) -> None:
+    _task_started[task_id] = time.perf_counter()
+    if task is None:
+        return
+    published_at = getattr(task.request, "published_at", None) or (
+        task.request.headers or {}
+    ).get("published_at")
+    if published_at:
+        TASK_QUEUE_WAIT.labels(task.name).observe(max(0.0, time.time() - published_at))
+
+
+@task_postrun.connect
+def record_task_end(
+    task_id: str = "",
+    task: Optional[Task] = None,
+    state: Optional[str] = None,
+    **kwargs: object,
+) -> None:
+    started = _task_started.pop(task_id, None)
+    if started is not None and task is not None:
+        TASK_DURATION.labels(task.name, state or "UNKNOWN").observe(
+            time.perf_counter() - started
+        )
 
 
 @celery_app.task
-def run_async_task(coro_function_path, *args, **kwargs):
+def run_async_task(coro_function_path: str, *args: object, **kwargs: object) -> object:
     """
     Helper task to run async functions in Celery.
     coro_function_path should be a string like "app.tasks.sentiment.execute_sentiment_analysis"
     """
-    import asyncio
-    import importlib
-
     module_path, function_name = coro_function_path.rsplit(".", 1)
     module = importlib.import_module(module_path)
     coro_function = getattr(module, function_name)
 
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    return loop.run_until_complete(coro_function(*args, **kwargs))
+    return runtime.run(coro_function(*args, **kwargs))
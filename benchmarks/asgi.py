@@ -0,0 +1,12 @@
+"""The API wired to the fake chain and fakeredis, for serving under gunicorn."""
+
+import os
+
+from benchmarks.run import configure_environment, install_fakes
+
+configure_environment(os.environ.get("BENCH_REDIS_URL", "redis://localhost:6379/15"))
+install_fakes(use_fakeredis="BENCH_REDIS_URL" not in os.environ)
+
+from app.main import app  # noqa: E402
+
+__all__ = ["app"]
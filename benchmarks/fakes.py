@@ -0,0 +1,284 @@
+import asyncio
+import hashlib
+import json
+import re
+from collections import Counter
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+import httpx
+
+
+class ChainConfig:
+    """Shape and latency of the synthetic chain served by FakeSubstrate."""
+
+    def __init__(
+        self,
+        subnets: int = 32,
+        hotkeys_per_subnet: int = 256,
+        rpc_latency: float = 0.005,
+        page_size: int = 100,
+        head_number: int = 1000,
+    ) -> None:
+        self.subnets = subnets
+        self.hotkeys_per_subnet = hotkeys_per_subnet
+        self.rpc_latency = rpc_latency
+        self.page_size = page_size
+        self.head_number = head_number
+        self.rpc_calls: Counter[str] = Counter()
+        # query_map calls over TaoDividendsPerSubnet that start a subnet.
+        self.subnet_scans = 0
+        self._hotkey_indexes: dict[bytes, int] = {}
+
+    def account_id(self, netuid: int, index: int) -> tuple[int, ...]:
+        """Deterministic 32-byte account id; the same index is shared by subnets."""
+        return tuple(hashlib.sha256(f"hotkey-{index}".encode()).digest())
+
+    def dividend(self, netuid: int, index: int) -> int:
+        return (index + 1) * 1_000 + netuid
+
+    def block_hash(self, number: int) -> str:
+        return "0x" + hashlib.sha256(f"block-{number}".encode()).hexdigest()
+
+    def hotkey_index(self, account: object) -> Optional[int]:
+        """Index of a hotkey given as raw bytes, a tuple of ints or 0x-hex."""
+        if isinstance(account, str):
+            account = bytes.fromhex(account.removeprefix("0x"))
+        if len(self._hotkey_indexes) != self.hotkeys_per_subnet:
+            self._hotkey_indexes = {
+                bytes(self.account_id(0, i)): i for i in range(self.hotkeys_per_subnet)
+            }
+        return self._hotkey_indexes.get(bytes(account))
+
+
+CHAIN = ChainConfig()
+
+
+class ScaleValue:
+    __slots__ = ("value",)
+
+    def __init__(self, value: object) -> None:
+        self.value = value
+
+
+class StorageKey:
+    __slots__ = ("params",)
+
+    def __init__(self, params: list) -> None:
+        self.params = params
+
+    def to_hex(self) -> str:
+        return "0x" + hashlib.sha256(repr(self.params).encode()).hexdigest()
+
+
+class QueryMapResult:
+    """
+    One page of a query_map, loaded by the call like the real one.
+
+    Iterating it yields the page, then fetches the following pages from
+    last_key with one state_getKeysPaged and one state_queryStorageAt each.
+    """
+
+    def __init__(
+        self,
+        records: list[tuple[object, ScaleValue]],
+        last_key: Optional[str],
+        next_page: Callable[[str], Awaitable["QueryMapResult"]],
+    ) -> None:
+        self.records = records
+        self.last_key = last_key
+        self._next_page = next_page
+
+    async def __aiter__(self) -> AsyncIterator[tuple[object, ScaleValue]]:
+        page = self
+        while True:
+            for record in page.records:
+                yield record
+            if page.last_key is None:
+                return
+            page = await self._next_page(page.last_key)
+
+
+async def rpc(chain: ChainConfig, method: str) -> None:
+    chain.rpc_calls[method] += 1
+    if chain.rpc_latency:
+        await asyncio.sleep(chain.rpc_latency)
+
+
+class FakeSubstrate:
+    """Stand-in for AsyncSubstrateInterface serving synthetic dividends."""
+
+    def __init__(self, url: str = "", ss58_format: int = 42, **kwargs: object) -> None:
+        self.url = url
+        self.chain = CHAIN
+
+    async def __aenter__(self) -> "FakeSubstrate":
+        await self.initialize()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+    async def initialize(self) -> None:
+        await rpc(self.chain, "state_getMetadata")
+
+    async def close(self) -> None:
+        pass
+
+    async def rpc_request(self, method: str, params: list) -> dict[str, Any]:
+        await rpc(self.chain, method)
+        return {"result": self.chain.block_hash(self.chain.head_number)}
+
+    async def get_chain_head(self) -> str:
+        await rpc(self.chain, "chain_getHead")
+        return self.chain.block_hash(self.chain.head_number)
+
+    async def get_chain_finalised_head(self) -> str:
+        await rpc(self.chain, "chain_getFinalizedHead")
+        return self.chain.block_hash(self.chain.head_number)
+
+    async def get_block_hash(self, block_number: int) -> str:
+        await rpc(self.chain, "chain_getBlockHash")
+        return self.chain.block_hash(block_number)
+
+    async def get_block_number(self, block_hash: Optional[str]) -> int:
+        await rpc(self.chain, "chain_getHeader")
+        for number in range(self.chain.head_number, -1, -1):
+            if self.chain.block_hash(number) == block_hash:
+                return number
+        return self.chain.head_number
+
+    async def subscribe_block_headers(self, handler: object) -> None:
+        await asyncio.Event().wait()
+
+    async def query_map(
+        self,
+        module: str,
+        storage_function: str,
+        params: Optional[list] = None,
+        block_hash: Optional[str] = None,
+        start_key: Optional[str] = None,
+        page_size: Optional[int] = None,
+        **kwargs: object,
+    ) -> QueryMapResult:
+        chain = self.chain
+        if storage_function == "NetworksAdded":
+            records: list[tuple[object, object]] = [
+                (netuid, True) for netuid in range(chain.subnets)
+            ]
+        elif storage_function == "TaoDividendsPerSubnet":
+            netuid = (params or [0])[0]
+            records = [
+                ((chain.account_id(netuid, i),), chain.dividend(netuid, i))
+                for i in range(chain.hotkeys_per_subnet)
+            ]
+            if start_key is None:
+                chain.subnet_scans += 1
+        else:
+            records = []
+        page_size = page_size or chain.page_size
+        start = int(start_key) if start_key is not None else 0
+        end = min(start + page_size, len(records))
+        await rpc(chain, "state_getKeysPaged")
+        await rpc(chain, "state_queryStorageAt")
+
+        async def next_page(last_key: str) -> QueryMapResult:
+            return await self.query_map(
+                module,
+                storage_function,
+                params,
+                block_hash=block_hash,
+                start_key=last_key,
+                page_size=page_size,
+            )
+
+        return QueryMapResult(
+            [(key, ScaleValue(value)) for key, value in records[start:end]],
+            str(end) if end - start == page_size else None,
+            next_page,
+        )
+
+    async def query(
+        self,
+        module: str,
+        storage_function: str,
+        params: Optional[list] = None,
+        block_hash: Optional[str] = None,
+        **kwargs: object,
+    ) -> ScaleValue:
+        await rpc(self.chain, "state_getStorage")
+        if storage_function == "TaoDividendsPerSubnet" and params:
+            return ScaleValue(self.dividend_at(params) or 0)
+        return ScaleValue(0)
+
+    async def create_storage_key(
+        self,
+        pallet: str,
+        storage_function: str,
+        params: Optional[list] = None,
+        block_hash: Optional[str] = None,
+    ) -> StorageKey:
+        return StorageKey(params or [])
+
+    async def query_multi(
+        self, storage_keys: list[StorageKey], block_hash: Optional[str] = None
+    ) -> list[tuple[StorageKey, ScaleValue]]:
+        await rpc(self.chain, "state_queryStorageAt")
+        # Keys with no storage entry decode to None, as in the real client.
+        return [(key, self.dividend_at(key.params)) for key in storage_keys]
+
+    def dividend_at(self, params: list) -> Optional[int]:
+        netuid, account = params[0], params[1]
+        index = self.chain.hotkey_index(account)
+        if netuid >= self.chain.subnets or index is None:
+            return None
+        return self.chain.dividend(netuid, index)
+
+
+class StubUpstreams:
+    """httpx handler standing in for the Datura and Chutes APIs."""
+
+    def __init__(self, latency: float = 0.05, tweets_per_query: int = 20) -> None:
+        self.latency = latency
+        self.tweets_per_query = tweets_per_query
+        self.calls: Counter[str] = Counter()
+        self.prompt_chars = 0
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(self.latency)
+        body = json.loads(request.content or b"{}")
+        if request.url.host == "apis.datura.ai":
+            self.calls["datura"] += 1
+            return httpx.Response(200, json=self.tweets(body.get("query", "")))
+        self.calls["chutes"] += 1
+        return httpx.Response(200, json=self.completion(body))
+
+    def tweets(self, query: str) -> list[dict[str, Any]]:
+        netuid = int(re.search(r"netuid (\d+)", query).group(1))
+        return [
+            {
+                "id": str(10_000_000 + netuid * 1_000 + i),
+                "text": f"Subnet {netuid} update #{i}: "
+                + ("great progress, bullish" if i % 3 else "outage again, bearish"),
+                "like_count": i * 3,
+                "retweet_count": i,
+            }
+            for i in range(self.tweets_per_query)
+        ]
+
+    def completion(self, body: dict[str, Any]) -> dict[str, Any]:
+        content = body["messages"][-1]["content"]
+        self.prompt_chars += len(content)
+        subnets = []
+        for section in content.split("\n\n"):
+            header, *lines = section.split("\n")
+            netuid = int(re.search(r"\d+", header).group(0))
+            subnets.append(
+                {
+                    "netuid": netuid,
+                    "scores": [60 if "bullish" in line else -40 for line in lines],
+                }
+            )
+        return {"choices": [{"message": {"content": json.dumps({"subnets": subnets})}}]}
@@ -0,0 +1,598 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+import httpx
+
+from benchmarks.fakes import CHAIN, FakeSubstrate, StubUpstreams
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+SWEEP_CONCURRENCY = (1, 10, 100, 500)
+
+Result = dict[str, Any]
+
+
+def configure_environment(redis_url: str) -> None:
+    """Point the app at stand-ins before any app module is imported."""
+    scratch = tempfile.mkdtemp()
+    for name, value in {
+        "API_TOKEN": "bench-token",
+        "DATURA_API_KEY": "bench",
+        "CHUTES_API_KEY": "bench",
+        "CACHE_SERVER_URL": redis_url,
+        "BLOCKCHAIN_SERVICE_URL": "ws://fake-chain",
+        "INGEST_ENABLED": "false",
+        "RATE_LIMIT_ENABLED": "false",
+        "HISTORY_DB_PATH": os.path.join(scratch, "history.sqlite3"),
+        "SNAPSHOT_MMAP_DIR": os.path.join(scratch, "snapshots"),
+    }.items():
+        os.environ.setdefault(name, value)
+
+
+def install_fakes(use_fakeredis: bool) -> str:
+    """Swap the substrate client (and Redis, unless a real one is wanted)."""
+    import app.services.blockchain as blockchain_module
+    import app.services.substrate as substrate_module
+
+    substrate_module.AsyncSubstrateInterface = FakeSubstrate
+    blockchain_module.AsyncSubstrateInterface = FakeSubstrate
+
+    if use_fakeredis:
+        import fakeredis
+
+        import app.services.cache as cache_module
+
+        server = fakeredis.FakeServer()
+
+        def from_url(url: str, **kwargs: object) -> object:
+            return fakeredis.FakeAsyncRedis(server=server, **kwargs)
+
+        cache_module.redis.from_url = from_url
+        return "fakeredis"
+    return "redis"
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def max_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def sample_hotkeys(count: int) -> list[str]:
+    """SS58 addresses of the first count hotkeys on the fake chain."""
+    from app.core.ss58 import decode_account_id
+
+    return [
+        decode_account_id(CHAIN.account_id(0, i))
+        for i in range(min(count, CHAIN.hotkeys_per_subnet))
+    ]
+
+
+async def wait_for_pool(timeout: float = 10.0) -> None:
+    """
+    Wait until every pooled connection is open.
+
+    The pool connects in the background at startup; its metadata fetches
+    would otherwise be counted against whichever scenario runs first.
+    """
+    from app.api.dividends import blockchain_service
+
+    pool = blockchain_service.pool
+    deadline = time.monotonic() + timeout
+    while pool.stats()["open"] < pool.size:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Substrate pool did not open within {timeout}s")
+        await asyncio.sleep(0.01)
+
+
+async def drive(
+    request: Callable[[int], Awaitable[int]], total: int, concurrency: int
+) -> Result:
+    """Issue total requests from concurrency workers; report latency and RPS."""
+    latencies: list[float] = []
+    errors = 0
+    issued = 0
+
+    async def worker() -> None:
+        nonlocal errors, issued
+        while issued < total:
+            index = issued
+            issued += 1
+            started = time.perf_counter()
+            status = await request(index)
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors += 1
+
+    CHAIN.rpc_calls.clear()
+    CHAIN.subnet_scans = 0
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "rps": round(total / elapsed, 1),
+        "rpc_calls": sum(CHAIN.rpc_calls.values()),
+        "subnet_scans": CHAIN.subnet_scans,
+    }
+
+
+async def bench_dividends(
+    client: httpx.AsyncClient, args: argparse.Namespace
+) -> list[Result]:
+    """GET /tao_dividends against a fresh block (cold), then again (warm)."""
+    from app.api.dividends import snapshot_store
+
+    CHAIN.head_number += 1
+    await snapshot_store.publish_head(CHAIN.block_hash(CHAIN.head_number))
+    hotkeys = sample_hotkeys(8)
+    rng = random.Random(args.seed)
+    queries = [
+        {
+            "netuid": rng.randrange(CHAIN.subnets),
+            **({"hotkey": rng.choice(hotkeys)} if rng.random() < 0.5 else {}),
+        }
+        for _ in range(args.requests)
+    ]
+
+    async def request(index: int) -> int:
+        response = await client.get("/api/v1/tao_dividends", params=queries[index])
+        return response.status_code
+
+    results = []
+    for phase in ("cold", "warm"):
+        result = await drive(request, args.requests, args.concurrency)
+        results.append({"name": f"dividends_{phase}", **result})
+    return results
+
+
+async def bench_sweep(
+    client: httpx.AsyncClient, args: argparse.Namespace
+) -> list[Result]:
+    """
+    The same cold workload at rising concurrency, each against a fresh block.
+
+    Single-flight caching means each subnet is scanned once per block
+    however many requests arrive together, so subnet scans and RPC calls
+    must not grow with concurrency.
+    """
+    from app.api.dividends import snapshot_store
+
+    total = max(CHAIN.subnets, args.requests // 4)
+
+    async def request(index: int) -> int:
+        response = await client.get(
+            "/api/v1/tao_dividends", params={"netuid": index % CHAIN.subnets}
+        )
+        return response.status_code
+
+    results = []
+    for concurrency in SWEEP_CONCURRENCY:
+        CHAIN.head_number += 1
+        await snapshot_store.publish_head(CHAIN.block_hash(CHAIN.head_number))
+        result = await drive(request, total, concurrency)
+        results.append({"name": f"sweep_{concurrency}", **result})
+    for metric in ("subnet_scans", "rpc_calls"):
+        counts = {result["name"]: result[metric] for result in results}
+        if len(set(counts.values())) > 1:
+            raise AssertionError(f"{metric} grow with concurrency: {counts}")
+    return results
+
+
+async def bench_batch(
+    client: httpx.AsyncClient, args: argparse.Namespace
+) -> list[Result]:
+    """POST /tao_dividends/batch with 100 pairs per request."""
+    rng = random.Random(args.seed)
+    hotkeys = sample_hotkeys(64)
+    pairs = [
+        {"netuid": rng.randrange(CHAIN.subnets), "hotkey": rng.choice(hotkeys)}
+        for _ in range(100)
+    ]
+
+    async def request(index: int) -> int:
+        response = await client.post(
+            "/api/v1/tao_dividends/batch", json={"pairs": pairs}
+        )
+        return response.status_code
+
+    total = max(1, args.requests // 10)
+    return [{"name": "batch", **await drive(request, total, args.concurrency)}]
+
+
+async def bench_stream(
+    client: httpx.AsyncClient, args: argparse.Namespace
+) -> list[Result]:
+    """Stream the full network as NDJSON from a fresh block, then a stored one."""
+    from app.api.dividends import snapshot_store
+
+    rows = 0
+
+    async def request(index: int) -> int:
+        nonlocal rows
+        async with client.stream("GET", "/api/v1/tao_dividends/stream") as response:
+            async for line in response.aiter_lines():
+                if line:
+                    rows += 1
+            return response.status_code
+
+    results = []
+    for name in ("stream_cold", "stream_stored"):
+        if name == "stream_cold":
+            CHAIN.head_number += 1
+            block_hash = CHAIN.block_hash(CHAIN.head_number)
+            await snapshot_store.publish_head(block_hash)
+        else:
+            await snapshot_store.prefetch(block_hash)
+        rows = 0
+        result = await drive(request, 1, 1)
+        results.append({"name": name, **result, "rows": rows})
+    return results
+
+
+async def bench_rankings(
+    client: httpx.AsyncClient, args: argparse.Namespace
+) -> list[Result]:
+    """Top-k and aggregate queries vs. downloading every subnet."""
+    full = await client.get("/api/v1/tao_dividends")
+    queries = [
+        {"top_k": 10},
+        {"aggregate": "sum_by_hotkey", "top_k": 100},
+        {"aggregate": "sum_by_subnet"},
+    ]
+    sizes: list[int] = []
+
+    async def request(index: int) -> int:
+        response = await client.get(
+            "/api/v1/tao_dividends/rankings", params=queries[index % len(queries)]
+        )
+        sizes.append(len(response.content))
+        return response.status_code
+
+    result = await drive(request, args.requests, args.concurrency)
+    return [
+        {
+            "name": "rankings",
+            **result,
+            "mean_body_bytes": sum(sizes) // max(1, len(sizes)),
+            "full_body_bytes": len(full.content),
+        }
+    ]
+
+
+async def bench_sentiment(
+    client: httpx.AsyncClient, args: argparse.Namespace
+) -> list[Result]:
+    """Score every subnet's tweets twice; the second pass should hit the cache."""
+    from app.api.dividends import cache_service
+    from app.services.http import HTTPClientPool
+    from app.services.sentiment import SentimentService
+    from app.services.twitter import TwitterService
+
+    stubs = StubUpstreams(latency=args.upstream_latency)
+    http = HTTPClientPool(http2=False, transport=stubs.transport())
+    twitter = TwitterService(api_key="bench", http=http, cache=cache_service)
+    sentiment = SentimentService(api_key="bench", http=http, cache=cache_service)
+
+    results = []
+    for phase in ("cold", "warm"):
+        stubs.calls.clear()
+        stubs.prompt_chars = 0
+        started = time.perf_counter()
+        tweets = await asyncio.gather(
+            *(twitter.search_subnet_tweets(netuid) for netuid in range(CHAIN.subnets))
+        )
+        scores = await sentiment.score_subnet_tweets(dict(enumerate(tweets)))
+        results.append(
+            {
+                "name": f"sentiment_{phase}",
+                "subnets": len(scores),
+                "seconds": round(time.perf_counter() - started, 3),
+                "datura_calls": stubs.calls["datura"],
+                "chutes_calls": stubs.calls["chutes"],
+                "prompt_tokens_est": stubs.prompt_chars // 4,
+            }
+        )
+    await http.close()
+    return results
+
+
+async def bench_serialize(
+    client: httpx.AsyncClient, args: argparse.Namespace
+) -> list[Result]:
+    """Per-response cost of serializing a full-network result vs reusing bytes."""
+    from app.api.dividends import body_response, serialize_body, snapshot_store
+
+    result = await snapshot_store.query()
+    iterations = 200
+    started = time.perf_counter()
+    for _ in range(iterations):
+        payload = serialize_body(result)
+    serialize_ms = (time.perf_counter() - started) / iterations * 1000
+    started = time.perf_counter()
+    for _ in range(iterations):
+        body_response(payload, "gzip", {})
+    cached_ms = (time.perf_counter() - started) / iterations * 1000
+    return [
+        {
+            "name": "serialize",
+            "body_bytes": len(payload),
+            "serialize_ms": round(serialize_ms, 3),
+            "cached_bytes_ms": round(cached_ms, 3),
+        }
+    ]
+
+
+async def bench_columnar(
+    client: httpx.AsyncClient, args: argparse.Namespace
+) -> list[Result]:
+    """Heap held by one block's snapshots as dicts vs. mapped columns."""
+    from app.db.columnar import ColumnarSnapshotStore
+
+    hotkeys = sample_hotkeys(CHAIN.hotkeys_per_subnet)
+    snapshots = {
+        netuid: {hotkey: CHAIN.dividend(netuid, i) for i, hotkey in enumerate(hotkeys)}
+        for netuid in range(CHAIN.subnets)
+    }
+    encoded = json.dumps({str(netuid): s for netuid, s in snapshots.items()})
+    store = ColumnarSnapshotStore(tempfile.mkdtemp(), keep=1)
+    block_hash = CHAIN.block_hash(CHAIN.head_number)
+    await store.put(block_hash, snapshots)
+
+    tracemalloc.start()
+    # What each worker's in-process tier holds after decoding from Redis.
+    decoded = json.loads(encoded)
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    del decoded
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    table = await ColumnarSnapshotStore(store.directory, keep=1).get(block_hash)
+    mapped_bytes = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    target = hotkeys[len(hotkeys) // 2]
+    iterations = 200
+    started = time.perf_counter()
+    for _ in range(iterations):
+        {netuid: s[target] for netuid, s in snapshots.items() if target in s}
+    dict_ms = (time.perf_counter() - started) / iterations * 1000
+    started = time.perf_counter()
+    for _ in range(iterations):
+        table.hotkey(target)
+    columnar_ms = (time.perf_counter() - started) / iterations * 1000
+    return [
+        {
+            "name": "columnar",
+            "rows": CHAIN.subnets * len(hotkeys),
+            "dict_heap_kb": dict_bytes // 1024,
+            "mapped_heap_kb": mapped_bytes // 1024,
+            "file_kb": sum(
+                path.stat().st_size for path in store.directory.rglob("*.npy")
+            )
+            // 1024,
+            "hotkey_dict_ms": round(dict_ms, 3),
+            "hotkey_columnar_ms": round(columnar_ms, 3),
+        }
+    ]
+
+
+async def bench_decode(
+    client: httpx.AsyncClient, args: argparse.Namespace
+) -> list[Result]:
+    """Per-key SS58 decode cost of a subnet scan, and single-hotkey pushdown."""
+    from scalecodec.utils.ss58 import ss58_encode
+
+    from app.core.ss58 import address_cache, decode_account_ids
+
+    results = []
+    for size in (256, 4096):
+        keys = [(CHAIN.account_id(0, i),) for i in range(size)]
+
+        def per_key_ns(decode: Callable[[], object], runs: int = 5) -> float:
+            best = float("inf")
+            for _ in range(runs):
+                started = time.perf_counter()
+                decode()
+                best = min(best, time.perf_counter() - started)
+            return round(best / size * 1e9)
+
+        def cold() -> None:
+            address_cache.clear()
+            decode_account_ids(keys)
+
+        results.append(
+            {
+                "name": f"decode_{size}",
+                "keys": size,
+                "per_key_ns": per_key_ns(
+                    lambda: [ss58_encode(bytes(key[0]).hex(), 42) for key in keys]
+                ),
+                "batched_cold_ns": per_key_ns(cold),
+                "batched_warm_ns": per_key_ns(lambda: decode_account_ids(keys)),
+            }
+        )
+
+    # A block with no columnar snapshot, so queries fall through to the chain.
+    from app.api.dividends import snapshot_store
+
+    CHAIN.head_number += 1
+    await snapshot_store.publish_head(CHAIN.block_hash(CHAIN.head_number))
+    hotkey = sample_hotkeys(1)[0]
+    for name, params in (
+        ("hotkey_pushdown", {"netuid": 1, "hotkey": hotkey}),
+        ("hotkey_all_subnets", {"hotkey": hotkey}),
+        ("subnet_scan", {"netuid": 2}),
+    ):
+        CHAIN.rpc_calls.clear()
+        started = time.perf_counter()
+        response = await client.get("/api/v1/tao_dividends", params=params)
+        results.append(
+            {
+                "name": name,
+                "status": response.status_code,
+                "ms": round((time.perf_counter() - started) * 1000, 2),
+                "rpc_calls": sum(CHAIN.rpc_calls.values()),
+            }
+        )
+    return results
+
+
+async def bench_runtime(
+    client: httpx.AsyncClient, args: argparse.Namespace
+) -> list[Result]:
+    """Celery-style throughput: threads submitting I/O-bound coroutines."""
+    from app.core.settings import settings
+    from app.worker import AsyncRuntime
+
+    runtime = AsyncRuntime()
+    total = args.requests
+
+    async def task() -> None:
+        await asyncio.sleep(args.upstream_latency)
+
+    def run_task(_: int) -> None:
+        runtime.run(task())
+
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(settings.CELERY_CONCURRENCY) as pool:
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(loop.run_in_executor(pool, run_task, i) for i in range(total))
+        )
+        elapsed = time.perf_counter() - started
+    runtime.stop()
+    return [
+        {
+            "name": "runtime",
+            "tasks": total,
+            "threads": settings.CELERY_CONCURRENCY,
+            "tasks_per_second": round(total / elapsed, 1),
+        }
+    ]
+
+
+SCENARIOS: dict[
+    str, Callable[[httpx.AsyncClient, argparse.Namespace], Awaitable[list[Result]]]
+] = {
+    "dividends": bench_dividends,
+    "batch": bench_batch,
+    "stream": bench_stream,
+    "rankings": bench_rankings,
+    "sentiment": bench_sentiment,
+    "serialize": bench_serialize,
+    "columnar": bench_columnar,
+    "decode": bench_decode,
+    "runtime": bench_runtime,
+    "sweep": bench_sweep,
+}
+
+
+def compare(results: list[Result], baseline: list[Result]) -> None:
+    """Print each numeric metric next to its baseline value."""
+    previous = {result["name"]: result for result in baseline}
+    for result in results:
+        old = previous.get(result["name"])
+        if old is None:
+            continue
+        changes = []
+        for key, value in result.items():
+            before = old.get(key)
+            if isinstance(value, (int, float)) and isinstance(before, (int, float)):
+                if before and value != before:
+                    changes.append(
+                        f"{key} {before} -> {value} ({(value - before) / before:+.0%})"
+                    )
+        print(f"  {result['name']}: " + ("; ".join(changes) or "unchanged"))
+
+
+async def main(args: argparse.Namespace) -> list[Result]:
+    from app.main import app
+
+    CHAIN.subnets = args.subnets
+    CHAIN.hotkeys_per_subnet = args.hotkeys
+    CHAIN.rpc_latency = args.rpc_latency
+
+    results: list[Result] = []
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        await wait_for_pool()
+        async with httpx.AsyncClient(
+            transport=transport,
+            base_url="http://bench",
+            headers={"Authorization": "Bearer bench-token"},
+            timeout=None,
+        ) as client:
+            for name in args.scenarios:
+                for result in await SCENARIOS[name](client, args):
+                    result["max_rss_mb"] = round(max_rss_mb(), 1)
+                    print(json.dumps(result))
+                    results.append(result)
+    return results
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the API and services against a fake chain and stub upstreams."
+    )
+    parser.add_argument(
+        "scenarios",
+        nargs="*",
+        metavar="scenario",
+        help=f"any of: {', '.join(SCENARIOS)} (default: all)",
+    )
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--subnets", type=int, default=32)
+    parser.add_argument("--hotkeys", type=int, default=256, help="hotkeys per subnet")
+    parser.add_argument("--rpc-latency", type=float, default=0.005)
+    parser.add_argument("--upstream-latency", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--redis-url",
+        default=None,
+        help="use a real Redis instead of fakeredis (e.g. redis://localhost:6379/15)",
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="overwrite the baseline file"
+    )
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+    args.scenarios = args.scenarios or list(SCENARIOS)
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    configure_environment(args.redis_url or "redis://localhost:6379/15")
+    backend = install_fakes(use_fakeredis=args.redis_url is None)
+    print(f"# redis backend: {backend}", file=sys.stderr)
+    results = asyncio.run(main(args))
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+    elif args.baseline.exists():
+        print(f"Compared with {args.baseline}:")
+        compare(results, json.loads(args.baseline.read_text()))
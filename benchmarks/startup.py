@@ -0,0 +1,163 @@
+"""
+Cold start and memory of the API server, per worker.
+
+    python -m benchmarks.startup --workers 4
+
+``import`` times ``import app.main`` in fresh interpreters. ``serve`` starts
+gunicorn on the fake chain twice, with and without preload_app, and reports
+the time until every worker has finished its lifespan startup plus the RSS
+and PSS (resident memory with shared pages split between the processes
+mapping them) of each worker. Memory figures are read from /proc, so Linux only.
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+Result = dict[str, Any]
+
+IMPORT_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app.main
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "bittensor": "bittensor" in sys.modules,
+}))
+"""
+
+
+def bench_import(runs: int) -> Result:
+    """Median import time and peak RSS of app.main in a fresh interpreter."""
+    samples = []
+    env = {**os.environ, "INGEST_ENABLED": "false"}
+    env.setdefault("API_TOKEN", "bench-token")
+    env.setdefault("DATURA_API_KEY", "bench")
+    env.setdefault("CHUTES_API_KEY", "bench")
+    env.setdefault("CACHE_SERVER_URL", "redis://localhost:6379/15")
+    env.setdefault("BLOCKCHAIN_SERVICE_URL", "ws://fake-chain")
+    env.setdefault("SNAPSHOT_MMAP_DIR", "")
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE],
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        "scenario": "startup",
+        "phase": "import",
+        "runs": runs,
+        "import_seconds": round(statistics.median(s["seconds"] for s in samples), 3),
+        "rss_mb": round(statistics.median(s["rss_mb"] for s in samples), 1),
+        "imports_bittensor": any(s["bittensor"] for s in samples),
+    }
+
+
+def memory_mb(pid: int) -> dict[str, float]:
+    """Rss and Pss of a process from /proc/<pid>/smaps_rollup."""
+    values = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines():
+        name, _, rest = line.partition(":")
+        if name in ("Rss", "Pss"):
+            values[name.lower()] = int(rest.split()[0]) / 1024
+    return values
+
+
+def children(pid: int) -> list[int]:
+    path = Path(f"/proc/{pid}/task/{pid}/children")
+    return [int(child) for child in path.read_text().split()]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def bench_serve(workers: int, preload: bool, timeout: float) -> Result:
+    """Boot gunicorn until every worker has started; measure time and memory."""
+    command = [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        "benchmarks.asgi:app",
+        "--worker-class",
+        "uvicorn.workers.UvicornWorker",
+        "--workers",
+        str(workers),
+        "--bind",
+        f"127.0.0.1:{free_port()}",
+    ]
+    if preload:
+        command.append("--preload")
+    started = threading.Event()
+    ready_at: Optional[float] = None
+    lines: list[str] = []
+
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        command, stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, text=True
+    )
+
+    def watch() -> None:
+        nonlocal ready_at
+        booted = 0
+        for line in process.stderr:
+            lines.append(line)
+            if "Application startup complete" in line:
+                booted += 1
+                if booted == workers:
+                    ready_at = time.perf_counter()
+                    started.set()
+
+    threading.Thread(target=watch, daemon=True).start()
+    try:
+        if not started.wait(timeout):
+            raise RuntimeError("gunicorn did not start:\n" + "".join(lines[-20:]))
+        # Let lazily initialised state settle before sampling memory.
+        time.sleep(1.0)
+        master = memory_mb(process.pid)
+        per_worker = [memory_mb(pid) for pid in children(process.pid)]
+    finally:
+        process.terminate()
+        process.wait(30)
+
+    return {
+        "scenario": "startup",
+        "phase": "serve_preload" if preload else "serve",
+        "workers": workers,
+        "cold_start_seconds": round(ready_at - start, 3),
+        "master_rss_mb": round(master["rss"], 1),
+        "worker_rss_mb": round(statistics.mean(w["rss"] for w in per_worker), 1),
+        "worker_pss_mb": round(statistics.mean(w["pss"] for w in per_worker), 1),
+        "total_pss_mb": round(master["pss"] + sum(w["pss"] for w in per_worker), 1),
+    }
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Measure API cold start and per-worker memory."
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--runs", type=int, default=5, help="import measurements")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    print(json.dumps(bench_import(args.runs)))
+    for preload in (False, True):
+        print(json.dumps(bench_serve(args.workers, preload, args.timeout)))
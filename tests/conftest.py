@@ -0,0 +1,38 @@
+import os
+from typing import TYPE_CHECKING, AsyncIterator, Callable
+
+import fakeredis
+import pytest_asyncio
+
+if TYPE_CHECKING:
+    from app.services.cache import CacheService
+
+# Settings are read when app modules are imported; fill in the required ones.
+for name, value in {
+    "API_TOKEN": "test-token",
+    "DATURA_API_KEY": "test-datura-key",
+    "CHUTES_API_KEY": "test-chutes-key",
+    "CACHE_SERVER_URL": "redis://localhost:6379/0",
+    "BLOCKCHAIN_SERVICE_URL": "ws://localhost:9944",
+}.items():
+    os.environ.setdefault(name, value)
+
+
+@pytest_asyncio.fixture
+async def make_cache() -> AsyncIterator[Callable[..., "CacheService"]]:
+    """CacheService instances sharing one in-memory Redis, like separate workers."""
+    from app.services.cache import CacheService
+
+    server = fakeredis.FakeServer()
+    caches: list[CacheService] = []
+
+    def make(**kwargs: float) -> CacheService:
+        cache = CacheService(**kwargs)
+        cache._client = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+        cache._raw_client = fakeredis.FakeAsyncRedis(server=server)
+        caches.append(cache)
+        return cache
+
+    yield make
+    for cache in caches:
+        await cache.close()
@@ -0,0 +1,131 @@
+import asyncio
+from typing import Any, Callable
+
+import pytest
+
+from app.services.cache import CacheService
+
+MakeCache = Callable[..., CacheService]
+
+
+class SlowFactory:
+    """Counts computations, each taking delay seconds."""
+
+    def __init__(self, delay: float = 0.05) -> None:
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self) -> dict[str, Any]:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"value": self.calls}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_in_one_process_compute_once(
+    make_cache: MakeCache,
+) -> None:
+    cache = make_cache()
+    factory = SlowFactory()
+
+    results = await asyncio.gather(
+        *(cache.get_or_compute("key", factory, ttl=60) for _ in range(20))
+    )
+
+    assert factory.calls == 1
+    assert {value["value"] for value, _ in results} == {1}
+    assert await cache.get_or_compute("key", factory, ttl=60) == ({"value": 1}, True)
+
+
+@pytest.mark.asyncio
+async def test_workers_wait_for_the_lease_holder(make_cache: MakeCache) -> None:
+    workers = [make_cache(lock_poll_interval=0.01) for _ in range(3)]
+    factory = SlowFactory()
+
+    results = await asyncio.gather(
+        *(worker.get_or_compute("key", factory, ttl=60) for worker in workers)
+    )
+
+    assert factory.calls == 1
+    assert sorted(cached for _, cached in results) == [False, True, True]
+
+
+@pytest.mark.asyncio
+async def test_lease_is_renewed_while_computing(make_cache: MakeCache) -> None:
+    holder, waiter = (
+        make_cache(lock_lease=0.1, lock_poll_interval=0.01) for _ in range(2)
+    )
+    factory = SlowFactory(delay=0.5)
+
+    computing = asyncio.create_task(holder.get_or_compute("key", factory, ttl=60))
+    await asyncio.sleep(0.3)
+    assert await waiter.computing(["key"]) == [True]
+    value, cached = await waiter.get_or_compute("key", factory, ttl=60)
+
+    assert (value, cached) == ({"value": 1}, True)
+    assert await computing == ({"value": 1}, False)
+    assert factory.calls == 1
+    assert await waiter.computing(["key"]) == [False]
+
+
+@pytest.mark.asyncio
+async def test_waiters_compute_themselves_after_lock_max_wait(
+    make_cache: MakeCache,
+) -> None:
+    holder = make_cache(lock_lease=0.1)
+    waiter = make_cache(lock_lease=0.1, lock_max_wait=0.1, lock_poll_interval=0.01)
+    factory = SlowFactory(delay=0.5)
+
+    computing = asyncio.create_task(holder.get_or_compute("key", factory, ttl=60))
+    await asyncio.sleep(0.01)
+    assert await waiter.get_or_compute("key", factory, ttl=60) == ({"value": 2}, False)
+    await computing
+    assert factory.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_expired_value_is_served_stale_while_revalidating(
+    make_cache: MakeCache,
+) -> None:
+    cache = make_cache()
+    factory = SlowFactory()
+    await cache.get_or_compute("key", factory, ttl=60, stale_ttl=60)
+    # Soft expiry: only the stale copy is left.
+    await cache._client.delete("key")
+
+    assert await cache.get_or_compute("key", factory, ttl=60, stale_ttl=60) == (
+        {"value": 1},
+        True,
+    )
+    await asyncio.gather(*cache._inflight.values())
+    assert factory.calls == 2
+    assert await cache.get("key") == {"value": 2}
+
+
+@pytest.mark.asyncio
+async def test_stale_value_outlives_a_failed_revalidation(
+    make_cache: MakeCache,
+) -> None:
+    cache = make_cache()
+    await cache.set("key", {"value": 1}, ttl=60, stale_ttl=60)
+    await cache._client.delete("key")
+
+    async def failing() -> dict[str, Any]:
+        raise ConnectionError("chain unavailable")
+
+    for _ in range(2):
+        value, cached = await cache.get_or_compute("key", failing, ttl=60, stale_ttl=60)
+        assert (value, cached) == ({"value": 1}, True)
+        await asyncio.gather(*cache._inflight.values(), return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_last_good_value_reports_its_age(make_cache: MakeCache) -> None:
+    cache = make_cache()
+    assert await cache.get_last_good("last") is None
+
+    await cache.set_last_good("last", b"body", ttl=60)
+    body, age = await cache.get_last_good("last")
+
+    assert body == b"body"
+    assert 0 <= age < 5
@@ -0,0 +1,74 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.db.columnar import ColumnarSnapshot, ColumnarSnapshotStore
+
+
+def block(number: int) -> str:
+    return f"0x{number:064x}"
+
+
+SNAPSHOTS = {
+    1: {"5alice": 10, "5bob": 2**63 + 1},
+    3: {"5bob": 7, "5carol": 0},
+    4: {},
+}
+
+
+def test_subnets_hotkeys_and_pairs_are_looked_up_from_columns() -> None:
+    table = ColumnarSnapshot.build(block(1), SNAPSHOTS)
+
+    assert table.netuids() == [1, 3, 4]
+    assert table.subnet(1) == {"5alice": 10, "5bob": 2**63 + 1}
+    assert table.subnet(3, "5carol") == {"5carol": 0}
+    assert table.subnet(4) == {}
+    assert table.subnet(2) == {}
+    assert table.hotkey("5bob") == {1: 2**63 + 1, 3: 7}
+    assert table.hotkey("5nobody") == {}
+    assert table.lookup(
+        [(3, "5bob"), (1, "5carol"), (-1, "5bob"), (1, "5a-much-longer-hotkey")]
+    ) == [7, None, None, None]
+
+
+def test_empty_snapshot_has_no_rows() -> None:
+    table = ColumnarSnapshot.build(block(1), {})
+
+    assert table.netuids() == []
+    assert table.hotkey("5alice") == {}
+    assert table.lookup([(1, "5alice")]) == [None]
+
+
+@pytest.mark.asyncio
+async def test_saved_blocks_are_mapped_by_other_processes(tmp_path: Path) -> None:
+    writer = ColumnarSnapshotStore(str(tmp_path), keep=2)
+    await writer.put(block(1), SNAPSHOTS)
+
+    table = await ColumnarSnapshotStore(str(tmp_path), keep=2).get(block(1))
+
+    assert table is not None
+    assert isinstance(table.amounts, np.memmap)
+    assert table.subnet(1) == SNAPSHOTS[1]
+    assert await writer.get(block(2)) is None
+
+
+@pytest.mark.asyncio
+async def test_only_the_newest_blocks_are_kept(tmp_path: Path) -> None:
+    store = ColumnarSnapshotStore(str(tmp_path), keep=2)
+    for number in range(4):
+        await store.put(block(number), SNAPSHOTS)
+
+    reader = ColumnarSnapshotStore(str(tmp_path), keep=2)
+    assert len(list(tmp_path.iterdir())) == 2
+    assert await reader.get(block(3)) is not None
+    assert await reader.get(block(0)) is None
+
+
+@pytest.mark.asyncio
+async def test_names_other_than_block_hashes_are_rejected(tmp_path: Path) -> None:
+    store = ColumnarSnapshotStore(str(tmp_path))
+
+    assert await store.put("../escape", SNAPSHOTS) is None
+    assert await store.get("../escape") is None
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,107 @@
+from typing import AsyncIterator, Callable, Optional
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+
+from app.api import dividends
+from app.core.settings import settings
+from app.schemas.blockchain import TaoDividendResponse
+from app.services.cache import CacheService
+
+HEADERS = {"Authorization": f"Bearer {settings.API_TOKEN.get_secret_value()}"}
+
+
+class FakeSnapshots:
+    """Head block and query results for the dividends route."""
+
+    def __init__(self) -> None:
+        self.failed: list[int] = []
+        self.queries = 0
+
+    async def head(self) -> str:
+        return "0xhead"
+
+    async def query(
+        self,
+        netuid: Optional[int] = None,
+        hotkey: Optional[str] = None,
+        block_hash: Optional[str] = None,
+    ) -> TaoDividendResponse:
+        self.queries += 1
+        return TaoDividendResponse(
+            results={"netuid_1": {"5hk": 7}},
+            netuid="all" if netuid is None else netuid,
+            hotkey=hotkey or "all",
+            failed_netuids=self.failed,
+        )
+
+
+@pytest.fixture
+def snapshots(monkeypatch: pytest.MonkeyPatch) -> FakeSnapshots:
+    snapshots = FakeSnapshots()
+    monkeypatch.setattr(dividends, "snapshot_store", snapshots)
+    return snapshots
+
+
+@pytest.fixture
+def trades(monkeypatch: pytest.MonkeyPatch) -> list[tuple[int, str]]:
+    queued: list[tuple[int, str]] = []
+
+    async def enqueue_trade(cache: CacheService, netuid: int, hotkey: str) -> None:
+        queued.append((netuid, hotkey))
+
+    monkeypatch.setattr(dividends, "enqueue_trade", enqueue_trade)
+    return queued
+
+
+@pytest_asyncio.fixture
+async def client(
+    make_cache: Callable[..., CacheService], monkeypatch: pytest.MonkeyPatch
+) -> AsyncIterator[httpx.AsyncClient]:
+    monkeypatch.setattr(dividends, "cache_service", make_cache())
+    app = FastAPI()
+    app.include_router(dividends.router)
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_matching_etag_gets_a_304_without_queueing_a_trade(
+    client: httpx.AsyncClient,
+    snapshots: FakeSnapshots,
+    trades: list[tuple[int, str]],
+) -> None:
+    params = {"netuid": 1, "hotkey": "5hk", "trade": "true"}
+    first = await client.get("/api/v1/tao_dividends", params=params, headers=HEADERS)
+    etag = first.headers["ETag"]
+
+    second = await client.get(
+        "/api/v1/tao_dividends",
+        params=params,
+        headers={**HEADERS, "If-None-Match": etag},
+    )
+
+    assert first.status_code == 200
+    assert second.status_code == 304
+    assert second.headers["ETag"] == etag
+    assert trades == [(1, "5hk")]
+    assert snapshots.queries == 1
+
+
+@pytest.mark.asyncio
+async def test_partial_results_are_never_revalidated(
+    client: httpx.AsyncClient, snapshots: FakeSnapshots
+) -> None:
+    snapshots.failed = [2]
+
+    response = await client.get(
+        "/api/v1/tao_dividends", headers={**HEADERS, "If-None-Match": "*"}
+    )
+
+    assert response.status_code == 200
+    assert "ETag" not in response.headers
+    assert response.json()["failed_netuids"] == [2]
@@ -0,0 +1,128 @@
+import asyncio
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+import pytest
+import pytest_asyncio
+
+from app.db.history import DividendHistoryStore
+from app.services.history import BlockNotFoundError, DividendHistoryService
+
+HEAD = 1000
+
+
+class FakeChain:
+    """Blocks 0..HEAD on two subnets; tracks how many scans overlap."""
+
+    def __init__(self) -> None:
+        self.scanning = 0
+        self.peak = 0
+        self.scans = 0
+        self.hotkey_reads = 0
+
+    async def get_block_hash(self, number: int) -> Optional[str]:
+        return f"0x{number:x}" if number <= HEAD else None
+
+    async def get_finalized_block_number(self) -> int:
+        return HEAD
+
+    async def get_netuids(self, block_hash: str) -> list[int]:
+        return [1, 2]
+
+    async def fetch_subnet_dividends(
+        self, netuid: int, block_hash: str
+    ) -> dict[str, int]:
+        self.scans += 1
+        self.scanning += 1
+        self.peak = max(self.peak, self.scanning)
+        await asyncio.sleep(0.001)
+        self.scanning -= 1
+        return {"5hk": netuid * int(block_hash, 16)}
+
+    async def fetch_hotkey_dividends(
+        self, netuids: list[int], hotkey: str, block_hash: str
+    ) -> dict[int, int]:
+        self.hotkey_reads += 1
+        if hotkey != "5hk":
+            return {}
+        return {netuid: netuid * int(block_hash, 16) for netuid in netuids}
+
+
+@pytest_asyncio.fixture
+async def store(tmp_path: Path) -> AsyncIterator[DividendHistoryStore]:
+    store = DividendHistoryStore(path=str(tmp_path / "history.sqlite3"))
+    yield store
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_series_bounds_concurrent_blocks(store: DividendHistoryStore) -> None:
+    chain = FakeChain()
+    history = DividendHistoryService(chain, store, max_concurrent_points=3)
+
+    points = await history.series(0, 99, netuid=2)
+
+    assert [point.block for point in points] == list(range(100))
+    assert points[7].results == {"netuid_2": {"5hk": 14}}
+    assert chain.peak <= 3
+
+
+@pytest.mark.asyncio
+async def test_full_network_series_has_a_lower_cap(
+    store: DividendHistoryStore,
+) -> None:
+    history = DividendHistoryService(
+        FakeChain(), store, max_points=100, max_network_points=5
+    )
+
+    assert len(await history.series(0, 40, step=10, hotkey="5hk")) == 5
+    with pytest.raises(ValueError, match="at most 5"):
+        await history.series(0, 50, step=10)
+    assert len(await history.series(0, 40, step=10)) == 5
+
+
+@pytest.mark.asyncio
+async def test_unknown_block_raises_block_not_found(
+    store: DividendHistoryStore,
+) -> None:
+    history = DividendHistoryService(FakeChain(), store)
+
+    with pytest.raises(BlockNotFoundError):
+        await history.series(HEAD - 1, HEAD + 1, netuid=1)
+
+
+@pytest.mark.asyncio
+async def test_hotkey_series_reads_entries_instead_of_scanning(
+    store: DividendHistoryStore,
+) -> None:
+    chain = FakeChain()
+    history = DividendHistoryService(chain, store)
+
+    points = await history.series(10, 12, hotkey="5hk")
+
+    assert points[0].results == {"netuid_1": {"5hk": 10}, "netuid_2": {"5hk": 20}}
+    assert not any(point.cached for point in points)
+    assert (chain.scans, chain.hotkey_reads) == (0, 3)
+
+    again = await history.series(10, 12, hotkey="5hk")
+    missing = await history.query("0xa", hotkey="5other")
+
+    assert [point.results for point in again] == [point.results for point in points]
+    assert all(point.cached for point in again)
+    assert missing.results == {}
+    assert chain.hotkey_reads == 4
+    assert (await history.query("0xa", hotkey="5other")).cached
+
+
+@pytest.mark.asyncio
+async def test_hotkey_query_uses_stored_snapshots(
+    store: DividendHistoryStore,
+) -> None:
+    chain = FakeChain()
+    history = DividendHistoryService(chain, store)
+
+    await history.query("0xa", netuid=1)
+    result = await history.query("0xa", hotkey="5hk")
+
+    assert result.results == {"netuid_1": {"5hk": 10}, "netuid_2": {"5hk": 20}}
+    assert (chain.scans, chain.hotkey_reads) == (1, 1)
@@ -0,0 +1,183 @@
+import asyncio
+from collections import Counter
+from typing import Callable
+
+import httpx
+import pytest
+
+from app.services import http as http_module
+from app.services.http import HTTPClientPool
+
+
+class CountingBucket:
+    def __init__(self) -> None:
+        self.taken = 0
+
+    async def acquire(self, cost: float = 1.0) -> None:
+        self.taken += 1
+
+
+@pytest.fixture
+def sleeps(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    """Record backoff delays instead of sleeping through them."""
+    delays: list[float] = []
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay: float) -> None:
+        delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(http_module.asyncio, "sleep", sleep)
+    return delays
+
+
+def scripted(statuses: list[int], headers: dict[str, str] | None = None) -> Callable:
+    """Handler answering with statuses in order, then 200."""
+    remaining = list(statuses)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        status = remaining.pop(0) if remaining else 200
+        return httpx.Response(status, headers=headers if status != 200 else None)
+
+    return handler
+
+
+def make_pool(handler: Callable, **kwargs: object) -> HTTPClientPool:
+    return HTTPClientPool(http2=False, transport=httpx.MockTransport(handler), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_retries_transient_statuses_with_exponential_backoff(
+    sleeps: list[float],
+) -> None:
+    pool = make_pool(scripted([503, 502, 429]), backoff_base=1.0, backoff_max=10.0)
+
+    response = await pool.post("https://upstream.test/api")
+
+    assert response.status_code == 200
+    assert len(sleeps) == 3
+    for attempt, delay in enumerate(sleeps):
+        assert 0 <= delay <= 2**attempt
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_returns_last_response_after_max_retries(sleeps: list[float]) -> None:
+    pool = make_pool(scripted([500] * 10), max_retries=2)
+
+    response = await pool.post("https://upstream.test/api")
+
+    assert response.status_code == 500
+    assert len(sleeps) == 2
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried(sleeps: list[float]) -> None:
+    pool = make_pool(scripted([404]))
+
+    response = await pool.post("https://upstream.test/api")
+
+    assert response.status_code == 404
+    assert sleeps == []
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_honoured_and_capped(sleeps: list[float]) -> None:
+    pool = make_pool(
+        scripted([429, 429], headers={"Retry-After": "3"}), backoff_max=2.0
+    )
+    await pool.post("https://upstream.test/api")
+    assert sleeps == [2.0, 2.0]
+    await pool.close()
+
+    sleeps.clear()
+    pool = make_pool(scripted([503], headers={"Retry-After": "1"}))
+    await pool.post("https://upstream.test/api")
+    assert sleeps == [1.0]
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_transport_errors_are_retried(sleeps: list[float]) -> None:
+    failures = [httpx.ConnectError("refused")]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if failures:
+            raise failures.pop()
+        return httpx.Response(200)
+
+    pool = make_pool(handler)
+
+    assert (await pool.post("https://upstream.test/api")).status_code == 200
+    assert len(sleeps) == 1
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_every_attempt_takes_a_rate_limit_token(sleeps: list[float]) -> None:
+    bucket = CountingBucket()
+    pool = make_pool(scripted([429, 503]))
+
+    await pool.post("https://upstream.test/api", rate_limit=bucket)
+
+    assert bucket.taken == 3
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped_per_host() -> None:
+    in_flight: Counter[str] = Counter()
+    peak: Counter[str] = Counter()
+    release = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        in_flight[host] += 1
+        peak[host] = max(peak[host], in_flight[host])
+        await release.wait()
+        in_flight[host] -= 1
+        return httpx.Response(200)
+
+    pool = make_pool(handler, per_host_concurrency=2)
+    requests = asyncio.gather(
+        *(
+            pool.post(f"https://{host}.test/api")
+            for host in ("a", "b")
+            for _ in range(5)
+        )
+    )
+    await asyncio.sleep(0.05)
+    assert in_flight == {"a.test": 2, "b.test": 2}
+
+    release.set()
+    responses = await asyncio.wait_for(requests, 5)
+    assert [response.status_code for response in responses] == [200] * 10
+    assert peak == {"a.test": 2, "b.test": 2}
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_waiting_for_tokens_does_not_hold_a_host_slot() -> None:
+    class GatedBucket:
+        def __init__(self) -> None:
+            self.open = asyncio.Event()
+
+        async def acquire(self, cost: float = 1.0) -> None:
+            await self.open.wait()
+
+    bucket = GatedBucket()
+    pool = make_pool(scripted([]), per_host_concurrency=1)
+    limited = asyncio.create_task(
+        pool.post("https://upstream.test/api", rate_limit=bucket)
+    )
+    await asyncio.sleep(0)
+
+    response = await asyncio.wait_for(pool.post("https://upstream.test/api"), 1)
+
+    assert response.status_code == 200
+    assert not limited.done()
+    bucket.open.set()
+    assert (await limited).status_code == 200
+    await pool.close()
@@ -0,0 +1,123 @@
+from typing import Callable, Optional
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+
+from app.core.middleware import AuthRateLimitMiddleware, batch_cost, request_cost
+from app.services.cache import CacheService
+
+COSTS = {"hotkey": 1, "subnet": 2, "network": 20, "history": 20, "trade": 10}
+
+
+def scope(path: str, query: str = "") -> dict[str, object]:
+    return {"path": path, "query_string": query.encode()}
+
+
+@pytest.mark.parametrize(
+    "path, query, cost",
+    [
+        ("/api/v1/tao_dividends", "", 20),
+        ("/api/v1/tao_dividends", "netuid=1", 2),
+        ("/api/v1/tao_dividends", "hotkey=5hk", 1),
+        ("/api/v1/tao_dividends", "netuid=1&hotkey=5hk", 1),
+        ("/api/v1/tao_dividends", "netuid=1&trade=true", 12),
+        ("/api/v1/tao_dividends", "netuid=1&trade=false", 2),
+        ("/api/v1/tao_dividends", "hotkey=5hk&block=10", 2),
+        ("/api/v1/tao_dividends", "netuid=1&hotkey=5hk&block_hash=0x1", 1),
+        ("/api/v1/tao_dividends", "block=10", 20),
+        ("/api/v1/tao_dividends/history", "start_block=1&end_block=2", 20),
+        ("/api/v1/tao_dividends/rankings", "top_k=10", 1),
+        ("/api/v1/tao_dividends/batch", "", None),
+    ],
+)
+def test_request_cost(path: str, query: str, cost: Optional[int]) -> None:
+    assert request_cost(scope(path, query), COSTS) == cost
+
+
+def test_batch_cost_charges_each_subnet_once_and_each_pair() -> None:
+    pairs = [(1, "5a"), (1, "5b"), (2, "5a")]
+
+    assert batch_cost(pairs, COSTS) == 2 * 2 + 3 * 1
+
+
+def make_client(cache: CacheService, burst: float = 20) -> httpx.AsyncClient:
+    app = FastAPI()
+
+    @app.get("/api/v1/tao_dividends")
+    async def dividends() -> dict[str, str]:
+        return {"ok": "yes"}
+
+    @app.post("/api/v1/tao_dividends/batch")
+    async def batch(request: Request) -> dict[str, float]:
+        return {"wait": await request.state.charge_quota(burst + 1)}
+
+    @app.get("/health")
+    async def health() -> dict[str, str]:
+        return {"status": "ok"}
+
+    app.add_middleware(
+        AuthRateLimitMiddleware,
+        cache=cache,
+        token="secret",
+        rate=1,
+        burst=burst,
+        costs=COSTS,
+    )
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://test",
+        headers={"Authorization": "Bearer secret"},
+    )
+
+
+@pytest.mark.asyncio
+async def test_requests_need_the_bearer_token(
+    make_cache: Callable[..., CacheService],
+) -> None:
+    async with make_client(make_cache()) as client:
+        missing = await client.get(
+            "/api/v1/tao_dividends", headers={"Authorization": ""}
+        )
+        wrong = await client.get(
+            "/api/v1/tao_dividends", headers={"Authorization": "Bearer nope"}
+        )
+        health = await client.get("/health", headers={"Authorization": ""})
+
+    assert (missing.status_code, missing.json()) == (
+        401,
+        {"detail": "Not authenticated"},
+    )
+    assert wrong.status_code == 401
+    assert wrong.headers["WWW-Authenticate"] == "Bearer"
+    assert health.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_quota_is_charged_by_cost_and_shared_across_workers(
+    make_cache: Callable[..., CacheService],
+) -> None:
+    first, second = make_client(make_cache()), make_client(make_cache())
+    async with first, second:
+        allowed = await first.get("/api/v1/tao_dividends", params={"netuid": 1})
+        # 2 of the 20 unit burst are used; a network request needs all 20.
+        limited = await second.get("/api/v1/tao_dividends")
+        hotkey = await second.get("/api/v1/tao_dividends", params={"hotkey": "5hk"})
+
+    assert allowed.status_code == 200
+    assert limited.status_code == 429
+    assert limited.headers["Retry-After"] == "2"
+    assert hotkey.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_batch_routes_charge_their_own_cost(
+    make_cache: Callable[..., CacheService],
+) -> None:
+    async with make_client(make_cache(), burst=5) as client:
+        first = await client.post("/api/v1/tao_dividends/batch")
+        second = await client.post("/api/v1/tao_dividends/batch")
+
+    # Costs above the burst are charged as the whole burst.
+    assert first.json() == {"wait": 0.0}
+    assert 4 < second.json()["wait"] <= 5
@@ -0,0 +1,34 @@
+import asyncio
+from typing import Callable
+
+import pytest
+
+from app.services.cache import CacheService
+from app.services.ratelimit import TokenBucket
+
+
+@pytest.mark.asyncio
+async def test_acquire_waits_for_a_refill(
+    make_cache: Callable[..., CacheService],
+) -> None:
+    bucket = TokenBucket(make_cache(), "upstream", rate=20, capacity=1)
+    loop = asyncio.get_running_loop()
+
+    await bucket.acquire()
+    started = loop.time()
+    await bucket.acquire()
+
+    assert loop.time() - started >= 0.04
+
+
+@pytest.mark.asyncio
+async def test_acquire_raises_instead_of_waiting_past_its_timeout(
+    make_cache: Callable[..., CacheService],
+) -> None:
+    cache = make_cache()
+    patient = TokenBucket(cache, "upstream", rate=1, capacity=1)
+    hurried = TokenBucket(cache, "upstream", rate=1, capacity=1, timeout=0.5)
+
+    await patient.acquire()
+    with pytest.raises(TimeoutError, match="within 0.5s"):
+        await asyncio.wait_for(hurried.acquire(), 0.1)
@@ -0,0 +1,199 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Optional
+
+import pytest
+
+from app.services.blockchain import BlockchainService
+from app.services.trading import RAO_PER_TAO
+
+
+class FakeStorageKey:
+    def __init__(self, name: str, params: list[Any]) -> None:
+        self.name = name
+        self.params = params
+
+    def to_hex(self) -> str:
+        return f"{self.name}{self.params}"
+
+
+class FakeSubstrate:
+    """Records composed calls and submitted extrinsics instead of signing them."""
+
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.next_index = 7
+        self.submitted: list[tuple[dict[str, Any], Optional[int]]] = []
+        # netuid -> (SubnetTAO, SubnetAlphaIn): alpha costs 0.5 TAO on subnet 3.
+        self.reserves = {3: (1_000 * RAO_PER_TAO, 2_000 * RAO_PER_TAO)}
+
+    async def create_storage_key(
+        self,
+        module: str,
+        name: str,
+        params: list[Any],
+        block_hash: Optional[str] = None,
+    ) -> FakeStorageKey:
+        return FakeStorageKey(name, params)
+
+    async def query_multi(
+        self, storage_keys: list[FakeStorageKey], block_hash: Optional[str] = None
+    ) -> list[tuple[FakeStorageKey, Optional[int]]]:
+        index = {"SubnetTAO": 0, "SubnetAlphaIn": 1}
+        return [
+            (key, self.reserves.get(key.params[0], (None, None))[index[key.name]])
+            for key in storage_keys
+        ]
+
+    async def get_account_next_index(self, address: str) -> int:
+        return self.next_index
+
+    async def compose_call(
+        self, module: str, function: str, params: dict[str, Any]
+    ) -> dict[str, Any]:
+        return {"module": module, "function": function, "params": params}
+
+    async def create_signed_extrinsic(
+        self, call: dict[str, Any], keypair: object, nonce: Optional[int] = None
+    ) -> tuple[dict[str, Any], Optional[int]]:
+        return call, nonce
+
+    async def submit_extrinsic(
+        self,
+        extrinsic: tuple[dict[str, Any], Optional[int]],
+        wait_for_inclusion: bool = False,
+        wait_for_finalization: bool = False,
+    ) -> SimpleNamespace:
+        if self.fail:
+            raise ConnectionError("node went away")
+        self.submitted.append(extrinsic)
+        return SimpleNamespace(extrinsic_hash=f"0x{len(self.submitted):02x}")
+
+
+class FakePool:
+    def __init__(self, substrate: FakeSubstrate) -> None:
+        self.substrate = substrate
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[FakeSubstrate]:
+        yield self.substrate
+
+
+def make_blockchain(
+    substrate: FakeSubstrate, max_batch_calls: int = 64
+) -> BlockchainService:
+    blockchain = BlockchainService(
+        "ws://unused", trade_window=0.01, trade_max_batch_calls=max_batch_calls
+    )
+    blockchain.pool = FakePool(substrate)
+    blockchain.trades._keypair = SimpleNamespace(ss58_address="5Coldkey")
+    return blockchain
+
+
+def call_names(call: dict[str, Any]) -> list[str]:
+    return [inner["function"] for inner in call["params"]["calls"]]
+
+
+@pytest.mark.asyncio
+async def test_intents_are_summed_into_one_batch_all() -> None:
+    substrate = FakeSubstrate()
+    blockchain = make_blockchain(substrate)
+
+    hashes = await asyncio.gather(
+        blockchain.stake_tao(1.0, "hk1", 1),
+        blockchain.stake_tao(0.5, "hk1", 1),
+        blockchain.stake_tao(2.0, "hk2", 1),
+    )
+
+    assert hashes == ["0x01"] * 3
+    [(call, nonce)] = substrate.submitted
+    assert nonce == 7
+    assert (call["module"], call["function"]) == ("Utility", "batch_all")
+    assert [inner["params"] for inner in call["params"]["calls"]] == [
+        {"hotkey": "hk1", "netuid": 1, "amount_staked": 1_500_000_000},
+        {"hotkey": "hk2", "netuid": 1, "amount_staked": 2 * RAO_PER_TAO},
+    ]
+    assert blockchain.trades.stats()["calls"] == 2
+
+
+@pytest.mark.asyncio
+async def test_opposing_intents_are_netted_in_tao() -> None:
+    substrate = FakeSubstrate()
+    blockchain = make_blockchain(substrate)
+
+    hashes = await asyncio.gather(
+        blockchain.stake_tao(1.0, "hk1", 3),
+        blockchain.unstake_tao(1.5, "hk1", 3),
+        blockchain.stake_tao(2.0, "hk2", 3),
+        blockchain.unstake_tao(2.0, "hk2", 3),
+    )
+
+    assert hashes == ["0x01", "0x01", None, None]
+    [(call, _)] = substrate.submitted
+    # 0.5 TAO net unstaked at 0.5 TAO per alpha.
+    assert call == {
+        "module": "SubtensorModule",
+        "function": "remove_stake",
+        "params": {"hotkey": "hk1", "netuid": 3, "amount_unstaked": RAO_PER_TAO},
+    }
+    assert blockchain.trades.stats()["netted"] == 1
+
+
+@pytest.mark.asyncio
+async def test_root_unstake_is_priced_one_to_one() -> None:
+    substrate = FakeSubstrate()
+    blockchain = make_blockchain(substrate)
+
+    assert await blockchain.unstake_tao(0.25, "hk1", 0) == "0x01"
+    [(call, _)] = substrate.submitted
+    assert call["function"] == "remove_stake"
+    assert call["params"]["amount_unstaked"] == RAO_PER_TAO // 4
+
+
+@pytest.mark.asyncio
+async def test_unstake_without_a_pool_price_fails() -> None:
+    substrate = FakeSubstrate()
+    blockchain = make_blockchain(substrate)
+
+    with pytest.raises(RuntimeError, match="No pool reserves for subnet 9"):
+        await blockchain.unstake_tao(1.0, "hk1", 9)
+    assert substrate.submitted == []
+
+
+@pytest.mark.asyncio
+async def test_full_window_is_split_into_batches_with_consecutive_nonces() -> None:
+    substrate = FakeSubstrate()
+    blockchain = make_blockchain(substrate, max_batch_calls=2)
+
+    await asyncio.gather(*(blockchain.stake_tao(1.0, f"hk{i}", 1) for i in range(5)))
+
+    assert sorted(nonce for _, nonce in substrate.submitted) == [7, 8, 9]
+    assert blockchain.trades.stats()["calls"] == 5
+
+
+@pytest.mark.asyncio
+async def test_zero_amount_is_not_submitted() -> None:
+    substrate = FakeSubstrate()
+    blockchain = make_blockchain(substrate)
+
+    assert await blockchain.stake_tao(0.0, "hk1", 1) is None
+    assert substrate.submitted == []
+
+
+@pytest.mark.asyncio
+async def test_failed_submission_fails_every_waiter_and_refetches_the_nonce() -> None:
+    substrate = FakeSubstrate(fail=True)
+    blockchain = make_blockchain(substrate)
+
+    results = await asyncio.gather(
+        blockchain.stake_tao(1.0, "hk1", 1),
+        blockchain.unstake_tao(1.0, "hk2", 3),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    substrate.fail = False
+    substrate.next_index = 12
+    assert await blockchain.stake_tao(1.0, "hk1", 1) == "0x01"
+    assert substrate.submitted[0][1] == 12
@@ -0,0 +1,39 @@
+import asyncio
+from typing import Iterator
+
+import pytest
+
+from app.worker import AsyncRuntime
+
+
+@pytest.fixture
+def runtime() -> Iterator[AsyncRuntime]:
+    runtime = AsyncRuntime()
+    yield runtime
+    runtime.stop()
+
+
+def test_run_returns_the_coroutine_result(runtime: AsyncRuntime) -> None:
+    async def answer() -> int:
+        await asyncio.sleep(0)
+        return 42
+
+    assert runtime.run(answer(), timeout=5) == 42
+
+
+def test_run_cancels_the_coroutine_on_timeout(runtime: AsyncRuntime) -> None:
+    cleaned_up = asyncio.Event()
+
+    async def hang() -> None:
+        try:
+            await asyncio.sleep(60)
+        finally:
+            cleaned_up.set()
+
+    with pytest.raises(TimeoutError):
+        runtime.run(hang(), timeout=0.05)
+
+    async def wait_for_cleanup() -> None:
+        await asyncio.wait_for(cleaned_up.wait(), 5)
+
+    runtime.run(wait_for_cleanup(), timeout=5)